@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: índice invertido del catálogo vs recorrido lineal original
+
+Compara, por consulta, el process_products original (aplanar todas las
+tiendas y llamar Product.matches_query con cada producto) contra
+CatalogIndex.search / best_match sobre el mismo catálogo sintético.
+
+Uso:
+    python benchmarks/bench_catalog_index.py [--products N] [--rounds N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_fixtures import QUERIES, build_catalog
+from services.catalog_index import CatalogIndex
+
+def legacy_process_products(products, query):
+    """Implementación original de MessageProcessor.process_products (referencia)"""
+    all_products = []
+    for store_products in products.values():
+        all_products.extend(store_products)
+
+    matched_product = None
+    for product in all_products:
+        if product.matches_query(query):
+            matched_product = product
+            break
+
+    return matched_product, all_products[:3]
+
+def per_query_us(fn, rounds):
+    """Tiempo medio por consulta en microsegundos y peor consulta"""
+    worst = 0.0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in QUERIES:
+            t = time.perf_counter()
+            fn(query)
+            worst = max(worst, time.perf_counter() - t)
+    total = time.perf_counter() - started
+    return total / (rounds * len(QUERIES)) * 1e6, worst * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.products)
+    index = CatalogIndex(catalog)
+    stats = index.get_stats()
+    print(f"Catálogo: {stats['products']} productos, {stats['vocabulary']} términos, "
+          f"construcción {stats['build_ms']} ms")
+
+    legacy_rounds = max(1, args.rounds // 10)
+    legacy_avg, legacy_worst = per_query_us(lambda q: legacy_process_products(catalog, q), legacy_rounds)
+    search_avg, search_worst = per_query_us(lambda q: index.search(q, limit=10), args.rounds)
+    match_avg, match_worst = per_query_us(index.best_match, args.rounds)
+
+    print(f"{'método':<28}{'media (µs)':>14}{'peor (µs)':>14}")
+    print(f"{'recorrido lineal original':<28}{legacy_avg:>14.1f}{legacy_worst:>14.1f}")
+    print(f"{'CatalogIndex.search':<28}{search_avg:>14.1f}{search_worst:>14.1f}")
+    print(f"{'CatalogIndex.best_match':<28}{match_avg:>14.1f}{match_worst:>14.1f}")
+    print(f"Aceleración (search): {legacy_avg / search_avg:.0f}x")
+
+    legacy_hits = sum(legacy_process_products(catalog, q)[0] is not None for q in QUERIES)
+    index_hits = sum(index.best_match(q) is not None for q in QUERIES)
+    print(f"Consultas con producto encontrado: original {legacy_hits}/{len(QUERIES)}, "
+          f"índice {index_hits}/{len(QUERIES)}")
+
+if __name__ == "__main__":
+    main()
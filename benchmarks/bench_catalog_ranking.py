@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: alternativas BM25 vs "los tres primeros productos"
+
+Mide la latencia de CatalogRanker.top_k sobre un catálogo sintético y la
+relevancia de las alternativas: proporción de alternativas que contienen
+todos los términos de la consulta y proporción disponibles.
+
+Uso:
+    python benchmarks/bench_catalog_ranking.py [--products N] [--rounds N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_fixtures import QUERIES, build_catalog
+from services.catalog_index import CatalogIndex, tokenize
+from services.catalog_ranker import CatalogRanker
+
+def relevance(index, query, products):
+    """(alternativas con todos los términos, alternativas disponibles)"""
+    terms = set(index.query_terms(query))
+    full = sum(terms <= set(tokenize(p.nombre)) for p in products)
+    available = sum(p.disponibilidad in ("Disponible", "Últimas unidades") for p in products)
+    return full, available
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.products)
+    started = time.perf_counter()
+    index = CatalogIndex(catalog)
+    ranker = CatalogRanker(index)
+    print(f"Índice + estadísticas BM25: {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"para {len(index)} productos")
+
+    worst = 0.0
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        for query in QUERIES:
+            t = time.perf_counter()
+            ranker.top_k(query, 3)
+            worst = max(worst, time.perf_counter() - t)
+    avg = (time.perf_counter() - started) / (args.rounds * len(QUERIES))
+    print(f"top_k(3): media {avg * 1e6:.0f} µs, peor {worst * 1e6:.0f} µs")
+
+    # "Los tres primeros" del process_products original
+    legacy = [p for store in catalog.values() for p in store][:3]
+    totals = {"original": [0, 0], "bm25": [0, 0]}
+    for query in QUERIES:
+        for name, products in (("original", legacy), ("bm25", [p for p, _ in ranker.top_k(query, 3)])):
+            full, available = relevance(index, query, products)
+            totals[name][0] += full
+            totals[name][1] += available
+
+    slots = 3 * len(QUERIES)
+    for name, (full, available) in totals.items():
+        print(f"{name:<10} con todos los términos {full}/{slots}   disponibles {available}/{slots}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rastreo de una tienda con distintos niveles de concurrencia y con caché
+
+Levanta una tienda sintética local (aiohttp) con categorías paginadas y
+fichas de producto, con una latencia fija por petición, y la rastrea con
+ScrapingService. Con un solo worker el tiempo es páginas x latencia; con
+el pool acotado se solapan las esperas de red. Después rastrea dos veces
+con la caché de páginas: los listados envían ETag (la segunda vez
+responden 304) y las fichas no (se reconocen por el hash del contenido).
+
+Uso:
+    python benchmarks/bench_crawler.py [--categories 6] [--pages 5] [--latency 0.05] [--concurrency 1,4,8] [--host-rate 0]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from services.scraping_service import ScrapingService
+
+PRODUCTS_PER_PAGE = 12
+
+def build_store(categories, pages, latency):
+    """Aplicación aiohttp con inicio, categorías paginadas y fichas de producto"""
+    served = {"bytes": 0}
+
+    def respond(request, text, etag=True):
+        """Respuesta HTML; con ETag, 304 si el cliente ya la tiene"""
+        headers = {}
+        if etag:
+            headers["ETag"] = f'"{zlib.crc32(text.encode()):08x}"'
+            if request.headers.get("If-None-Match") == headers["ETag"]:
+                return web.Response(status=304, headers=headers)
+        served["bytes"] += len(text.encode())
+        return web.Response(text=text, content_type="text/html", headers=headers)
+
+    kinds = ["laptop", "monitor", "teclado", "mouse", "celular", "tablet", "cargador", "ssd"]
+
+    def card(category, page, position):
+        name = f"{kinds[category % len(kinds)].title()} Pro {category}-{page}-{position}"
+        slug = name.lower().replace(" ", "_")
+        return (f'<div class="card"><a href="/producto/{slug}/"><h3>{name}</h3></a>'
+                f'<span class="price">$ {(category + 1) * 100 + position}.000</span></div>')
+
+    async def home(request):
+        await asyncio.sleep(latency)
+        links = "".join(f'<a href="/categoria/c{c}/">Categoría {c}</a>' for c in range(categories))
+        return respond(request, f"<nav>{links}<a href='/contacto'>Contacto</a></nav>")
+
+    async def category(request):
+        await asyncio.sleep(latency)
+        c = int(request.match_info["category"][1:])
+        page = int(request.query.get("page", "1"))
+        cards = "".join(card(c, page, p) for p in range(PRODUCTS_PER_PAGE))
+        pager = "".join(f'<a href="/categoria/c{c}/?page={n}">{n}</a>' for n in range(1, pages + 1))
+        return respond(request, f"{cards}<div class='pager'>{pager}</div>")
+
+    async def product(request):
+        await asyncio.sleep(latency)
+        name = request.match_info["slug"].replace("_", " ").title()
+        return respond(request, f"<h1>{name}</h1><p>$ 100.000</p>", etag=False)
+
+    async def contact(request):
+        await asyncio.sleep(latency)
+        return respond(request, "<h2>Contacto</h2>")
+
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_get("/contacto", contact)
+    app.router.add_get("/categoria/{category}/", category)
+    app.router.add_get("/producto/{slug}/", product)
+    return app, served
+
+async def run(args):
+    app, served = build_store(args.categories, args.pages, args.latency)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/"
+
+    settings.CRAWL_MAX_PAGES = args.max_pages
+    settings.CRAWL_MAX_DEPTH = 3
+    settings.CRAWL_HOST_RATE = args.host_rate
+    settings.PAGE_CACHE_ENABLED = False
+    print(f"Latencia por petición: {args.latency * 1000:.0f} ms, máximo {args.max_pages} páginas")
+    print(f"{'workers':>8}{'páginas':>10}{'productos':>11}{'tiempo (s)':>12}{'páginas/s':>11}")
+    try:
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            settings.CRAWL_CONCURRENCY = concurrency
+            async with ScrapingService() as scraper:
+                started = time.perf_counter()
+                products = await scraper._scrape_website(url, "Sintética")
+                seconds = time.perf_counter() - started
+            pages = scraper.crawl_stats["Sintética"]["pages"]
+            print(f"{concurrency:>8}{pages:>10}{len(products):>11}{seconds:>12.2f}{pages / seconds:>11.1f}")
+
+        # Caché de páginas: primer rastreo (fría) y siguiente (caliente)
+        print(f"\n{'caché':>8}{'páginas':>10}{'304':>6}{'iguales':>9}{'extraídas':>11}{'KB recibidos':>14}{'tiempo (s)':>12}")
+        with tempfile.TemporaryDirectory() as tmp:
+            settings.PAGE_CACHE_ENABLED = True
+            settings.PAGE_CACHE_PATH = os.path.join(tmp, "page_cache.db")
+            settings.CRAWL_CONCURRENCY = int(args.concurrency.split(",")[-1])
+            for label in ("fría", "caliente"):
+                served["bytes"] = 0
+                async with ScrapingService() as scraper:
+                    started = time.perf_counter()
+                    await scraper._scrape_website(url, "Sintética")
+                    seconds = time.perf_counter() - started
+                stats = scraper.crawl_stats["Sintética"]
+                print(f"{label:>8}{stats['pages']:>10}{stats['not_modified']:>6}{stats['unchanged']:>9}"
+                      f"{stats['parsed']:>11}{served['bytes'] / 1024:>14.0f}{seconds:>12.2f}")
+    finally:
+        await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, default=6)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--max-pages", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,4,8")
+    parser.add_argument("--host-rate", type=float, default=0, help="peticiones/s por host (0 = sin límite)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark de deduplicación: índice TTL ordenado vs set con reconstrucción
+
+Alimenta 1M de IDs de mensaje donde ~10% son reenvíos recientes (como los
+reintentos de webhook) y compara tiempo por operación, duplicados
+detectados y memoria.
+
+Uso:
+    python benchmarks/bench_dedup_index.py [--messages N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ttl_index import TTLDedupIndex
+
+class LegacySetIndex:
+    """Estrategia original de MessageProcessor: set + set(list(...)[trim:])"""
+
+    def __init__(self, capacity: int = 1000, trim: int = 200):
+        self.capacity = capacity
+        self.trim = trim
+        self.processed_messages = set()
+
+    def check_and_add(self, key) -> bool:
+        if key in self.processed_messages:
+            return True
+        self.processed_messages.add(key)
+        if len(self.processed_messages) > self.capacity:
+            self.processed_messages = set(list(self.processed_messages)[self.trim:])
+        return False
+
+def build_stream(messages: int, seed: int = 7):
+    """IDs únicos con ~10% de reenvíos de uno de los últimos 500 mensajes"""
+    rng = random.Random(seed)
+    stream = []
+    resent = 0
+    for i in range(messages):
+        if i > 500 and rng.random() < 0.1:
+            stream.append(stream[-rng.randint(1, 500)])
+            resent += 1
+        else:
+            stream.append(f"573{i % 10_000_000:07d}@s.whatsapp.net:3EB0{i:016X}")
+    return stream, resent
+
+def run(make_index, stream):
+    """Medir tiempo (sin tracemalloc) y luego memoria pico en otra pasada"""
+    index = make_index()
+    started = time.perf_counter()
+    duplicates = 0
+    for key in stream:
+        if index.check_and_add(key):
+            duplicates += 1
+    elapsed = time.perf_counter() - started
+
+    # Latencia del peor caso (los recortes O(n) aparecen aquí)
+    index = make_index()
+    worst = 0
+    clock_ns = time.perf_counter_ns
+    for key in stream:
+        op_started = clock_ns()
+        index.check_and_add(key)
+        worst = max(worst, clock_ns() - op_started)
+
+    index = make_index()
+    tracemalloc.start()
+    for key in stream:
+        index.check_and_add(key)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, duplicates, worst, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    stream, resent = build_stream(args.messages)
+
+    # Reloj simulado: 200 mensajes por segundo, TTL de 15 minutos
+    tick = {"now": 0.0}
+    def clock():
+        tick["now"] += 1 / 200
+        return tick["now"]
+
+    results = [
+        ("set original (1k, recorta 200)", LegacySetIndex),
+        ("set original escalado (100k)", lambda: LegacySetIndex(100_000, 20_000)),
+        ("TTLDedupIndex (TTL 900s, 100k)", lambda: TTLDedupIndex(ttl=900, max_size=100_000, clock=clock)),
+    ]
+
+    print(f"Mensajes: {len(stream):,}  reenvíos reales: {resent:,}")
+    print(f"{'índice':<34}{'ns/op':>8}{'peor op (ms)':>14}{'duplicados':>12}{'detección':>11}{'pico MB':>10}")
+    for name, make_index in results:
+        elapsed, duplicates, worst, peak = run(make_index, stream)
+        print(f"{name:<34}{elapsed / len(stream) * 1e9:>8.0f}{worst / 1e6:>14.2f}{duplicates:>12,}"
+              f"{duplicates / resent:>10.1%}{peak / 1e6:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: corrección de tipeo con índice de trigramas vs comparar con cada producto
+
+Para consultas con errores ("lapto hp", "samsumg galaxi") compara el
+costo de CatalogIndex.best_match con corrección por trigramas contra la
+alternativa ingenua de puntuar cada nombre con difflib, a distintos
+tamaños de catálogo.
+
+Uso:
+    python benchmarks/bench_fuzzy_lookup.py [--sizes 1000,10000,100000] [--min-similarity 0.55]
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_fixtures import TYPO_QUERIES, build_catalog
+from services.catalog_index import CatalogIndex
+
+# Por encima de este tamaño la comparación ingenua tarda demasiado
+NAIVE_MAX_PRODUCTS = 10_000
+
+def naive_best(products, query):
+    """Producto con mayor similitud difflib contra la consulta completa"""
+    query = query.lower()
+    matcher = difflib.SequenceMatcher(a=query)
+    best, best_ratio = None, 0.0
+    for product in products:
+        matcher.set_seq2(product.nombre.lower())
+        ratio = matcher.ratio()
+        if ratio > best_ratio:
+            best, best_ratio = product, ratio
+    return best
+
+def avg_us(fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in TYPO_QUERIES:
+            fn(query)
+    return (time.perf_counter() - started) / (rounds * len(TYPO_QUERIES)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--min-similarity", type=float, default=0.55)
+    args = parser.parse_args()
+
+    print(f"{'productos':>10}{'difflib (µs)':>16}{'trigramas (µs)':>16}{'encontrados':>14}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        catalog = build_catalog(size)
+        index = CatalogIndex(catalog)
+
+        # Primera pasada sin caché de correcciones: mide el costo real del índice
+        index.fuzzy._corrections.clear()
+        fuzzy_us = avg_us(lambda q: index.best_match(q, args.min_similarity), 1)
+
+        if size <= NAIVE_MAX_PRODUCTS:
+            naive_us = f"{avg_us(lambda q: naive_best(index.products, q), 1):.0f}"
+        else:
+            naive_us = "-"
+
+        found = sum(index.best_match(q, args.min_similarity) is not None for q in TYPO_QUERIES)
+        print(f"{size:>10}{naive_us:>16}{fuzzy_us:>16.0f}{found:>10}/{len(TYPO_QUERIES)}")
+
+if __name__ == "__main__":
+    main()
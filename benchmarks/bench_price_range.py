@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: consultas con rango de precio, índice ordenado vs filtro lineal
+
+Compara resolver "laptops de menos de 2 millones" filtrando todo el
+catálogo producto por producto contra PriceIndex.lookup (bisect sobre el
+arreglo de precios) cruzado con los bitmaps de los términos de la
+consulta, y mide process_products completo (filtro más ranking BM25 de
+los candidatos).
+
+Uso:
+    python benchmarks/bench_price_range.py [--products N] [--rounds N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_fixtures import build_catalog
+from config.settings import settings
+from services.message_processor import MessageProcessor
+from utils.bitmaps import bitmap_count, bitmap_from_ids
+
+PRICE_QUERIES = [
+    "laptops de menos de 2 millones",
+    "celulares samsung entre 1 y 2 millones",
+    "monitor por debajo de 800 mil",
+    "discos ssd hasta 300 mil",
+    "audifonos bluetooth de 200 a 500 mil",
+    "tablet desde 3 millones",
+]
+
+def linear_filter(index, terms, min_price, max_price):
+    """Referencia: recorrer todos los productos comparando términos y precio"""
+    return [
+        doc_id for doc_id, product in enumerate(index.products)
+        if product.precio_cop
+        and (not terms or any(term in index.doc_tokens[doc_id] for term in terms))
+        and (min_price is None or product.precio_cop >= min_price)
+        and (max_price is None or product.precio_cop <= max_price)
+    ]
+
+def indexed_filter(index, prices, terms, min_price, max_price):
+    """Rango con bisect cruzado con la unión de los bitmaps de los términos"""
+    bitmap = bitmap_from_ids(prices.lookup(min_price, max_price), len(index))
+    if terms:
+        named = 0
+        for term in terms:
+            named |= index.term_bitmap(term)
+        bitmap &= named
+    return bitmap
+
+def avg_us(fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in PRICE_QUERIES:
+            fn(query)
+    return (time.perf_counter() - started) / (rounds * len(PRICE_QUERIES)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    # Solo filtro y BM25: la búsqueda semántica no interviene en rangos de precio
+    settings.SEMANTIC_SEARCH_ENABLED = False
+    processor = MessageProcessor()
+    catalog = build_catalog(args.products)
+    index = processor.build_catalog_index(catalog)
+    prices = processor.price_index
+
+    parsed = {}
+    for query in PRICE_QUERIES:
+        min_price, max_price, rest = processor.extract_price_range(query)
+        parsed[query] = (index.query_terms(rest), min_price, max_price)
+
+    linear = avg_us(lambda q: linear_filter(index, *parsed[q]), max(1, args.rounds // 5))
+    indexed = avg_us(lambda q: indexed_filter(index, prices, *parsed[q]), args.rounds)
+    full = avg_us(lambda q: processor.process_products(catalog, q), args.rounds)
+
+    print(f"Catálogo: {len(index)} productos, {len(prices)} con precio")
+    print(f"{'método':<32}{'media (µs)':>14}")
+    print(f"{'filtro lineal':<32}{linear:>14.1f}")
+    print(f"{'PriceIndex.lookup + bitmaps':<32}{indexed:>14.1f}")
+    print(f"{'process_products (con ranking)':<32}{full:>14.1f}")
+    for query in PRICE_QUERIES:
+        terms, min_price, max_price = parsed[query]
+        candidates = bitmap_count(indexed_filter(index, prices, terms, min_price, max_price))
+        assert candidates == len(linear_filter(index, terms, min_price, max_price))
+        print(f"  {query!r}: {candidates} candidatos")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memoria del catálogo con Product compacto (tracemalloc)
+
+Compara el dataclass anterior (un __dict__ por producto, textos sin
+internar) con Product actual (__slots__, tienda/precio/disponibilidad
+internados, nombre en minúsculas y normalizado precalculados), y los
+tokens por producto del índice sin y con vocabulario compartido. Los
+campos se decodifican de bytes para que cada producto tenga sus propios
+textos, como los que devuelve el scraping.
+
+Uso:
+    python benchmarks/bench_product_memory.py [--sizes 100000,500000]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_fixtures import build_catalog
+from models.product import Product
+from services.catalog_index import tokenize, tokenize_normalized
+from utils.helpers import parse_price
+
+@dataclass
+class LegacyProduct:
+    """Product tal como era antes: dataclass con __dict__ por instancia"""
+    nombre: str
+    tienda: str
+    precio: str = "Consultar"
+    disponibilidad: str = "Consultar"
+    imagen: Optional[str] = None
+    precio_cop: Optional[int] = None
+
+    def __post_init__(self):
+        if self.precio_cop is None:
+            self.precio_cop = parse_price(self.precio)
+
+def measure(build):
+    """Memoria retenida (MB) por lo que construye build"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return retained / 1e6
+
+def scraped_fields(size):
+    """Campos como bytes: cada decodificación crea textos nuevos, como el scraping"""
+    catalog = build_catalog(size)
+    return [
+        tuple(value.encode("utf-8") for value in (p.nombre, p.tienda, p.precio, p.disponibilidad))
+        for products in catalog.values() for p in products
+    ]
+
+def canonical_tokens(products):
+    vocabulary = {}
+    return [
+        tuple(vocabulary.setdefault(t, t) for t in dict.fromkeys(tokenize_normalized(p.nombre_normalizado)))
+        for p in products
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,500000")
+    args = parser.parse_args()
+
+    print(f"{'productos':>10}{'dataclass (MB)':>16}{'slots (MB)':>12}{'B/producto':>12}"
+          f"{'tokens (MB)':>13}{'vocabulario (MB)':>18}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        fields = scraped_fields(size)
+        legacy_mb = measure(lambda: [LegacyProduct(*(v.decode("utf-8") for v in row)) for row in fields])
+        compact_mb = measure(lambda: [Product(*(v.decode("utf-8") for v in row)) for row in fields])
+
+        products = [Product(*(v.decode("utf-8") for v in row)) for row in fields]
+        tokens_mb = measure(lambda: [tuple(dict.fromkeys(tokenize(p.nombre))) for p in products])
+        vocabulary_mb = measure(lambda: canonical_tokens(products))
+
+        print(f"{size:>10}{legacy_mb:>16.1f}{compact_mb:>12.1f}{compact_mb * 1e6 / size:>12.0f}"
+              f"{tokens_mb:>13.1f}{vocabulary_mb:>18.1f}")
+        del products, fields
+
+if __name__ == "__main__":
+    main()
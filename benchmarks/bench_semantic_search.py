@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: búsqueda semántica vectorizada sobre el catálogo (requiere numpy)
+
+Mide la construcción de la matriz de embeddings, la carga de la matriz
+persistida y el costo por consulta (un producto matriz-vector más
+argpartition) a distintos tamaños de catálogo. Los tamaños mayores que
+--max-build se arman repitiendo la matriz del mayor catálogo construido:
+el costo de la búsqueda depende solo de la forma de la matriz.
+
+Uso:
+    python benchmarks/bench_semantic_search.py [--sizes 10000,100000,1000000] [--dims 128]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_fixtures import QUERIES, build_catalog
+from services.catalog_index import CatalogIndex
+from services.semantic_index import SemanticIndex, build_semantic_index, np
+
+# Consultas sin nombre de producto: las que BM25 no resuelve
+CONCEPT_QUERIES = [
+    "algo para jugar",
+    "un computador para la universidad",
+    "para escuchar musica",
+    "necesito guardar fotos",
+]
+
+def avg_ms(index, vectors, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for vector in vectors:
+            index.search_vector(vector, 3)
+    return (time.perf_counter() - started) / (rounds * len(vectors)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dims", type=int, default=128)
+    parser.add_argument("--max-build", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    if not SemanticIndex.available():
+        print("numpy no está instalado: pip install numpy")
+        return
+
+    queries = QUERIES + CONCEPT_QUERIES
+    largest = None
+    print(f"{'productos':>10}{'construir (ms)':>16}{'cargar (ms)':>13}{'consulta (ms)':>15}{'matriz (MB)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            build_ms = load_ms = "-"
+            if size <= args.max_build:
+                catalog = CatalogIndex(build_catalog(size))
+                names = [product.nombre for product in catalog.products]
+                path = os.path.join(tmp, f"semantic_{size}.npy")
+
+                started = time.perf_counter()
+                index = build_semantic_index(catalog.doc_tokens, catalog.df, names, args.dims, path)
+                build_ms = f"{(time.perf_counter() - started) * 1000:.0f}"
+
+                started = time.perf_counter()
+                build_semantic_index(catalog.doc_tokens, catalog.df, names, args.dims, path)
+                load_ms = f"{(time.perf_counter() - started) * 1000:.0f}"
+                largest = (catalog, index)
+            elif largest is not None:
+                # Repetir la matriz del mayor catálogo hasta el tamaño pedido
+                base = largest[1]
+                reps = -(-size // base.matrix.shape[0])
+                matrix = np.ascontiguousarray(np.tile(base.matrix, (reps, 1))[:size])
+                index = SemanticIndex(matrix, base.idf, base.default_idf, "")
+            else:
+                continue
+
+            vectors = [v for v in (index.encode_query(q) for q in queries) if v is not None]
+            query_ms = avg_ms(index, vectors, args.rounds)
+            matrix_mb = index.matrix.nbytes / 1e6
+            print(f"{size:>10}{build_ms:>16}{load_ms:>13}{query_ms:>15.2f}{matrix_mb:>13.0f}")
+
+    if largest is not None:
+        catalog, index = largest
+        print("\nEjemplos (catálogo más grande construido):")
+        for query in CONCEPT_QUERIES:
+            hits = index.search(query, 3)
+            names = ", ".join(catalog.products[doc_id].nombre[:32] for doc_id, _ in hits)
+            print(f"  {query!r}: {names}")
+
+if __name__ == "__main__":
+    main()
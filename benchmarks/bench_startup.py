@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: arranque con scraping en frío vs arranque desde el snapshot
+
+El arranque en frío extrae los productos del HTML de las tiendas (HTML
+sintético con el formato que lee ScrapingService, más una latencia de
+red simulada por tienda) y construye todos los índices. El arranque
+desde snapshot carga el catálogo y los índices ya construidos.
+
+Uso:
+    python benchmarks/bench_startup.py [--sizes 1000,10000,100000] [--latency 2.0]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_fixtures import build_catalog
+from config.settings import settings
+from services.message_processor import MessageProcessor
+from services.scraping_service import ScrapingService
+from utils.catalog_snapshot import load_snapshot, save_snapshot
+
+def store_html(products):
+    """Página de tienda con un título y un precio por producto"""
+    return "\n".join(
+        f'<div class="card"><h3>{p.nombre}</h3><span class="price">{p.precio}</span></div>'
+        for p in products
+    )
+
+def cold_start(pages, latency):
+    """Scraping (latencia simulada + extracción) y construcción de índices"""
+    scraper = ScrapingService()
+    catalog = {}
+    for store, html in pages.items():
+        time.sleep(latency)
+        catalog[store] = scraper._extract_products_from_html(html, store)
+    processor = MessageProcessor()
+    processor.build_catalog_index(catalog)
+    return catalog, processor
+
+def snapshot_start(path):
+    """Carga del snapshot y adopción de los índices"""
+    header, payload = load_snapshot(path)
+    processor = MessageProcessor()
+    processor.restore_indexes(payload["indexes"])
+    return payload["catalog"], processor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--latency", type=float, default=2.0, help="segundos de red simulados por tienda")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    # Sin NumPy de por medio: se compara catálogo e índices propios
+    settings.SEMANTIC_SEARCH_ENABLED = False
+
+    print(f"Latencia simulada por tienda: {args.latency:.1f} s")
+    print(f"{'productos':>10}{'frío (ms)':>12}{'sin red (ms)':>14}{'snapshot (ms)':>15}{'tamaño (MB)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            pages = {store: store_html(products) for store, products in build_catalog(size).items()}
+
+            started = time.perf_counter()
+            catalog, processor = cold_start(pages, args.latency)
+            cold_ms = (time.perf_counter() - started) * 1000
+            network_ms = args.latency * len(pages) * 1000
+
+            path = os.path.join(tmp, f"snapshot_{size}.bin")
+            written = save_snapshot(
+                path,
+                {"catalog": catalog, "indexes": processor.export_indexes()},
+                {"products": size, "updated_at": time.time()}
+            )
+
+            started = time.perf_counter()
+            loaded, restored = snapshot_start(path)
+            snapshot_ms = (time.perf_counter() - started) * 1000
+
+            assert restored.catalog_index.source is loaded
+            print(f"{size:>10}{cold_ms:>12.0f}{cold_ms - network_ms:>14.0f}{snapshot_ms:>15.0f}{written / 1e6:>13.1f}")
+
+if __name__ == "__main__":
+    main()
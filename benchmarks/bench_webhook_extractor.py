@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: extractor compilado vs WhatsAppMessage.from_webhook_data original
+
+Uso:
+    python benchmarks/bench_webhook_extractor.py [--iterations N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.webhook_extractor import extract_webhook_fields, get_extractor_stats
+from webhook_payloads import PAYLOADS
+
+def legacy_extract(data):
+    """Implementación original de WhatsAppMessage.from_webhook_data (referencia)"""
+    # Extraer datos básicos
+    server_url = (
+        data.get('body', {}).get('URL del servidor') or
+        data.get('body', {}).get('server_url') or
+        data.get('URL del servidor') or
+        data.get('server_url') or
+        ''
+    )
+
+    instance_name = (
+        data.get('body', {}).get('nombreInstancia') or
+        data.get('body', {}).get('instance') or
+        data.get('body', {}).get('instancia') or
+        data.get('nombreInstancia') or
+        data.get('instance') or
+        ''
+    )
+
+    api_key = (
+        data.get('body', {}).get('clave API') or
+        data.get('body', {}).get('apikey') or
+        data.get('body', {}).get('apikey') or
+        data.get('clave API') or
+        data.get('apikey') or
+        ''
+    )
+
+    # Extraer datos del mensaje
+    message_id = (
+        data.get('body', {}).get('data', {}).get('identificación') or
+        data.get('body', {}).get('data', {}).get('id') or
+        data.get('body', {}).get('data', {}).get('ID del mensaje') or
+        data.get('data', {}).get('identificación') or
+        data.get('data', {}).get('id') or
+        ''
+    )
+
+    chat_id = (
+        data.get('body', {}).get('data', {}).get('Jid remoto') or
+        data.get('body', {}).get('data', {}).get('remoteJid') or
+        data.get('body', {}).get('data', {}).get('ID de chat') or
+        data.get('data', {}).get('Jid remoto') or
+        data.get('data', {}).get('remoteJid') or
+        ''
+    )
+
+    content = (
+        data.get('body', {}).get('data', {}).get('mensaje', {}).get('conversación') or
+        data.get('body', {}).get('data', {}).get('mensaje', {}).get('text') or
+        data.get('body', {}).get('data', {}).get('contenido') or
+        data.get('body', {}).get('data', {}).get('message', {}).get('conversation') or
+        data.get('body', {}).get('data', {}).get('message', {}).get('text') or
+        data.get('data', {}).get('mensaje', {}).get('conversación') or
+        data.get('data', {}).get('mensaje', {}).get('text') or
+        data.get('data', {}).get('contenido') or
+        data.get('data', {}).get('message', {}).get('conversation') or
+        data.get('data', {}).get('message', {}).get('text') or
+        ''
+    )
+
+    user_name = (
+        data.get('body', {}).get('data', {}).get('nombrePush') or
+        data.get('body', {}).get('data', {}).get('pushName') or
+        data.get('body', {}).get('data', {}).get('notifyName') or
+        data.get('body', {}).get('data', {}).get('nombre de usuario') or
+        data.get('data', {}).get('nombrePush') or
+        'Cliente'
+    )
+
+    # Determinar tipo de mensaje
+    message_type = (
+        'conversación' if data.get('body', {}).get('data', {}).get('tipo de mensaje') == 'conversación'
+        else 'texto' if data.get('body', {}).get('data', {}).get('tipo de mensaje') == 'texto'
+        else data.get('body', {}).get('data', {}).get('messageType') or
+        data.get('body', {}).get('data', {}).get('type') or
+        'text'
+    )
+
+    return {
+        "message_id": message_id,
+        "chat_id": chat_id,
+        "content": content,
+        "user_name": user_name,
+        "message_type": message_type,
+        "server_url": server_url,
+        "instance_name": instance_name,
+        "api_key": api_key
+    }
+
+def check_equivalence():
+    """Verificar que el extractor coincide con la implementación original"""
+    for name, payload in PAYLOADS:
+        legacy = legacy_extract(payload)
+        compiled = extract_webhook_fields(payload)
+        for field, value in legacy.items():
+            # Los candidatos de Evolution v2 solo completan campos que antes quedaban vacíos
+            if value and value != "Cliente" and compiled[field] != value:
+                raise AssertionError(f"{name}.{field}: {compiled[field]!r} != {value!r}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    check_equivalence()
+
+    print(f"{'payload':<26}{'original (us)':>15}{'compilado (us)':>16}{'speedup':>10}")
+    total_legacy = total_compiled = 0.0
+    for name, payload in PAYLOADS:
+        legacy = min(timeit.repeat(lambda: legacy_extract(payload), number=args.iterations, repeat=3))
+        compiled = min(timeit.repeat(lambda: extract_webhook_fields(payload), number=args.iterations, repeat=3))
+        total_legacy += legacy
+        total_compiled += compiled
+        print(f"{name:<26}{legacy / args.iterations * 1e6:>15.2f}{compiled / args.iterations * 1e6:>16.2f}"
+              f"{legacy / compiled:>9.2f}x")
+
+    print(f"{'total':<26}{total_legacy / args.iterations * 1e6:>15.2f}"
+          f"{total_compiled / args.iterations * 1e6:>16.2f}{total_legacy / total_compiled:>9.2f}x")
+    print(f"Formas en caché: {get_extractor_stats()}")
+
+if __name__ == "__main__":
+    main()
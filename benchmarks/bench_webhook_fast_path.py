@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark de /webhook: handler con validación Pydantic vs ruta rápida (bytes crudos)
+
+Invoca la aplicación ASGI directamente (sin red) con el corpus de payloads
+y reporta peticiones por segundo de cada handler.
+
+Uso:
+    python benchmarks/bench_webhook_fast_path.py [--requests N]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("LOG_FILE", os.devnull)
+
+from fastapi import FastAPI
+
+import main
+from services.message_processor import MessageProcessor
+from utils.helpers import orjson
+from webhook_payloads import PAYLOADS
+
+class _BenchAgent:
+    """Agente mínimo: normaliza el payload (extractor) y lo da por encolado"""
+
+    def __init__(self):
+        self.message_processor = MessageProcessor()
+
+    async def enqueue_message(self, webhook_data):
+        self.message_processor.normalize_message_data(webhook_data)
+        return True
+
+def _build_app(handler) -> FastAPI:
+    app = FastAPI()
+    app.add_api_route("/webhook", handler, methods=["POST"], status_code=202)
+    return app
+
+async def _call(app: FastAPI, body: bytes) -> int:
+    """Ejecutar una petición POST /webhook contra la app ASGI"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/webhook",
+        "raw_path": b"/webhook",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+    sent = False
+    status = 0
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+async def _run(app: FastAPI, bodies, requests: int) -> float:
+    for body in bodies:
+        assert await _call(app, body) == 202
+    started = time.perf_counter()
+    for i in range(requests):
+        await _call(app, bodies[i % len(bodies)])
+    return requests / (time.perf_counter() - started)
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    main.sales_agent = _BenchAgent()
+
+    # El handler validado exige el formato envuelto en "body"
+    bodies = [
+        json.dumps(payload if "body" in payload else {"body": payload}).encode()
+        for _, payload in PAYLOADS
+    ]
+
+    validated = asyncio.run(_run(_build_app(main.whatsapp_webhook), bodies, args.requests))
+    fast = asyncio.run(_run(_build_app(main.whatsapp_webhook_fast), bodies, args.requests))
+
+    print(f"Decodificador JSON: {'orjson' if orjson is not None else 'json (stdlib)'}")
+    print(f"{'handler':<28}{'req/s':>12}")
+    print(f"{'Pydantic (WebhookPayload)':<28}{validated:>12,.0f}")
+    print(f"{'ruta rápida (bytes crudos)':<28}{fast:>12,.0f}")
+    print(f"Mejora: {fast / validated:.2f}x")
+
+if __name__ == "__main__":
+    main_bench()
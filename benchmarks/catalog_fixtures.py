@@ -0,0 +1,109 @@
+"""
+Catálogo sintético y consultas de clientes para los benchmarks de búsqueda
+
+Los nombres imitan los títulos que extrae ScrapingService (tipo, marca,
+línea, modelo y especificaciones) y las consultas imitan mensajes reales
+de WhatsApp, con saludos, relleno y errores de tipeo.
+"""
+import os
+import random
+import sys
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.product import Product
+
+_FAMILIES = [
+    ("Laptop", ["HP", "Lenovo", "Asus", "Acer", "Dell", "MSI"], ["Pavilion", "IdeaPad", "VivoBook", "Aspire", "Inspiron", "ThinkPad", "ROG", "Katana"],
+     ["Core i5 {ram}GB RAM {disk}GB SSD", "Ryzen 7 {ram}GB {disk}GB SSD", "Core i7 {ram}GB SSD {disk}GB 15.6 pulgadas"]),
+    ("Celular", ["Samsung", "Xiaomi", "Motorola", "Huawei", "Apple"], ["Galaxy A{n}", "Redmi Note {n}", "Moto G{n}", "Nova {n}", "iPhone {n}"],
+     ["{disk}GB", "{ram}GB RAM {disk}GB", "{disk}GB Negro", "{disk}GB Azul"]),
+    ("Monitor", ["Samsung", "LG", "Asus", "AOC", "Dell"], ["Odyssey", "UltraGear", "TUF", "Gaming", "UltraSharp"],
+     ["{inch} pulgadas 144Hz", "{inch} pulgadas Full HD", "{inch} pulgadas 4K IPS"]),
+    ("Tablet", ["Samsung", "Lenovo", "Apple", "Xiaomi"], ["Galaxy Tab S{n}", "Tab M{n}", "iPad Air", "Pad {n}"],
+     ["{disk}GB WiFi", "{ram}GB {disk}GB LTE"]),
+    ("Audífonos", ["Sony", "JBL", "Xiaomi", "Apple", "Logitech"], ["WH-1000XM{n}", "Tune {n}00", "Buds {n}", "AirPods Pro", "G{n}35"],
+     ["Bluetooth", "Inalámbricos Negro", "Gamer USB"]),
+    ("Teclado", ["Logitech", "Redragon", "Razer", "HyperX"], ["K{n}0", "Kumara", "BlackWidow", "Alloy"],
+     ["Mecánico RGB", "Inalámbrico", "Gamer Switch Red"]),
+    ("Mouse", ["Logitech", "Redragon", "Razer", "Genius"], ["G{n}02", "Cobra", "DeathAdder", "NX-{n}000"],
+     ["Inalámbrico", "Gamer RGB", "USB Óptico"]),
+    ("Disco SSD", ["Kingston", "Samsung", "WD", "Crucial"], ["A{n}00", "EVO {n}70", "Blue SN{n}70", "MX500"],
+     ["{disk}GB NVMe", "{disk}GB SATA"]),
+    ("Cargador", ["Samsung", "Apple", "Xiaomi", "Anker"], ["Super Fast", "MagSafe", "Turbo", "PowerPort"],
+     ["{w}W USB-C", "{w}W Carga Rápida"]),
+]
+
+_AVAILABILITY = ["Disponible", "Disponible", "Agotado", "Consultar", "Últimas unidades"]
+
+def _price(rng: random.Random) -> str:
+    if rng.random() < 0.25:
+        return "Consultar"
+    value = rng.randrange(30, 9000) * 1000
+    return f"$ {value:,}".replace(",", ".")
+
+def build_catalog(size: int, seed: int = 13) -> Dict[str, List[Product]]:
+    """
+    Generar un catálogo sintético repartido entre las dos tiendas
+
+    Args:
+        size: Cantidad total de productos
+        seed: Semilla para reproducibilidad
+
+    Returns:
+        Dict[str, List[Product]]: Productos por tienda (mismo formato que scrape_all_stores)
+    """
+    rng = random.Random(seed)
+    stores = {"MegaPack": [], "MegaComputer": []}
+    names = list(stores)
+    for i in range(size):
+        kind, brands, lines, specs = rng.choice(_FAMILIES)
+        name = " ".join((
+            kind,
+            rng.choice(brands),
+            rng.choice(lines).format(n=rng.randint(1, 15)),
+            rng.choice(specs).format(
+                ram=rng.choice((4, 8, 16, 32)),
+                disk=rng.choice((64, 128, 256, 512, 1024)),
+                inch=rng.choice((22, 24, 27, 32)),
+                w=rng.choice((20, 25, 45, 65))
+            ),
+            f"Ref {i:06d}"
+        ))
+        store = names[i % 2]
+        stores[store].append(Product(
+            nombre=name,
+            tienda=store,
+            precio=_price(rng),
+            disponibilidad=rng.choice(_AVAILABILITY)
+        ))
+    return stores
+
+# Consultas de clientes tal como llegan por WhatsApp
+QUERIES = [
+    "Hola, tienen laptop HP con 16GB de RAM?",
+    "busco celular samsung galaxy a15 de 128gb",
+    "cuánto cuesta el iPhone 13?",
+    "necesito un monitor de 27 pulgadas para gaming",
+    "audífonos sony bluetooth",
+    "teclado mecánico rgb redragon",
+    "mouse inalámbrico logitech",
+    "disco ssd kingston 512gb nvme",
+    "cargador samsung carga rápida 25W",
+    "quiero una tablet lenovo",
+    "buenas tardes, precio del redmi note 12",
+    "laptops lenovo ideapad ryzen 7",
+]
+
+# Las mismas necesidades escritas con errores de tipeo frecuentes
+TYPO_QUERIES = [
+    "lapto hp 16gb",
+    "iphon 13",
+    "samsumg galaxi a15",
+    "monitr lg 27",
+    "audifonos sonny",
+    "teclao redragon",
+    "maus logitech inalambrico",
+    "dsco sdd kingston",
+]
@@ -0,0 +1,172 @@
+"""
+Corpus de payloads de webhook reales (anonimizados) para benchmarks
+"""
+
+# Flujo n8n con claves traducidas al español, envuelto en "body"
+N8N_TRANSLATED = {
+    "body": {
+        "URL del servidor": "https://evoapi.example.com",
+        "nombreInstancia": "ventas-01",
+        "clave API": "0000000000000000000000000000000",
+        "evento": "mensajes.upsert",
+        "data": {
+            "identificación": "3EB0C767D26A1D3B8C45",
+            "Jid remoto": "573001234567@s.whatsapp.net",
+            "mensaje": {"conversación": "Hola, ¿tienen laptops HP?"},
+            "nombrePush": "Carlos",
+            "tipo de mensaje": "conversación"
+        }
+    }
+}
+
+# Flujo n8n con claves en inglés, envuelto en "body"
+N8N_ENGLISH = {
+    "body": {
+        "server_url": "https://evoapi.example.com",
+        "instance": "ventas-01",
+        "apikey": "0000000000000000000000000000000",
+        "event": "messages.upsert",
+        "data": {
+            "id": "3EB0C767D26A1D3B8C46",
+            "remoteJid": "573001234567@c.us",
+            "message": {"conversation": "precio iphone 13"},
+            "pushName": "Laura",
+            "messageType": "text"
+        }
+    }
+}
+
+# Evolution v1 plano
+EVOLUTION_V1 = {
+    "event": "messages.upsert",
+    "instance": "ventas-01",
+    "server_url": "https://evoapi.example.com",
+    "apikey": "0000000000000000000000000000000",
+    "data": {
+        "id": "3EB0C767D26A1D3B8C47",
+        "remoteJid": "573001234567@s.whatsapp.net",
+        "message": {"conversation": "tienen monitores samsung de 27?"},
+        "nombrePush": "Andrés"
+    }
+}
+
+# Evolution v2 plano (identificadores dentro de "key")
+EVOLUTION_V2 = {
+    "event": "messages.upsert",
+    "instance": "ventas-01",
+    "data": {
+        "key": {
+            "remoteJid": "573001234567@s.whatsapp.net",
+            "fromMe": False,
+            "id": "3EB0C767D26A1D3B8C48"
+        },
+        "pushName": "Diana",
+        "message": {"conversation": "laptop lenovo 16gb ram"},
+        "messageType": "conversation",
+        "messageTimestamp": 1717000000,
+        "instanceId": "6c2d8f5e-0000-0000-0000-000000000000",
+        "source": "android"
+    },
+    "destination": "https://bot.example.com/webhook",
+    "date_time": "2024-05-29T12:26:40.000Z",
+    "sender": "573009876543@s.whatsapp.net",
+    "server_url": "https://evoapi.example.com",
+    "apikey": "0000000000000000000000000000000"
+}
+
+# Evolution v2 con texto extendido (respuesta citada / enlace)
+EVOLUTION_V2_EXTENDED = {
+    "event": "messages.upsert",
+    "instance": "ventas-01",
+    "data": {
+        "key": {
+            "remoteJid": "573001234567@s.whatsapp.net",
+            "fromMe": False,
+            "id": "3EB0C767D26A1D3B8C49"
+        },
+        "pushName": "Diana",
+        "message": {
+            "extendedTextMessage": {
+                "text": "y de 512gb?",
+                "contextInfo": {"stanzaId": "3EB0C767D26A1D3B8C48"}
+            }
+        },
+        "messageType": "extendedTextMessage"
+    },
+    "server_url": "https://evoapi.example.com",
+    "apikey": "0000000000000000000000000000000"
+}
+
+# Evolution v2 envuelto en "body" por n8n
+EVOLUTION_V2_WRAPPED = {"body": dict(EVOLUTION_V2)}
+
+# Eventos que no son mensajes
+PRESENCE_UPDATE = {
+    "event": "presence.update",
+    "instance": "ventas-01",
+    "data": {
+        "id": "573001234567@s.whatsapp.net",
+        "presences": {"573001234567@s.whatsapp.net": {"lastKnownPresence": "composing"}}
+    }
+}
+
+MESSAGE_RECEIPT = {
+    "event": "messages.update",
+    "instance": "ventas-01",
+    "data": {
+        "keyId": "3EB0C767D26A1D3B8C48",
+        "remoteJid": "573001234567@s.whatsapp.net",
+        "fromMe": True,
+        "status": "READ"
+    }
+}
+
+CONNECTION_UPDATE = {
+    "event": "connection.update",
+    "instance": "ventas-01",
+    "data": {"instance": "ventas-01", "state": "open", "statusReason": 200}
+}
+
+GROUP_MESSAGE = {
+    "event": "messages.upsert",
+    "instance": "ventas-01",
+    "data": {
+        "key": {
+            "remoteJid": "120363000000000000@g.us",
+            "fromMe": False,
+            "id": "3EB0C767D26A1D3B8C50",
+            "participant": "573001234567@s.whatsapp.net"
+        },
+        "pushName": "Grupo",
+        "message": {"conversation": "buenos días a todos"},
+        "messageType": "conversation"
+    }
+}
+
+OWN_ECHO = {
+    "event": "send.message",
+    "instance": "ventas-01",
+    "data": {
+        "key": {
+            "remoteJid": "573001234567@s.whatsapp.net",
+            "fromMe": True,
+            "id": "BAE5F2A1C0D3E4F5"
+        },
+        "message": {"conversation": "💻 ¡Claro! Tenemos laptops HP disponibles 🛒"},
+        "messageType": "conversation"
+    }
+}
+
+PAYLOADS = [
+    ("n8n_traducido", N8N_TRANSLATED),
+    ("n8n_ingles", N8N_ENGLISH),
+    ("evolution_v1", EVOLUTION_V1),
+    ("evolution_v2", EVOLUTION_V2),
+    ("evolution_v2_extendido", EVOLUTION_V2_EXTENDED),
+    ("evolution_v2_envuelto", EVOLUTION_V2_WRAPPED),
+    ("presence_update", PRESENCE_UPDATE),
+    ("messages_update", MESSAGE_RECEIPT),
+    ("connection_update", CONNECTION_UPDATE),
+    ("mensaje_grupo", GROUP_MESSAGE),
+    ("eco_propio", OWN_ECHO),
+]
@@ -33,6 +33,86 @@ class Settings:
     CONTEXT_WINDOW_LENGTH: int = 10
     DELAY_BETWEEN_MESSAGES: float = 2.0
 
+    # Configuración de la cola de ingesta de webhooks
+    WEBHOOK_QUEUE_SIZE: int = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+    WEBHOOK_WORKERS: int = int(os.getenv("WEBHOOK_WORKERS", "16"))
+    WEBHOOK_LANE_CAPACITY: int = int(os.getenv("WEBHOOK_LANE_CAPACITY", "100"))
+    WEBHOOK_LANE_IDLE_TIMEOUT: float = float(os.getenv("WEBHOOK_LANE_IDLE_TIMEOUT", "30.0"))
+    WEBHOOK_DRAIN_TIMEOUT: float = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "10.0"))
+    WEBHOOK_FAST_PATH: bool = os.getenv("WEBHOOK_FAST_PATH", "false").lower() == "true"
+
+    # Configuración del log durable de webhooks entrantes
+    INBOUND_LOG_ENABLED: bool = os.getenv("INBOUND_LOG_ENABLED", "true").lower() == "true"
+    INBOUND_LOG_PATH: str = os.getenv("INBOUND_LOG_PATH", "data/inbound_log.db")
+    INBOUND_LOG_BATCH_MS: float = float(os.getenv("INBOUND_LOG_BATCH_MS", "5"))
+    INBOUND_LOG_LEASE_SECONDS: float = float(os.getenv("INBOUND_LOG_LEASE_SECONDS", "30"))
+    INBOUND_LOG_MAX_ATTEMPTS: int = int(os.getenv("INBOUND_LOG_MAX_ATTEMPTS", "3"))
+
+    # Configuración de deduplicación de mensajes
+    DEDUP_TTL_SECONDS: float = float(os.getenv("DEDUP_TTL_SECONDS", "900"))
+    DEDUP_MAX_ENTRIES: int = int(os.getenv("DEDUP_MAX_ENTRIES", "100000"))
+
+    # Configuración de agrupación de ráfagas por chat
+    COALESCE_ENABLED: bool = os.getenv("COALESCE_ENABLED", "true").lower() == "true"
+    COALESCE_WINDOW_MIN: float = float(os.getenv("COALESCE_WINDOW_MIN", "0.8"))
+    COALESCE_WINDOW_MAX: float = float(os.getenv("COALESCE_WINDOW_MAX", "2.5"))
+    COALESCE_IDLE_TIMEOUT: float = float(os.getenv("COALESCE_IDLE_TIMEOUT", "15.0"))
+    COALESCE_MAX_MESSAGES: int = int(os.getenv("COALESCE_MAX_MESSAGES", "8"))
+    COALESCE_MAX_HOLD: float = float(os.getenv("COALESCE_MAX_HOLD", "5.0"))
+
+    # Configuración del control de admisión (respuestas sin IA bajo saturación)
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "200"))
+    ADMISSION_MAX_INFLIGHT_LLM: int = int(os.getenv("ADMISSION_MAX_INFLIGHT_LLM", "12"))
+    ADMISSION_RECOVERY_RATIO: float = float(os.getenv("ADMISSION_RECOVERY_RATIO", "0.5"))
+    ADMISSION_MIN_SHED_SECONDS: float = float(os.getenv("ADMISSION_MIN_SHED_SECONDS", "5"))
+    ADMISSION_CACHE_SIZE: int = int(os.getenv("ADMISSION_CACHE_SIZE", "500"))
+
+    # Configuración de despliegue multi-worker y estado compartido
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
+    STATE_BACKEND: str = os.getenv("STATE_BACKEND", "memory").lower()
+    STATE_DB_PATH: str = os.getenv("STATE_DB_PATH", "data/state.db")
+    STATE_CATALOG_MAX_AGE: float = float(os.getenv("STATE_CATALOG_MAX_AGE", "3600"))
+    STATE_SYNC_SECONDS: float = float(os.getenv("STATE_SYNC_SECONDS", "5"))
+
+    # Configuración de búsqueda en el catálogo
+    FUZZY_MIN_SIMILARITY: float = float(os.getenv("FUZZY_MIN_SIMILARITY", "0.55"))
+    SEMANTIC_SEARCH_ENABLED: bool = os.getenv("SEMANTIC_SEARCH_ENABLED", "true").lower() == "true"
+    SEMANTIC_DIMENSIONS: int = int(os.getenv("SEMANTIC_DIMENSIONS", "128"))
+    SEMANTIC_INDEX_PATH: str = os.getenv("SEMANTIC_INDEX_PATH", "data/semantic_index.npy")
+    SEMANTIC_MIN_SCORE: float = float(os.getenv("SEMANTIC_MIN_SCORE", "0.3"))
+    QUERY_CACHE_ENABLED: bool = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+    QUERY_CACHE_SIZE: int = int(os.getenv("QUERY_CACHE_SIZE", "2000"))
+    QUERY_CACHE_TTL_SECONDS: float = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "600"))
+
+    # Configuración del snapshot del catálogo (arranque sin esperar el scraping)
+    SNAPSHOT_ENABLED: bool = os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true"
+    SNAPSHOT_PATH: str = os.getenv("SNAPSHOT_PATH", "data/catalog_snapshot.bin")
+
+    # Actualización periódica del catálogo dentro del agente
+    CATALOG_REFRESH_ENABLED: bool = os.getenv("CATALOG_REFRESH_ENABLED", "true").lower() == "true"
+    CATALOG_REFRESH_INTERVAL: float = float(os.getenv("CATALOG_REFRESH_INTERVAL", "600"))
+    CATALOG_REFRESH_JITTER: float = float(os.getenv("CATALOG_REFRESH_JITTER", "0.1"))
+    CATALOG_REFRESH_RETRY_BASE: float = float(os.getenv("CATALOG_REFRESH_RETRY_BASE", "30"))
+    CATALOG_REFRESH_RETRY_MAX: float = float(os.getenv("CATALOG_REFRESH_RETRY_MAX", "600"))
+    CATALOG_REFRESH_LEASE_SECONDS: float = float(os.getenv("CATALOG_REFRESH_LEASE_SECONDS", "1800"))
+
+    # Rastreo de las tiendas (categorías, paginación y fichas de producto)
+    CRAWL_MAX_PAGES: int = int(os.getenv("CRAWL_MAX_PAGES", "200"))
+    CRAWL_MAX_DEPTH: int = int(os.getenv("CRAWL_MAX_DEPTH", "3"))
+    CRAWL_CONCURRENCY: int = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+    CRAWL_HOST_RATE: float = float(os.getenv("CRAWL_HOST_RATE", "5"))
+
+    # Caché HTTP de las páginas rastreadas (GET condicionales)
+    PAGE_CACHE_ENABLED: bool = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+    PAGE_CACHE_PATH: str = os.getenv("PAGE_CACHE_PATH", "data/page_cache.db")
+    PAGE_CACHE_MAX_AGE: float = float(os.getenv("PAGE_CACHE_MAX_AGE", "604800"))
+
+    # Listado de productos (GET /products)
+    PRODUCTS_PAGE_SIZE: int = int(os.getenv("PRODUCTS_PAGE_SIZE", "100"))
+    PRODUCTS_PAGE_MAX: int = int(os.getenv("PRODUCTS_PAGE_MAX", "1000"))
+    GZIP_MIN_SIZE: int = int(os.getenv("GZIP_MIN_SIZE", "1000"))
+
     # Configuración de logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE: str = os.getenv("LOG_FILE", "logs/agente_ventas.log")
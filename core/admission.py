@@ -0,0 +1,175 @@
+"""
+Control de admisión de llamadas a la IA
+Responde al instante con un fallback cuando el pipeline está saturado
+"""
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from utils.helpers import normalize_text
+
+logger = logging.getLogger(__name__)
+
+MODE_NORMAL = "normal"
+MODE_SHEDDING = "shedding"
+
+class AdmissionController:
+    """
+    Decide si un mensaje puede consumir una llamada a la IA
+
+    Observa la profundidad de la cola de entrada y las llamadas a la IA en
+    curso. Al superar cualquiera de los umbrales pasa a modo "shedding" y
+    los mensajes nuevos se responden sin IA (respuesta reciente del mismo
+    chat a la misma consulta, o fallback). Vuelve a modo normal con
+    histéresis: ambas métricas deben bajar de umbral * recovery_ratio y
+    debe haber pasado un tiempo mínimo en shedding, para no oscilar en el
+    borde. El modo se reevalúa en cada admisión, al terminar cada llamada
+    a la IA y al consultar las métricas.
+
+    Cada carril hace a lo sumo una llamada a la IA a la vez, y la llamada
+    del mensaje que se evalúa todavía no cuenta: max_inflight debe ser
+    menor que el número de carriles para que ese umbral pueda dispararse.
+    """
+
+    def __init__(
+        self,
+        queue_depth: Callable[[], int],
+        max_queue: int,
+        max_inflight: int,
+        recovery_ratio: float,
+        min_shed_seconds: float,
+        cache_size: int
+    ):
+        self.queue_depth = queue_depth
+        self.max_queue = max(1, max_queue)
+        self.max_inflight = max(1, max_inflight)
+        self.recovery_ratio = min(max(recovery_ratio, 0.0), 1.0)
+        self.min_shed_seconds = min_shed_seconds
+        self.cache_size = max(0, cache_size)
+
+        self.mode = MODE_NORMAL
+        self._inflight = 0
+        self._shed_since = 0.0
+        # (chat, consulta normalizada) -> respuesta: una respuesta de la IA
+        # depende del historial del chat y no se envía a otro cliente
+        self._answers: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._stats = {
+            "admitted": 0,
+            "shed": 0,
+            "shed_cached": 0,
+            "shed_periods": 0
+        }
+
+    def admit(self) -> bool:
+        """
+        Decidir si el mensaje actual puede llamar a la IA
+
+        Returns:
+            bool: True si se admite; False si debe responderse sin IA
+        """
+        if self._update_mode() == MODE_SHEDDING:
+            self._stats["shed"] += 1
+            return False
+
+        self._stats["admitted"] += 1
+        return True
+
+    def _update_mode(self) -> str:
+        """Pasar a shedding o volver a normal según la cola y las llamadas en curso"""
+        depth = self.queue_depth()
+        now = time.monotonic()
+
+        if self.mode == MODE_NORMAL:
+            if depth >= self.max_queue or self._inflight >= self.max_inflight:
+                self.mode = MODE_SHEDDING
+                self._shed_since = now
+                self._stats["shed_periods"] += 1
+                logger.warning(
+                    f"Pipeline saturado (cola={depth}, IA en curso={self._inflight}): "
+                    f"respondiendo sin IA"
+                )
+        elif (
+            now - self._shed_since >= self.min_shed_seconds
+            and depth <= self.max_queue * self.recovery_ratio
+            and self._inflight <= self.max_inflight * self.recovery_ratio
+        ):
+            self.mode = MODE_NORMAL
+            logger.info(f"Pipeline recuperado tras {now - self._shed_since:.1f}s en modo shedding")
+        return self.mode
+
+    @contextmanager
+    def llm_call(self) -> Iterator[None]:
+        """Contabilizar una llamada a la IA en curso"""
+        self._inflight += 1
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            if self.mode == MODE_SHEDDING:
+                self._update_mode()
+
+    def cached_answer(self, chat_id: str, query: str) -> Optional[str]:
+        """
+        Buscar una respuesta reciente de la IA a la misma consulta en el mismo chat
+
+        Args:
+            chat_id: Chat del mensaje
+            query: Texto del mensaje
+
+        Returns:
+            Optional[str]: Respuesta cacheada o None
+        """
+        key = (chat_id, normalize_text(query))
+        answer = self._answers.get(key)
+        if answer is not None:
+            self._answers.move_to_end(key)
+            self._stats["shed_cached"] += 1
+        return answer
+
+    def remember_answer(self, chat_id: str, query: str, answer: str):
+        """
+        Guardar la respuesta de la IA para reutilizarla en el mismo chat durante el shedding
+
+        Args:
+            chat_id: Chat del mensaje
+            query: Texto del mensaje
+            answer: Respuesta generada
+        """
+        if not self.cache_size or not answer:
+            return
+
+        text = normalize_text(query)
+        if not text:
+            return
+        key = (chat_id, text)
+
+        self._answers[key] = answer
+        self._answers.move_to_end(key)
+        while len(self._answers) > self.cache_size:
+            self._answers.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas de admisión
+
+        Returns:
+            Dict[str, Any]: Modo actual, llamadas en curso y mensajes descartados
+        """
+        # Sin mensajes nuevos, admit() no corre: el modo se reevalúa aquí (/health)
+        self._update_mode()
+        stats = self._stats
+        return {
+            "mode": self.mode,
+            "shedding_for_s": round(time.monotonic() - self._shed_since, 1) if self.mode == MODE_SHEDDING else 0.0,
+            "inflight_llm": self._inflight,
+            "max_inflight_llm": self.max_inflight,
+            "max_queue": self.max_queue,
+            "admitted": stats["admitted"],
+            "shed": stats["shed"],
+            "shed_cached": stats["shed_cached"],
+            "shed_fallback": stats["shed"] - stats["shed_cached"],
+            "shed_periods": stats["shed_periods"],
+            "cached_answers": len(self._answers)
+        }
@@ -0,0 +1,180 @@
+"""
+Actualización periódica del catálogo dentro del proceso del agente
+Un solo scraping a la vez: las llamadas concurrentes se unen al que está en curso,
+y un worker no scrapea si otro acaba de hacerlo
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class CatalogRefresher:
+    """
+    Planificador de actualizaciones del catálogo con single-flight
+
+    Cada interval segundos (± jitter) ejecuta la función de actualización.
+    Si falla, reintenta con espera exponencial desde retry_base hasta
+    retry_max. refresh_now nunca lanza un segundo scraping: si hay uno en
+    curso, espera su resultado.
+
+    Con varios workers, adopt carga el catálogo compartido y devuelve
+    cuándo terminó el último scraping de cualquiera de ellos: si fue hace
+    menos de un intervalo, el turno se salta y el próximo se cuenta desde
+    ese scraping, así los workers se turnan en lugar de scrapear todos.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[], Awaitable[bool]],
+        interval: float,
+        jitter: float,
+        retry_base: float,
+        retry_max: float,
+        adopt: Optional[Callable[[], Awaitable[float]]] = None
+    ):
+        self.refresh = refresh
+        self.adopt = adopt
+        self.interval = interval
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.retry_base = max(retry_base, 1.0)
+        self.retry_max = max(retry_max, self.retry_base)
+
+        self._inflight: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._next_run_at: Optional[float] = None
+        self.consecutive_failures = 0
+        self._stats = {
+            "runs": 0,
+            "failures": 0,
+            "joined": 0,
+            "skipped": 0,
+            "last_started_at": None,
+            "last_duration_s": None,
+            "last_outcome": None
+        }
+
+    def start(self):
+        """Iniciar el bucle periódico (si el intervalo es mayor que 0)"""
+        if self.interval <= 0 or self._loop_task is not None:
+            return
+        self._loop_task = asyncio.create_task(self._run_loop())
+        logger.info(f"Actualización del catálogo cada {self.interval:.0f} s (±{self.jitter:.0%})")
+
+    async def stop(self):
+        """Detener el bucle y cancelar una actualización en curso"""
+        for task in (self._loop_task, self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+        for task in (self._loop_task, self._inflight):
+            if task is not None:
+                await asyncio.gather(task, return_exceptions=True)
+        self._loop_task = None
+        self._inflight = None
+        self._next_run_at = None
+
+    @property
+    def in_flight(self) -> bool:
+        """Hay una actualización en curso"""
+        return self._inflight is not None and not self._inflight.done()
+
+    async def refresh_now(self) -> bool:
+        """
+        Actualizar el catálogo ya, o unirse a la actualización en curso
+
+        Returns:
+            bool: True si la actualización terminó bien
+        """
+        if self.in_flight:
+            self._stats["joined"] += 1
+        else:
+            self._inflight = asyncio.create_task(self._run_once())
+        # shield: si quien espera se cancela, el scraping sigue para los demás
+        return await asyncio.shield(self._inflight)
+
+    async def _run_once(self) -> bool:
+        started = time.monotonic()
+        self._stats["runs"] += 1
+        self._stats["last_started_at"] = time.time()
+        try:
+            ok = bool(await self.refresh())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error en actualización del catálogo: {str(e)}")
+            ok = False
+
+        self._stats["last_duration_s"] = round(time.monotonic() - started, 3)
+        self._stats["last_outcome"] = "success" if ok else "failure"
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            self._stats["failures"] += 1
+        return ok
+
+    def next_delay(self) -> float:
+        """
+        Espera hasta la próxima actualización
+
+        Returns:
+            float: Segundos (intervalo con jitter, o espera exponencial tras fallos)
+        """
+        if self.consecutive_failures:
+            base = min(self.retry_base * 2 ** (self.consecutive_failures - 1), self.retry_max)
+        else:
+            base = self.interval
+        return max(1.0, base * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    async def _refreshed_at(self) -> float:
+        """Cuándo terminó el último scraping de cualquier worker (0 si no se sabe), adoptando su catálogo"""
+        if self.adopt is None:
+            return 0.0
+        try:
+            return await self.adopt()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error consultando el catálogo compartido: {str(e)}")
+            return 0.0
+
+    async def _run_loop(self):
+        delay = self.next_delay()
+        while True:
+            self._next_run_at = time.monotonic() + delay
+            await asyncio.sleep(delay)
+
+            # Otro worker scrapeó hace menos de un intervalo: este turno ya está cubierto
+            refreshed_at = 0.0 if self.consecutive_failures else await self._refreshed_at()
+            if time.time() - refreshed_at < self.interval * (1 - self.jitter):
+                self._stats["skipped"] += 1
+                delay = max(1.0, refreshed_at + self.next_delay() - time.time())
+                continue
+
+            ok = await self.refresh_now()
+            delay = self.next_delay()
+            if not ok:
+                logger.warning(
+                    f"Actualización del catálogo fallida ({self.consecutive_failures} seguidas): "
+                    f"reintento en ~{delay:.0f} s"
+                )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas de las actualizaciones
+
+        Returns:
+            Dict[str, Any]: Ejecuciones, fallos, última duración y resultado, próxima ejecución
+        """
+        next_run_in = None
+        if self._next_run_at is not None:
+            next_run_in = round(max(0.0, self._next_run_at - time.monotonic()), 1)
+        return {
+            "interval_s": self.interval,
+            "in_flight": self.in_flight,
+            "consecutive_failures": self.consecutive_failures,
+            "next_run_in_s": next_run_in,
+            **self._stats
+        }
@@ -0,0 +1,215 @@
+"""
+Planificador por chat con carriles seriales
+Garantiza orden por chat_id y paralelismo entre chats distintos
+"""
+import asyncio
+import logging
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+class _Lane:
+    """Carril serial: una cola acotada drenada por una única tarea"""
+
+    __slots__ = ("index", "queue", "task", "busy")
+
+    def __init__(self, index: int, capacity: int):
+        self.index = index
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=capacity)
+        self.task: Optional[asyncio.Task] = None
+        self.busy = False
+
+class ChatScheduler:
+    """
+    Planificador que asigna cada chat_id a un carril serial por hash
+
+    Los mensajes de un mismo chat siempre caen en el mismo carril y se
+    ejecutan en orden; chats distintos se reparten entre carriles y se
+    atienden en paralelo. El número de carriles es fijo, por lo que la
+    memoria no crece con la cantidad de chats, y cada carril libera su
+    tarea tras un periodo de inactividad.
+    """
+
+    def __init__(self, lanes: int, lane_capacity: int, max_pending: int, idle_timeout: float):
+        self.num_lanes = max(1, lanes)
+        self.lane_capacity = max(1, lane_capacity)
+        self.max_pending = max(1, max_pending)
+        self.idle_timeout = idle_timeout
+
+        self._lanes: Dict[int, _Lane] = {}
+        self._pending = 0
+        self._busy_lanes = 0
+        self._busy_time = 0.0
+        self._started_at = time.monotonic()
+        self._closed = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "processed": 0,
+            "lanes_spawned": 0,
+            "lanes_reclaimed": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0
+        }
+
+    def lane_for(self, chat_id: str) -> int:
+        """
+        Calcular el carril de un chat
+
+        Args:
+            chat_id: ID del chat
+
+        Returns:
+            int: Índice del carril
+        """
+        return zlib.crc32(chat_id.encode("utf-8")) % self.num_lanes
+
+    def submit(self, chat_id: str, job: Job) -> bool:
+        """
+        Encolar un trabajo en el carril del chat
+
+        Args:
+            chat_id: ID del chat
+            job: Corrutina sin argumentos a ejecutar
+
+        Returns:
+            bool: False si hay contrapresión (carril o planificador llenos)
+        """
+        if self._closed or self._pending >= self.max_pending:
+            self._stats["rejected"] += 1
+            return False
+
+        index = self.lane_for(chat_id or "")
+        lane = self._lanes.get(index)
+        if lane is None:
+            lane = _Lane(index, self.lane_capacity)
+            self._lanes[index] = lane
+
+        try:
+            lane.queue.put_nowait((time.monotonic(), job))
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            return False
+
+        self._pending += 1
+        self._idle.clear()
+        self._stats["accepted"] += 1
+
+        if lane.task is None:
+            lane.task = asyncio.create_task(self._run_lane(lane))
+            self._stats["lanes_spawned"] += 1
+
+        return True
+
+    async def _run_lane(self, lane: _Lane):
+        """
+        Drenar un carril en orden hasta que quede inactivo
+
+        Args:
+            lane: Carril a drenar
+        """
+        try:
+            while True:
+                try:
+                    enqueued_at, job = await asyncio.wait_for(lane.queue.get(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if lane.queue.empty():
+                        break
+                    continue
+
+                started_at = time.monotonic()
+                wait = started_at - enqueued_at
+                self._stats["total_wait"] += wait
+                self._stats["max_wait"] = max(self._stats["max_wait"], wait)
+
+                lane.busy = True
+                self._busy_lanes += 1
+                try:
+                    await job()
+                except Exception as e:
+                    logger.error(f"Error en carril {lane.index}: {str(e)}")
+                finally:
+                    lane.busy = False
+                    self._busy_lanes -= 1
+                    self._busy_time += time.monotonic() - started_at
+                    self._pending -= 1
+                    self._stats["processed"] += 1
+                    if self._pending == 0:
+                        self._idle.set()
+        finally:
+            # Liberar el carril inactivo para no acumular tareas ni colas
+            lane.task = None
+            if lane.queue.empty() and self._lanes.get(lane.index) is lane:
+                del self._lanes[lane.index]
+                self._stats["lanes_reclaimed"] += 1
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Esperar a que se procesen los trabajos pendientes
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+
+        Returns:
+            bool: True si no quedaron trabajos pendientes
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout: float = 0.0):
+        """
+        Detener el planificador, vaciando primero lo pendiente
+
+        Args:
+            timeout: Tiempo máximo para vaciar los carriles
+        """
+        self._closed = True
+
+        if self._pending and not await self.drain(timeout):
+            logger.warning(f"Quedaron {self._pending} mensajes sin procesar en los carriles")
+
+        tasks = [lane.task for lane in self._lanes.values() if lane.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._lanes.clear()
+
+    @property
+    def pending(self) -> int:
+        """Trabajos encolados o en ejecución"""
+        return self._pending
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas del planificador
+
+        Returns:
+            Dict[str, Any]: Profundidad, esperas, carriles y utilización
+        """
+        stats = self._stats
+        uptime = time.monotonic() - self._started_at
+
+        return {
+            "queue_depth": self._pending,
+            "queue_capacity": self.max_pending,
+            "accepted": stats["accepted"],
+            "rejected": stats["rejected"],
+            "processed": stats["processed"],
+            "avg_wait_ms": round(stats["total_wait"] / stats["processed"] * 1000, 2) if stats["processed"] else 0.0,
+            "max_wait_ms": round(stats["max_wait"] * 1000, 2),
+            "lanes": self.num_lanes,
+            "active_lanes": len(self._lanes),
+            "busy_lanes": self._busy_lanes,
+            "lanes_spawned": stats["lanes_spawned"],
+            "lanes_reclaimed": stats["lanes_reclaimed"],
+            "utilization": round(self._busy_time / (self.num_lanes * uptime), 4) if uptime else 0.0
+        }
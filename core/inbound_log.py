@@ -0,0 +1,301 @@
+"""
+Registro durable de webhooks entrantes (write-ahead log)
+Persiste cada mensaje antes de confirmarlo y lo reproduce tras una caída
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inbound (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    received_at REAL NOT NULL,
+    payload TEXT NOT NULL,
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS inbound_pending ON inbound (done, owner);
+CREATE TABLE IF NOT EXISTS owners (
+    token TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+"""
+
+class InboundLog:
+    """
+    Log de entrada sobre SQLite en modo WAL con commit agrupado
+
+    Cada append espera a que su entrada esté en disco (synchronous=FULL),
+    pero los appends concurrentes se agrupan en una sola transacción y un
+    solo fsync. Todas las operaciones de disco se serializan en un hilo
+    dedicado para no bloquear el event loop.
+
+    Cada proceso escribe sus entradas con un token propio y mantiene un
+    latido en la tabla owners. Las entradas pendientes cuyo dueño dejó de
+    latir (proceso caído) se reclaman y se reproducen.
+    """
+
+    def __init__(self, path: str, batch_window: float, lease_seconds: float, max_attempts: int):
+        self.path = path
+        self.batch_window = batch_window
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.token = uuid.uuid4().hex
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._appends: List[Tuple[float, str, asyncio.Future]] = []
+        self._completed: List[int] = []
+        self._released: List[int] = []
+        self._stats = {
+            "appended": 0,
+            "completed": 0,
+            "released": 0,
+            "replayed": 0,
+            "abandoned": 0,
+            "commits": 0,
+            "last_batch": 0
+        }
+
+    async def open(self):
+        """Abrir la base de datos y arrancar el escritor agrupado"""
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inbound-log")
+        await self._run(self._open_db)
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info(f"Log de entrada abierto en {self.path}")
+
+    def _open_db(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(_SCHEMA)
+        self._heartbeat()
+
+    async def close(self):
+        """Escribir lo pendiente, liberar la propiedad de las entradas y cerrar"""
+        # El escritor hace un último commit de lo acumulado y termina
+        self._closing = True
+        self._wakeup.set()
+        if self._flusher:
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+
+        if self._db is not None:
+            await self._run(self._release_ownership)
+            await self._run(self._db.close)
+            self._db = None
+
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        """Ejecutar una operación de disco en el hilo del log"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def append(self, payload: Dict[str, Any]) -> int:
+        """
+        Persistir un webhook antes de confirmarlo
+
+        Args:
+            payload: Datos del webhook
+
+        Returns:
+            int: ID de la entrada, una vez escrita en disco
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._appends.append((time.time(), json.dumps(payload, ensure_ascii=False), future))
+        self._wakeup.set()
+        return await future
+
+    def complete(self, entry_id: Optional[int]):
+        """
+        Marcar una entrada como completada (se escribe en el próximo commit)
+
+        Args:
+            entry_id: ID de la entrada
+        """
+        if entry_id is None:
+            return
+        self._completed.append(entry_id)
+        self._wakeup.set()
+
+    def release(self, entry_id: Optional[int]):
+        """
+        Devolver una entrada pendiente para que se reproduzca (se escribe en el próximo commit)
+
+        Para las entradas reclamadas que no se pudieron reencolar y para los
+        mensajes cuya respuesta no se pudo enviar: sin dueño, la próxima
+        recuperación las vuelve a reclamar (hasta max_attempts intentos).
+
+        Args:
+            entry_id: ID de la entrada
+        """
+        if entry_id is None:
+            return
+        self._released.append(entry_id)
+        self._wakeup.set()
+
+    async def _flush_loop(self):
+        """Agrupar appends y completados en commits periódicos"""
+        while not self._closing:
+            await self._wakeup.wait()
+            # Ventana de agrupación: lo que llegue mientras tanto va en el mismo commit
+            if not self._closing:
+                await asyncio.sleep(self.batch_window)
+            self._wakeup.clear()
+            await self._flush()
+
+        # Al cerrar: lo que llegó durante el último commit
+        await self._flush()
+
+    async def _flush(self):
+        appends, self._appends = self._appends, []
+        completed, self._completed = self._completed, []
+        released, self._released = self._released, []
+        if not appends and not completed and not released:
+            return
+
+        try:
+            ids = await self._run(
+                self._write_batch, [(ts, payload) for ts, payload, _ in appends], completed, released
+            )
+        except Exception as e:
+            logger.error(f"Error escribiendo log de entrada: {str(e)}")
+            for _, _, future in appends:
+                if not future.done():
+                    future.set_exception(e)
+            # Reintentar completados y liberados en el próximo commit
+            self._completed[:0] = completed
+            self._released[:0] = released
+            return
+
+        for (_, _, future), entry_id in zip(appends, ids):
+            if not future.done():
+                future.set_result(entry_id)
+
+        self._stats["appended"] += len(appends)
+        self._stats["completed"] += len(completed)
+        self._stats["released"] += len(released)
+        self._stats["commits"] += 1
+        self._stats["last_batch"] = len(appends)
+
+    def _write_batch(self, appends: List[Tuple[float, str]], completed: List[int], released: List[int]) -> List[int]:
+        """Escribir un lote en una sola transacción (un fsync)"""
+        ids = []
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for received_at, payload in appends:
+                cursor = db.execute(
+                    "INSERT INTO inbound (received_at, payload, owner) VALUES (?, ?, ?)",
+                    (received_at, payload, self.token)
+                )
+                ids.append(cursor.lastrowid)
+            if completed:
+                db.executemany("UPDATE inbound SET done = 1 WHERE id = ?", [(i,) for i in completed])
+            if released:
+                db.executemany(
+                    "UPDATE inbound SET owner = NULL WHERE id = ? AND done = 0", [(i,) for i in released]
+                )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return ids
+
+    def _heartbeat(self):
+        self._db.execute(
+            "INSERT INTO owners (token, heartbeat) VALUES (?, ?) "
+            "ON CONFLICT(token) DO UPDATE SET heartbeat = excluded.heartbeat",
+            (self.token, time.time())
+        )
+
+    def _release_ownership(self):
+        """Al detenerse: lo pendiente queda disponible para reproducirse de inmediato"""
+        self._db.execute("DELETE FROM owners WHERE token = ?", (self.token,))
+
+    async def claim_orphans(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Latir, reclamar las entradas pendientes huérfanas y purgar completadas
+
+        Returns:
+            List[Tuple[int, Dict[str, Any]]]: (ID, payload) de las entradas a reproducir
+        """
+        claimed, abandoned = await self._run(self._claim_orphans)
+        self._stats["replayed"] += len(claimed)
+        self._stats["abandoned"] += abandoned
+        if abandoned:
+            logger.warning(f"{abandoned} entradas del log descartadas tras {self.max_attempts} intentos")
+        return claimed
+
+    def _claim_orphans(self) -> Tuple[List[Tuple[int, Dict[str, Any]]], int]:
+        db = self._db
+        cutoff = time.time() - self.lease_seconds
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            self._heartbeat()
+            rows = db.execute(
+                "SELECT id, payload, attempts FROM inbound WHERE done = 0 AND (owner IS NULL OR ("
+                "owner != ? AND owner NOT IN (SELECT token FROM owners WHERE heartbeat > ?))) ORDER BY id",
+                (self.token, cutoff)
+            ).fetchall()
+
+            claimed = []
+            abandoned = []
+            for entry_id, payload, attempts in rows:
+                if attempts >= self.max_attempts:
+                    abandoned.append((entry_id,))
+                else:
+                    claimed.append((entry_id, json.loads(payload)))
+
+            db.executemany(
+                "UPDATE inbound SET owner = ?, attempts = attempts + 1 WHERE id = ?",
+                [(self.token, entry_id) for entry_id, _ in claimed]
+            )
+            db.executemany("UPDATE inbound SET done = 1 WHERE id = ?", abandoned)
+            db.execute("DELETE FROM inbound WHERE done = 1")
+            db.execute("DELETE FROM owners WHERE heartbeat <= ?", (cutoff - self.lease_seconds,))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return claimed, len(abandoned)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas del log
+
+        Returns:
+            Dict[str, Any]: Entradas escritas, completadas, reproducidas y commits
+        """
+        stats = self._stats
+        return {
+            "path": self.path,
+            "appended": stats["appended"],
+            "completed": stats["completed"],
+            "released": stats["released"],
+            "replayed": stats["replayed"],
+            "abandoned": stats["abandoned"],
+            "commits": stats["commits"],
+            "avg_batch": round(stats["appended"] / stats["commits"], 2) if stats["commits"] else 0.0,
+            "last_batch": stats["last_batch"],
+            "pending_writes": len(self._appends)
+        }
@@ -0,0 +1,178 @@
+"""
+Agrupador de ráfagas de mensajes por chat
+Une mensajes consecutivos de un mismo chat en una sola consulta a la IA
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models.message import WhatsAppMessage
+
+logger = logging.getLogger(__name__)
+
+# Cada mensaje retenido viaja con una etiqueta opaca (p. ej. su ID en el log de entrada)
+BurstItem = Tuple[WhatsAppMessage, Any]
+FlushCallback = Callable[[str, List[BurstItem]], None]
+
+class _ChatBurst:
+    """Estado de ráfaga de un chat"""
+
+    __slots__ = ("last_seen", "avg_gap", "pending", "first_pending_at", "timer")
+
+    def __init__(self, now: float):
+        self.last_seen = now
+        self.avg_gap: Optional[float] = None
+        self.pending: List[BurstItem] = []
+        self.first_pending_at = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class MessageCoalescer:
+    """
+    Ventana de agrupación adaptativa por chat
+
+    El primer mensaje de un chat inactivo pasa directo sin espera. Si el
+    chat está activo (escribió hace poco), el mensaje se retiene durante
+    una ventana que se ajusta al ritmo de escritura del cliente (media
+    móvil del intervalo entre mensajes) y cada mensaje nuevo la extiende,
+    sin superar max_hold segundos desde el primer mensaje retenido (un
+    cliente que no para de escribir recibe respuesta igual). Al cerrar la
+    ventana se entrega el lote completo al callback de vaciado.
+    """
+
+    def __init__(
+        self,
+        on_flush: FlushCallback,
+        min_window: float,
+        max_window: float,
+        idle_timeout: float,
+        max_messages: int,
+        max_hold: float
+    ):
+        self.on_flush = on_flush
+        self.min_window = min_window
+        self.max_window = max(min_window, max_window)
+        self.max_hold = max(self.max_window, max_hold)
+        self.idle_timeout = idle_timeout
+        self.max_messages = max(1, max_messages)
+
+        self._chats: "OrderedDict[str, _ChatBurst]" = OrderedDict()
+        self._stats = {
+            "bypassed": 0,
+            "buffered": 0,
+            "flushes": 0
+        }
+
+    def offer(self, message: WhatsAppMessage, tag: Any = None) -> bool:
+        """
+        Ofrecer un mensaje entrante al agrupador
+
+        Args:
+            message: Mensaje normalizado
+            tag: Etiqueta que acompaña al mensaje hasta el vaciado
+
+        Returns:
+            bool: True si el mensaje quedó retenido; False si debe procesarse ya
+        """
+        now = time.monotonic()
+        chat_id = message.chat_id
+        self._reclaim_idle(now)
+
+        state = self._chats.get(chat_id)
+        if state is None:
+            self._chats[chat_id] = _ChatBurst(now)
+            self._stats["bypassed"] += 1
+            return False
+
+        self._chats.move_to_end(chat_id)
+        gap = now - state.last_seen
+        state.last_seen = now
+
+        # Solo se agrupan textos; otro tipo vacía lo pendiente para conservar el orden
+        if message.message_type != "text":
+            self.flush(chat_id)
+            self._stats["bypassed"] += 1
+            return False
+
+        if not state.pending and gap > self.idle_timeout:
+            self._stats["bypassed"] += 1
+            return False
+
+        if gap <= self.idle_timeout:
+            state.avg_gap = gap if state.avg_gap is None else 0.7 * state.avg_gap + 0.3 * gap
+
+        if not state.pending:
+            state.first_pending_at = now
+        state.pending.append((message, tag))
+        self._stats["buffered"] += 1
+
+        if len(state.pending) >= self.max_messages:
+            self.flush(chat_id)
+            return True
+
+        # Extender la ventana sin superar la retención máxima desde el primer mensaje
+        deadline = min(now + self._window(state), state.first_pending_at + self.max_hold)
+        if state.timer:
+            state.timer.cancel()
+        state.timer = asyncio.get_running_loop().call_later(max(0.0, deadline - now), self.flush, chat_id)
+        return True
+
+    def _window(self, state: _ChatBurst) -> float:
+        """Ventana adaptativa según el ritmo de escritura del chat"""
+        if state.avg_gap is None:
+            return self.max_window
+        return min(self.max_window, max(self.min_window, state.avg_gap * 1.5))
+
+    def flush(self, chat_id: str):
+        """
+        Entregar de inmediato los mensajes retenidos de un chat
+
+        Args:
+            chat_id: ID del chat
+        """
+        state = self._chats.get(chat_id)
+        if state is None or not state.pending:
+            return
+
+        if state.timer:
+            state.timer.cancel()
+            state.timer = None
+
+        items, state.pending = state.pending, []
+        self._stats["flushes"] += 1
+
+        try:
+            self.on_flush(chat_id, items)
+        except Exception as e:
+            logger.error(f"Error vaciando ráfaga de {chat_id}: {str(e)}")
+
+    def flush_all(self):
+        """Entregar todo lo retenido (al detener el agente)"""
+        for chat_id in list(self._chats):
+            self.flush(chat_id)
+
+    def _reclaim_idle(self, now: float):
+        """Olvidar chats inactivos sin mensajes retenidos"""
+        while self._chats:
+            chat_id, state = next(iter(self._chats.items()))
+            if state.pending or now - state.last_seen <= self.idle_timeout:
+                break
+            del self._chats[chat_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas del agrupador
+
+        Returns:
+            Dict[str, Any]: Mensajes retenidos, vaciados y llamadas ahorradas
+        """
+        stats = self._stats
+        return {
+            "tracked_chats": len(self._chats),
+            "pending_messages": sum(len(s.pending) for s in self._chats.values()),
+            "bypassed": stats["bypassed"],
+            "buffered": stats["buffered"],
+            "flushes": stats["flushes"],
+            "llm_calls_saved": stats["buffered"] - stats["flushes"]
+        }
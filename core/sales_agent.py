@@ -4,7 +4,10 @@ Coordina todos los servicios para procesar mensajes de WhatsApp
 """
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+import time
+import uuid
+from functools import partial
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 from datetime import datetime
 
 import sys
@@ -12,6 +15,11 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import settings
+from core.admission import AdmissionController
+from core.catalog_refresher import CatalogRefresher
+from core.chat_scheduler import ChatScheduler
+from core.message_coalescer import BurstItem, MessageCoalescer
+from core.inbound_log import InboundLog
 from models.message import WhatsAppMessage
 from models.product import Product
 from services.whatsapp_service import WhatsAppService
@@ -19,25 +27,83 @@ from services.scraping_service import ScrapingService
 from services.ai_service import AIService
 from services.audio_service import AudioService
 from services.message_processor import MessageProcessor
+from services.event_router import EventRouter
+from services.catalog_diff import diff_catalogs
+from utils.catalog_snapshot import load_snapshot, save_snapshot
+from utils.helpers import fold_accents
+from utils.query_cache import QueryCache
+from utils.state_backend import StateBackend, create_state_backend
 
 logger = logging.getLogger(__name__)
 
+# Lease del estado compartido: un solo worker scrapea las tiendas a la vez
+CATALOG_REFRESH_LEASE = "catalog_refresh"
+
 class SalesAgent:
     """Agente principal de ventas para WhatsApp"""
 
     def __init__(self):
+        # Estado que debe ser coherente entre workers (memoria, dedup y catálogo)
+        self.state: StateBackend = create_state_backend(
+            settings.STATE_BACKEND,
+            settings.STATE_DB_PATH,
+            settings.DEDUP_TTL_SECONDS,
+            settings.DEDUP_MAX_ENTRIES
+        )
+
         self.whatsapp_service = WhatsAppService()
         self.scraping_service = ScrapingService()
-        self.ai_service = AIService()
+        self.ai_service = AIService(self.state)
         self.audio_service = AudioService()
-        self.message_processor = MessageProcessor()
+        self.message_processor = MessageProcessor(self.state)
+        self.event_router = EventRouter()
 
         self.is_running = False
+        # initialize() ya terminó bien: start() no repite la carga inicial del catálogo
+        self._initialized = False
         self.products_cache: Dict[str, Any] = {}
         self.last_cache_update: Optional[datetime] = None
+        self._catalog_version = 0
+        # Momento en que se publicó la versión vigente (junto con la versión identifica
+        # el contenido aunque el backend en memoria reinicie la numeración)
+        self._catalog_published_at = 0.0
+        self._catalog_checked_at = 0.0
+
+        # Resultados de búsqueda recientes por consulta normalizada y versión del catálogo
+        self.query_cache: Optional[QueryCache] = None
+        if settings.QUERY_CACHE_ENABLED:
+            self.query_cache = QueryCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL_SECONDS)
+
+        # Planificador por chat (carriles seriales) para los webhooks
+        self.scheduler: Optional[ChatScheduler] = None
+        self.coalescer: Optional[MessageCoalescer] = None
+        self.admission: Optional[AdmissionController] = None
+
+        # Log durable de webhooks entrantes
+        self.inbound_log: Optional[InboundLog] = None
+        self._recovery_task: Optional[asyncio.Task] = None
+
+        # Actualización periódica del catálogo en el propio proceso (un scraping a la vez)
+        self.refresher = CatalogRefresher(
+            self._update_products_cache,
+            settings.CATALOG_REFRESH_INTERVAL if settings.CATALOG_REFRESH_ENABLED else 0,
+            settings.CATALOG_REFRESH_JITTER,
+            settings.CATALOG_REFRESH_RETRY_BASE,
+            settings.CATALOG_REFRESH_RETRY_MAX,
+            adopt=self._adopt_shared_catalog
+        )
+        # Dueño de los leases de este proceso en el estado compartido
+        self.worker_id = uuid.uuid4().hex
+        # Scraping en segundo plano tras arrancar desde el snapshot
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Carga en segundo plano del catálogo publicado por otro worker
+        self._sync_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
-        """Inicializar el agente y todos sus servicios"""
+        """Inicializar el agente y todos sus servicios (una sola vez)"""
+        if self._initialized:
+            return True
+
         try:
             logger.info("Inicializando Agente de Ventas...")
 
@@ -54,9 +120,15 @@ class SalesAgent:
             if not await self.whatsapp_service.validate_connection():
                 logger.warning("No se pudo validar conexión con WhatsApp")
 
-            # Cargar productos iniciales
-            await self._update_products_cache()
+            # Cargar productos iniciales: el snapshot en disco permite arrancar sin esperar
+            # el scraping (que sigue en segundo plano); si no, el catálogo de otro worker
+            # si es reciente y, como último recurso, un scraping bloqueante
+            if self._load_snapshot():
+                self._refresh_task = asyncio.create_task(self.refresh_products())
+            elif not await self._load_shared_catalog(max_age=settings.STATE_CATALOG_MAX_AGE):
+                await self.refresh_products()
 
+            self._initialized = True
             logger.info("Agente de Ventas inicializado correctamente")
             return True
 
@@ -64,15 +136,438 @@ class SalesAgent:
             logger.error(f"Error inicializando agente: {str(e)}")
             return False
 
-    async def _update_products_cache(self):
-        """Actualizar caché de productos"""
+    async def refresh_products(self) -> bool:
+        """
+        Actualizar el catálogo ahora, o esperar la actualización en curso
+
+        Returns:
+            bool: True si la actualización terminó bien
+        """
+        return await self.refresher.refresh_now()
+
+    async def _update_products_cache(self) -> bool:
+        """
+        Actualizar caché de productos con un scraping nuevo
+
+        Entre workers solo scrapea el que toma el lease del estado
+        compartido; los demás esperan a que publique y cargan su catálogo.
+        Si el scraping no cambia nada respecto de la versión publicada, se
+        conserva la vigente. Si no, se arma una versión nueva e inmutable
+        del catálogo y sus índices se reconstruyen completos en otro hilo
+        (solo la tokenización y los atributos de los productos sin cambios
+        se reutilizan); catálogo e índices se reemplazan juntos, sin
+        esperas en medio, así ninguna consulta ve una versión a medias. No llamar directamente: pasa por
+        refresh_products para no lanzar dos scrapings a la vez.
+
+        Returns:
+            bool: True si el catálogo quedó actualizado (o sin cambios)
+        """
+        waiting_since = time.time()
+        ttl = settings.CATALOG_REFRESH_LEASE_SECONDS
+        poll = max(settings.STATE_SYNC_SECONDS, 0.1)
+        waiting = False
+        state = self.state
+        while not await state.call(state.acquire_lease, CATALOG_REFRESH_LEASE, self.worker_id, ttl):
+            if not waiting:
+                logger.info("Otro worker está actualizando el catálogo: se espera su resultado")
+                waiting = True
+            if await state.call(state.lease_completed_at, CATALOG_REFRESH_LEASE) >= waiting_since:
+                return await self._adopt_published_catalog()
+            await asyncio.sleep(poll)
+
+        ok = False
+        try:
+            # Terminó justo antes de tomar el lease: no repetir ese scraping
+            if waiting and await state.call(state.lease_completed_at, CATALOG_REFRESH_LEASE) >= waiting_since:
+                return await self._adopt_published_catalog()
+            ok = await self._scrape_products()
+            return ok
+        finally:
+            await state.call(state.release_lease, CATALOG_REFRESH_LEASE, self.worker_id, ok)
+
+    async def _adopt_published_catalog(self) -> bool:
+        """
+        Adoptar el resultado del scraping que acaba de terminar otro worker
+
+        Returns:
+            bool: True si su catálogo quedó vigente
+        """
+        version = await self.state.call(self.state.catalog_version)
+        logger.info(f"Catálogo v{version} actualizado por otro worker")
+        if version != self._catalog_version:
+            return await self._load_shared_catalog()
+        return True
+
+    async def _adopt_shared_catalog(self) -> float:
+        """
+        Cargar el catálogo compartido si es de otra versión (para CatalogRefresher)
+
+        Returns:
+            float: Cuándo terminó el último scraping de cualquier worker (0 si nunca)
+        """
+        state = self.state
+        if await state.call(state.catalog_version) != self._catalog_version and not self.refresher.in_flight:
+            await self._load_shared_catalog()
+        return await state.call(state.lease_completed_at, CATALOG_REFRESH_LEASE)
+
+    async def _scrape_products(self) -> bool:
+        """
+        Scrapear las tiendas, publicar el catálogo e instalarlo (con el lease tomado)
+
+        Returns:
+            bool: True si el catálogo quedó actualizado (o sin cambios)
+        """
         try:
             logger.info("Actualizando caché de productos...")
-            self.products_cache = await self.scraping_service.scrape_all_stores()
+            scraped = await self.scraping_service.scrape_all_stores()
+            if not any(scraped.values()):
+                # Tiendas caídas: conservar el catálogo anterior antes que quedar vacío
+                logger.warning("El scraping no devolvió productos: se conserva el catálogo actual")
+                return False
+
+            diff = diff_catalogs(self.products_cache, scraped)
+            counts = diff.counts()
             self.last_cache_update = datetime.now()
-            logger.info(f"Caché actualizado: {sum(len(p) for p in self.products_cache.values())} productos")
+            # Sin cambios respecto de la versión publicada (no de una anterior de este worker)
+            unchanged = not diff.has_changes and self.message_processor.catalog_index is not None
+            if unchanged and self._catalog_version == await self.state.call(self.state.catalog_version):
+                logger.info(f"Catálogo sin cambios ({counts['unchanged']} productos)")
+                return True
+
+            indexes = await asyncio.to_thread(
+                self.message_processor.prepare_indexes, diff.catalog, self.message_processor.export_indexes()
+            )
+            # Publicar para los demás workers
+            version = await self.state.call(self.state.save_catalog, diff.catalog)
+
+            # Cambio atómico de versión: catálogo e índices en el mismo paso del event loop
+            self.message_processor.install_indexes(indexes)
+            self.products_cache = diff.catalog
+            # La nueva versión invalida los resultados cacheados (la versión es parte de la clave)
+            self._catalog_version = version
+            self._catalog_published_at = time.time()
+            self._catalog_checked_at = time.monotonic()
+            logger.info(
+                f"Caché actualizado a v{self._catalog_version}: +{counts['added']} nuevos, "
+                f"-{counts['removed']} retirados, ~{counts['changed']} con cambios, "
+                f"{counts['unchanged']} sin cambios"
+            )
+
+            await self._save_snapshot()
+            return True
         except Exception as e:
             logger.error(f"Error actualizando caché: {str(e)}")
+            return False
+
+    async def _save_snapshot(self):
+        """Guardar el catálogo y sus índices en disco (en un hilo: pickle de todo el catálogo)"""
+        if not settings.SNAPSHOT_ENABLED:
+            return
+        try:
+            payload = {"catalog": self.products_cache, "indexes": self.message_processor.export_indexes()}
+            header = {
+                "version": self._catalog_version,
+                "products": sum(len(p) for p in self.products_cache.values()),
+                "updated_at": self.last_cache_update.timestamp()
+            }
+            started = time.perf_counter()
+            size = await asyncio.to_thread(save_snapshot, settings.SNAPSHOT_PATH, payload, header)
+            logger.info(
+                f"Snapshot del catálogo guardado: {size / 1e6:.1f} MB en "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+        except Exception as e:
+            logger.error(f"Error guardando snapshot del catálogo: {str(e)}")
+
+    def _load_snapshot(self) -> bool:
+        """
+        Cargar el catálogo y sus índices desde el snapshot en disco
+
+        Returns:
+            bool: True si se cargó un snapshot
+        """
+        if not settings.SNAPSHOT_ENABLED:
+            return False
+        try:
+            started = time.perf_counter()
+            snapshot = load_snapshot(settings.SNAPSHOT_PATH)
+            if snapshot is None:
+                return False
+
+            header, payload = snapshot
+            self.products_cache = payload["catalog"]
+            self.message_processor.restore_indexes(payload["indexes"])
+            self.last_cache_update = datetime.fromtimestamp(header["updated_at"])
+            # La versión del snapshot: si el backend publicó otra después, el próximo sync la adopta
+            self._catalog_version = header.get("version", 0)
+            self._catalog_published_at = header["updated_at"]
+            self._catalog_checked_at = time.monotonic()
+            logger.info(
+                f"Snapshot del catálogo cargado: {header['products']} productos en "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"Error cargando snapshot del catálogo: {str(e)}")
+            return False
+
+    async def _load_shared_catalog(self, max_age: Optional[float] = None) -> bool:
+        """
+        Cargar el último catálogo publicado en el backend de estado
+
+        La lectura y los índices se preparan en otro hilo mientras se sigue
+        respondiendo con la versión vigente; catálogo e índices se
+        reemplazan juntos, como en _update_products_cache.
+
+        Args:
+            max_age: Antigüedad máxima aceptada en segundos (None = cualquiera)
+
+        Returns:
+            bool: True si se cargó un catálogo
+        """
+        try:
+            current = self._catalog_version
+            published = await self.state.call(self.state.load_catalog)
+            if published is None:
+                return False
+
+            version, updated_at, catalog = published
+            if max_age is not None and time.time() - updated_at > max_age:
+                return False
+
+            indexes = await asyncio.to_thread(self.message_processor.prepare_indexes, catalog)
+            if self._catalog_version != current:
+                # Mientras tanto se instaló otra versión (p. ej. un scraping propio)
+                return True
+
+            self.message_processor.install_indexes(indexes)
+            self.products_cache = catalog
+            self.last_cache_update = datetime.fromtimestamp(updated_at)
+            self._catalog_version = version
+            self._catalog_published_at = updated_at
+            logger.info(f"Catálogo compartido v{version} cargado: {sum(len(p) for p in catalog.values())} productos")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error cargando catálogo compartido: {str(e)}")
+            return False
+
+    def _sync_products_cache(self):
+        """
+        Adoptar el catálogo publicado por otro worker (como mucho cada STATE_SYNC_SECONDS)
+
+        No bloquea: si hay una versión nueva se carga en segundo plano y
+        hasta entonces se responde con la vigente.
+        """
+        now = time.monotonic()
+        if now - self._catalog_checked_at < settings.STATE_SYNC_SECONDS:
+            return
+        self._catalog_checked_at = now
+
+        if self._sync_task is not None and not self._sync_task.done():
+            return
+        # Un scraping propio en curso publica e instala su versión al terminar
+        if self.refresher.in_flight:
+            return
+        self._sync_task = asyncio.create_task(self._sync_shared_catalog())
+
+    async def _sync_shared_catalog(self):
+        """Cargar el catálogo compartido si el backend tiene otra versión"""
+        if await self.state.call(self.state.catalog_version) != self._catalog_version:
+            await self._load_shared_catalog()
+
+    def catalog_listing(self) -> Tuple[int, float, Sequence[Product]]:
+        """
+        Versión vigente del catálogo y sus productos en un orden estable
+
+        Los productos son la lista del índice (no se copia); cada versión
+        es inmutable, así que se puede recorrer aunque llegue otra mientras.
+
+        Returns:
+            Tuple[int, float, Sequence[Product]]: (versión, publicada en, productos)
+        """
+        self._sync_products_cache()
+        index = self.message_processor.catalog_index
+        if index is not None and index.source is self.products_cache:
+            products = index.products
+        else:
+            products = [product for store_products in self.products_cache.values() for product in store_products]
+        return self._catalog_version, self._catalog_published_at, products
+
+    def search_catalog(self, query: str, **filters: Any) -> Dict[str, Any]:
+        """
+        Buscar en el catálogo vigente (ver MessageProcessor.search_catalog)
+
+        Args:
+            query: Consulta
+            **filters: store, min_price, max_price, limit, offset
+
+        Returns:
+            Dict[str, Any]: total, results y filters
+        """
+        self._sync_products_cache()
+        return self.message_processor.search_catalog(query, **filters)
+
+    async def enqueue_message(self, webhook_data: Dict[str, Any]) -> bool:
+        """
+        Encolar un webhook en el carril de su chat para procesarlo en segundo plano
+
+        Si el log de entrada está activo, el webhook se persiste antes de
+        confirmarlo para poder reproducirlo si el proceso se cae.
+
+        Args:
+            webhook_data: Datos del webhook
+
+        Returns:
+            bool: True si se encoló (o se descartó por ser un evento irrelevante),
+                False si hay contrapresión o el agente está detenido
+        """
+        if self.scheduler is None:
+            return False
+
+        # Descartar eventos irrelevantes antes de construir el mensaje
+        accepted, reason = self.event_router.route(webhook_data)
+        if not accepted:
+            logger.debug(f"Evento descartado: {reason}")
+            return True
+
+        message = self.message_processor.normalize_message_data(webhook_data)
+        entry_id = await self.inbound_log.append(webhook_data) if self.inbound_log else None
+
+        # Retener mensajes de chats activos para agruparlos en una sola consulta
+        if self.coalescer is not None and self.coalescer.offer(message, entry_id):
+            return True
+
+        if self.scheduler.submit(message.chat_id, partial(self._handle_message, message, entry_id)):
+            return True
+
+        # Rechazado por contrapresión: el remitente reintentará, no se reproduce
+        self._complete_entries(entry_id)
+        return False
+
+    def _complete_entries(self, *entry_ids: Optional[int]):
+        """
+        Marcar entradas del log como completadas
+
+        Args:
+            entry_ids: IDs de entradas (None se ignora)
+        """
+        if self.inbound_log is not None:
+            for entry_id in entry_ids:
+                self.inbound_log.complete(entry_id)
+
+    def _release_entries(self, *entry_ids: Optional[int]):
+        """
+        Devolver entradas del log para reintentarlas (respuesta no enviada)
+
+        Args:
+            entry_ids: IDs de entradas (None se ignora)
+        """
+        if self.inbound_log is not None:
+            for entry_id in entry_ids:
+                self.inbound_log.release(entry_id)
+
+    async def _open_inbound_log(self):
+        """Abrir el log de entrada y reproducir lo que quedó pendiente"""
+        if not settings.INBOUND_LOG_ENABLED:
+            return
+
+        self.inbound_log = InboundLog(
+            path=settings.INBOUND_LOG_PATH,
+            batch_window=settings.INBOUND_LOG_BATCH_MS / 1000,
+            lease_seconds=settings.INBOUND_LOG_LEASE_SECONDS,
+            max_attempts=settings.INBOUND_LOG_MAX_ATTEMPTS
+        )
+        await self.inbound_log.open()
+        await self._replay_inbound_log()
+        self._recovery_task = asyncio.create_task(self._recovery_loop())
+
+    async def _replay_inbound_log(self):
+        """Reencolar las entradas pendientes de procesos detenidos o caídos, y las devueltas para reintento"""
+        entries = await self.inbound_log.claim_orphans()
+        if entries:
+            logger.info(f"Reproduciendo {len(entries)} mensajes pendientes del log de entrada")
+
+        for entry_id, payload in entries:
+            try:
+                message = self.message_processor.normalize_message_data(payload)
+            except Exception:
+                self._complete_entries(entry_id)
+                continue
+
+            job = partial(self._handle_message, message, entry_id, replayed=True)
+            if not self.scheduler.submit(message.chat_id, job):
+                self._release_entries(entry_id)
+
+    async def _recovery_loop(self):
+        """Latido del log y recuperación periódica de entradas huérfanas"""
+        while True:
+            await asyncio.sleep(settings.INBOUND_LOG_LEASE_SECONDS / 3)
+            try:
+                await self._replay_inbound_log()
+            except Exception as e:
+                logger.error(f"Error recuperando log de entrada: {str(e)}")
+
+    async def _close_inbound_log(self):
+        """Detener la recuperación y cerrar el log de entrada"""
+        if self._recovery_task:
+            self._recovery_task.cancel()
+            await asyncio.gather(self._recovery_task, return_exceptions=True)
+            self._recovery_task = None
+
+        if self.inbound_log is not None:
+            await self.inbound_log.close()
+            self.inbound_log = None
+
+    def _start_scheduler(self):
+        """Crear el planificador por chat"""
+        self.scheduler = ChatScheduler(
+            lanes=settings.WEBHOOK_WORKERS,
+            lane_capacity=settings.WEBHOOK_LANE_CAPACITY,
+            max_pending=settings.WEBHOOK_QUEUE_SIZE,
+            idle_timeout=settings.WEBHOOK_LANE_IDLE_TIMEOUT
+        )
+        logger.info(f"Planificador iniciado con {self.scheduler.num_lanes} carriles")
+
+        if settings.COALESCE_ENABLED:
+            self.coalescer = MessageCoalescer(
+                on_flush=self._submit_burst,
+                min_window=settings.COALESCE_WINDOW_MIN,
+                max_window=settings.COALESCE_WINDOW_MAX,
+                idle_timeout=settings.COALESCE_IDLE_TIMEOUT,
+                max_messages=settings.COALESCE_MAX_MESSAGES,
+                max_hold=settings.COALESCE_MAX_HOLD
+            )
+
+        if settings.ADMISSION_ENABLED:
+            # Una llamada a la IA por carril: con el umbral en el número de carriles no se dispararía nunca
+            max_inflight = min(settings.ADMISSION_MAX_INFLIGHT_LLM, max(1, settings.WEBHOOK_WORKERS - 1))
+            if max_inflight < settings.ADMISSION_MAX_INFLIGHT_LLM:
+                logger.warning(
+                    f"ADMISSION_MAX_INFLIGHT_LLM={settings.ADMISSION_MAX_INFLIGHT_LLM} no es alcanzable con "
+                    f"{settings.WEBHOOK_WORKERS} carriles: se usa {max_inflight}"
+                )
+            self.admission = AdmissionController(
+                queue_depth=self._queue_depth,
+                max_queue=settings.ADMISSION_MAX_QUEUE,
+                max_inflight=max_inflight,
+                recovery_ratio=settings.ADMISSION_RECOVERY_RATIO,
+                min_shed_seconds=settings.ADMISSION_MIN_SHED_SECONDS,
+                cache_size=settings.ADMISSION_CACHE_SIZE
+            )
+
+    def _queue_depth(self) -> int:
+        """Mensajes encolados o en ejecución en los carriles"""
+        return self.scheduler.pending if self.scheduler is not None else 0
+
+    async def _stop_scheduler(self):
+        """Vaciar los carriles pendientes (con timeout) y detener el planificador"""
+        if self.coalescer is not None:
+            self.coalescer.flush_all()
+
+        if self.scheduler is not None:
+            await self.scheduler.close(timeout=settings.WEBHOOK_DRAIN_TIMEOUT)
 
     async def process_message(self, webhook_data: Dict[str, Any]) -> bool:
         """
@@ -85,46 +580,209 @@ class SalesAgent:
             bool: True si se procesó correctamente
         """
         try:
+            accepted, reason = self.event_router.route(webhook_data)
+            if not accepted:
+                logger.debug(f"Evento descartado: {reason}")
+                return False
+
             # Normalizar mensaje
             message = self.message_processor.normalize_message_data(webhook_data)
+            return await self._handle_message(message)
 
-            # Limpiar datos nulos
-            cleaned_data = self.message_processor.clean_null_data(message.to_dict())
-            message = WhatsAppMessage(**cleaned_data)
+        except Exception as e:
+            logger.error(f"Error procesando mensaje: {str(e)}")
+            return False
 
-            # Validar mensaje
-            is_valid, reason = self.message_processor.validate_message(message)
-            if not is_valid:
-                logger.info(f"Mensaje inválido: {reason}")
-                return False
+    async def _prepare_message(self, message: WhatsAppMessage, check_duplicate: bool = True) -> Optional[WhatsAppMessage]:
+        """
+        Limpiar, validar y filtrar un mensaje normalizado
 
-            # Verificar si debe responder
-            should_respond, reason = self.message_processor.should_respond(message)
-            if not should_respond:
-                logger.info(f"No responder: {reason}")
-                return False
+        Args:
+            message: Mensaje normalizado
+            check_duplicate: False para los reintentos del log de entrada: su
+                clave ya quedó registrada en el intento anterior
 
-            # Procesar según tipo de mensaje
-            if self.message_processor.is_duplicate_message(message):
-                logger.info("Mensaje duplicado ignorado")
+        Returns:
+            Optional[WhatsAppMessage]: Mensaje listo para procesar o None si se descarta
+        """
+        # Limpiar datos nulos
+        cleaned_data = self.message_processor.clean_null_data(message.to_dict())
+        message = WhatsAppMessage(**cleaned_data)
+
+        # Validar mensaje
+        is_valid, reason = self.message_processor.validate_message(message)
+        if not is_valid:
+            logger.info(f"Mensaje inválido: {reason}")
+            return None
+
+        # Verificar si debe responder
+        should_respond, reason = self.message_processor.should_respond(message)
+        if not should_respond:
+            logger.info(f"No responder: {reason}")
+            return None
+
+        # Ignorar duplicados (única verificación por mensaje)
+        if check_duplicate and await self.message_processor.is_duplicate_message(message):
+            logger.info("Mensaje duplicado ignorado")
+            return None
+
+        return message
+
+    async def _handle_message(
+        self,
+        message: WhatsAppMessage,
+        entry_id: Optional[int] = None,
+        replayed: bool = False
+    ) -> bool:
+        """
+        Procesar un mensaje ya normalizado
+
+        Si la respuesta no se pudo enviar, la entrada del log se devuelve
+        para que la recuperación la reintente.
+
+        Args:
+            message: Mensaje normalizado
+            entry_id: ID de la entrada en el log de entrada, si existe
+            replayed: True si la entrada se reproduce desde el log (tras una
+                caída o un intento fallido): no pasa por la deduplicación
+
+        Returns:
+            bool: True si se procesó correctamente
+        """
+        success = False
+        resolved = False
+        try:
+            message = await self._prepare_message(message, check_duplicate=not replayed)
+            if message is None:
+                # Nada que responder: la entrada queda resuelta
+                self._complete_entries(entry_id)
+                resolved = True
                 return False
 
             # Procesar mensaje de texto
             if message.message_type == "text":
-                return await self._process_text_message(message)
+                success = await self._process_text_message(message)
 
             # Procesar mensaje de audio
             elif message.message_type == "audio":
-                return await self._process_audio_message(message)
+                success = await self._process_audio_message(message)
 
             else:
                 logger.warning(f"Tipo de mensaje no soportado: {message.message_type}")
+                self._complete_entries(entry_id)
+                resolved = True
                 return False
 
+            return success
+
         except Exception as e:
             logger.error(f"Error procesando mensaje: {str(e)}")
             return False
 
+        finally:
+            # Solo se completa cuando la respuesta se envió; si no, se reintenta
+            if success:
+                self._complete_entries(entry_id)
+            elif not resolved:
+                self._release_entries(entry_id)
+
+    def _submit_burst(self, chat_id: str, items: List[BurstItem]):
+        """
+        Encolar en el carril del chat una ráfaga de mensajes agrupados
+
+        Args:
+            chat_id: ID del chat
+            items: (mensaje, ID en el log de entrada) retenidos por el agrupador
+        """
+        if not self.scheduler or not self.scheduler.submit(chat_id, partial(self._handle_burst, items)):
+            logger.warning(f"Ráfaga de {len(items)} mensajes descartada por contrapresión en {chat_id}")
+            self._release_entries(*(entry_id for _, entry_id in items))
+
+    async def _handle_burst(self, items: List[BurstItem]) -> bool:
+        """
+        Procesar una ráfaga de textos de un mismo chat con una sola llamada a la IA
+
+        Args:
+            items: (mensaje, ID en el log de entrada) consecutivos del chat
+
+        Returns:
+            bool: True si se procesó correctamente
+        """
+        # Entradas del log sin resolver: el finally las completa o las devuelve todas,
+        # también si la preparación falla a mitad de la ráfaga
+        unsettled = [entry_id for _, entry_id in items]
+        prepared = []
+        success = False
+        try:
+            for message, entry_id in items:
+                message = await self._prepare_message(message)
+                if message is None:
+                    self._complete_entries(entry_id)
+                    unsettled.remove(entry_id)
+                else:
+                    prepared.append(message)
+
+            if not prepared:
+                return False
+
+            if len(prepared) == 1:
+                success = await self._process_text_message(prepared[0])
+            else:
+                last = prepared[-1]
+                composite = WhatsAppMessage(
+                    message_id=last.message_id,
+                    chat_id=last.chat_id,
+                    content=" ".join(m.content.strip() for m in prepared),
+                    user_name=last.user_name,
+                    message_type="text",
+                    server_url=last.server_url,
+                    instance_name=last.instance_name,
+                    api_key=last.api_key
+                )
+                logger.info(f"Ráfaga de {len(prepared)} mensajes agrupada para {last.chat_id}")
+                success = await self._process_text_message(composite)
+
+            return success
+
+        except Exception as e:
+            logger.error(f"Error procesando ráfaga: {str(e)}")
+            return False
+
+        finally:
+            if success:
+                self._complete_entries(*unsettled)
+            else:
+                self._release_entries(*unsettled)
+
+    def _search_products(self, query: str) -> Dict[str, Any]:
+        """
+        Buscar productos para una consulta, pasando por el caché de resultados
+
+        La clave es la consulta normalizada (minúsculas, sin tildes, espacios
+        simples y sin signos de pregunta o exclamación en los extremos) más
+        la versión del catálogo, así "¿Precio iPhone?" y "precio iphone"
+        comparten resultado y una actualización del catálogo invalida todo
+        lo cacheado. Se conservan las palabras vacías: "más de 2 millones" y
+        "menos de 2 millones" filtran precios distintos.
+
+        Args:
+            query: Texto del mensaje
+
+        Returns:
+            Dict[str, Any]: Resultado de MessageProcessor.process_products
+        """
+        if self.query_cache is None:
+            return self.message_processor.process_products(self.products_cache, query)
+
+        normalized = " ".join(fold_accents(query.lower()).split()).strip("¿?¡! ")
+        key = (self._catalog_version, normalized)
+        result = self.query_cache.get(key)
+        if result is None:
+            result = self.message_processor.process_products(self.products_cache, query)
+            if result.get("totalProductos"):
+                self.query_cache.put(key, result)
+        return result
+
     async def _process_text_message(self, message: WhatsAppMessage) -> bool:
         """
         Procesar mensaje de texto
@@ -136,21 +794,16 @@ class SalesAgent:
             bool: True si se procesó correctamente
         """
         try:
+            self._sync_products_cache()
+
             # Procesar productos
-            products_result = self.message_processor.process_products(
-                self.products_cache,
-                message.content
-            )
+            products_result = self._search_products(message.content)
 
             # Preparar contexto para IA
             context = self.message_processor.prepare_ai_context(message, products_result)
 
-            # Generar respuesta con IA
-            response = await self.ai_service.generate_response(
-                message.content,
-                products_result.get("alternativas", []),
-                message.chat_id
-            )
+            # Generar respuesta con IA (o sin ella si el pipeline está saturado)
+            response = await self._generate_response(message, products_result.get("alternativas", []))
 
             if not response:
                 logger.error("No se pudo generar respuesta")
@@ -165,7 +818,7 @@ class SalesAgent:
 
             if success:
                 # Agregar a memoria de IA
-                self.ai_service.add_to_memory(message.chat_id, message.content, response)
+                await self.ai_service.add_to_memory(message.chat_id, message.content, response)
                 logger.info(f"Respuesta enviada a {message.chat_id}")
 
                 # Si hay producto encontrado, intentar enviar imagen
@@ -178,6 +831,37 @@ class SalesAgent:
             logger.error(f"Error procesando mensaje de texto: {str(e)}")
             return False
 
+    async def _generate_response(self, message: WhatsAppMessage, products: List[Product]) -> str:
+        """
+        Generar la respuesta respetando el control de admisión
+
+        Con el pipeline saturado no se encola otra llamada a la IA: se
+        responde con una respuesta reciente a la misma consulta en el mismo
+        chat o con la respuesta fallback.
+
+        Args:
+            message: Mensaje de texto
+            products: Productos alternativos encontrados
+
+        Returns:
+            str: Respuesta a enviar
+        """
+        admission = self.admission
+        if admission is None:
+            return await self.ai_service.generate_response(message.content, products, message.chat_id)
+
+        if not admission.admit():
+            cached = admission.cached_answer(message.chat_id, message.content)
+            if cached is not None:
+                return cached
+            return self.ai_service._generate_fallback_response(message.content, products)
+
+        with admission.llm_call():
+            response = await self.ai_service.generate_response(message.content, products, message.chat_id)
+
+        admission.remember_answer(message.chat_id, message.content, response)
+        return response
+
     async def _process_audio_message(self, message: WhatsAppMessage) -> bool:
         """
         Procesar mensaje de audio
@@ -255,7 +939,7 @@ class SalesAgent:
             return False
 
     async def start(self):
-        """Iniciar el agente"""
+        """Iniciar el agente, inicializándolo si no se hizo antes"""
         if self.is_running:
             logger.warning("El agente ya está ejecutándose")
             return
@@ -265,26 +949,52 @@ class SalesAgent:
             logger.error("No se pudo inicializar el agente")
             return
 
+        self._start_scheduler()
+        await self._open_inbound_log()
+        self.refresher.start()
         self.is_running = True
         logger.info("Agente de Ventas iniciado")
 
     async def stop(self):
         """Detener el agente"""
         self.is_running = False
+        for task in (self._refresh_task, self._sync_task):
+            if task and not task.done():
+                task.cancel()
+        await self.refresher.stop()
+        await self._stop_scheduler()
+        await self._close_inbound_log()
+        await self.scraping_service.close()
+        self.state.close()
         logger.info("Agente de Ventas detenido")
 
-    def get_status(self) -> Dict[str, Any]:
+    async def get_status(self) -> Dict[str, Any]:
         """
         Obtener estado del agente
 
         Returns:
             Dict[str, Any]: Estado actual
         """
+        state = await self.state.call(self.state.get_stats)
+        index = self.message_processor.catalog_index
+        facets = self.message_processor.facet_index
         return {
             "is_running": self.is_running,
             "products_cache_size": sum(len(p) for p in self.products_cache.values()),
+            "catalog_index": index.get_stats() if index else None,
+            "catalog_facets": facets.get_stats() if facets else None,
+            "query_cache": self.query_cache.get_stats() if self.query_cache else None,
             "last_cache_update": self.last_cache_update.isoformat() if self.last_cache_update else None,
+            "catalog_refresh": self.refresher.get_stats(),
+            "crawl": self.scraping_service.crawl_stats,
             "whatsapp_configured": self.whatsapp_service.is_configured(),
             "ai_configured": self.ai_service.is_configured(),
-            "audio_configured": bool(self.audio_service.openai_api_key)
+            "audio_configured": bool(self.audio_service.openai_api_key),
+            "ingest": self.scheduler.get_stats() if self.scheduler else None,
+            "coalescing": self.coalescer.get_stats() if self.coalescer else None,
+            "events": self.event_router.get_stats(),
+            "dedup": state.pop("dedup"),
+            "state": state,
+            "inbound_log": self.inbound_log.get_stats() if self.inbound_log else None,
+            "admission": self.admission.get_stats() if self.admission else None
         }
\ No newline at end of file
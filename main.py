@@ -7,9 +7,13 @@ import asyncio
 import logging
 import signal
 import sys
+import time
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, HTTPException
+from typing import Any, Dict, Optional
+from fastapi import FastAPI, Request, HTTPException, Query
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
@@ -18,6 +22,10 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from config.settings import settings
 from core.sales_agent import SalesAgent
+from services.product_listing import (
+    catalog_page, decode_cursor, etag_matches, iter_ndjson, listing_etag, parse_fields
+)
+from utils.helpers import fast_json_dumps, fast_json_loads
 
 # Configurar logging
 logging.basicConfig(
@@ -67,11 +75,14 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Compresión negociada por Accept-Encoding (también para el NDJSON en streaming)
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_SIZE)
+
 @app.get("/")
 async def root():
     """Endpoint de salud"""
     if sales_agent:
-        status = sales_agent.get_status()
+        status = await sales_agent.get_status()
         return {
             "message": "Agente de Ventas activo",
             "status": status
@@ -84,17 +95,41 @@ async def health_check():
     if not sales_agent:
         raise HTTPException(status_code=503, detail="Agente no inicializado")
 
-    status = sales_agent.get_status()
+    status = await sales_agent.get_status()
+    admission = status.get("admission")
     return {
         "status": "healthy" if status["is_running"] else "unhealthy",
+        "mode": admission["mode"] if admission else "normal",
+        "shed": admission["shed"] if admission else 0,
         "details": status
     }
 
-@app.post("/webhook")
+async def _enqueue_webhook(webhook_data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Encolar un webhook en el agente (persistido antes de confirmar si el log está activo)
+
+    Args:
+        webhook_data: Datos del webhook
+
+    Returns:
+        dict: Respuesta de confirmación
+    """
+    if not sales_agent:
+        raise HTTPException(status_code=503, detail="Agente no disponible")
+
+    # Encolar mensaje
+    if not await sales_agent.enqueue_message(webhook_data):
+        raise HTTPException(status_code=503, detail="Cola de mensajes llena")
+
+    return {"status": "accepted", "message": "Mensaje encolado"}
+
 async def whatsapp_webhook(request: Request, payload: WebhookPayload):
     """
     Endpoint para recibir webhooks de WhatsApp
 
+    El mensaje se encola y se procesa en segundo plano por los carriles
+    del agente; la respuesta es inmediata (202).
+
     Args:
         payload: Datos del webhook
 
@@ -102,21 +137,53 @@ async def whatsapp_webhook(request: Request, payload: WebhookPayload):
         dict: Respuesta de confirmación
     """
     try:
-        if not sales_agent:
-            raise HTTPException(status_code=503, detail="Agente no disponible")
+        return await _enqueue_webhook(payload.body)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error procesando webhook: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+async def whatsapp_webhook_fast(request: Request):
+    """
+    Endpoint rápido para recibir webhooks de WhatsApp (WEBHOOK_FAST_PATH)
 
-        # Procesar mensaje
-        success = await sales_agent.process_message(payload.body)
+    Lee el cuerpo crudo y lo decodifica con orjson (o json estándar), sin
+    construir el modelo Pydantic; el payload va directo al extractor.
+    Acepta tanto el formato envuelto en "body" como el plano de Evolution.
+
+    Args:
+        request: Petición HTTP
+
+    Returns:
+        dict: Respuesta de confirmación
+    """
+    try:
+        try:
+            data = fast_json_loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="JSON inválido")
 
-        if success:
-            return {"status": "success", "message": "Mensaje procesado correctamente"}
-        else:
-            return {"status": "ignored", "message": "Mensaje no procesado"}
+        if not isinstance(data, dict):
+            raise HTTPException(status_code=422, detail="El payload debe ser un objeto JSON")
 
+        body = data.get("body")
+        return await _enqueue_webhook(body if isinstance(body, dict) else data)
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error procesando webhook: {str(e)}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
+app.add_api_route(
+    "/webhook",
+    whatsapp_webhook_fast if settings.WEBHOOK_FAST_PATH else whatsapp_webhook,
+    methods=["POST"],
+    status_code=202
+)
+
 @app.post("/refresh-products")
 async def refresh_products():
     """Endpoint para refrescar caché de productos"""
@@ -124,39 +191,124 @@ async def refresh_products():
         if not sales_agent:
             raise HTTPException(status_code=503, detail="Agente no disponible")
 
-        await sales_agent._update_products_cache()
+        # Si ya hay un scraping en curso (periódico u otra llamada) se espera ese mismo
+        if not await sales_agent.refresh_products():
+            raise HTTPException(status_code=502, detail="No se pudo actualizar el catálogo")
         return {"status": "success", "message": "Productos actualizados"}
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.error(f"Error actualizando productos: {str(e)}")
         raise HTTPException(status_code=500, detail="Error actualizando productos")
 
 @app.get("/products")
-async def get_products():
-    """Endpoint para obtener productos disponibles"""
+async def get_products(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+    format: Optional[str] = None
+):
+    """
+    Endpoint para obtener productos disponibles
+
+    Devuelve páginas de PRODUCTS_PAGE_SIZE productos con next_cursor para
+    pedir la siguiente, o todo el catálogo como NDJSON en streaming
+    (?format=ndjson o Accept: application/x-ndjson). El ETag depende de la
+    versión del catálogo: con If-None-Match responde 304 sin recorrerlo.
+    """
     try:
         if not sales_agent:
             raise HTTPException(status_code=503, detail="Agente no disponible")
 
-        all_products = []
-        for store, products in sales_agent.products_cache.items():
-            for product in products:
-                all_products.append({
-                    "nombre": product.nombre,
-                    "tienda": product.tienda,
-                    "precio": product.precio,
-                    "disponibilidad": product.disponibilidad
-                })
-
-        return {
-            "total": len(all_products),
-            "products": all_products
-        }
+        ndjson = format == "ndjson" or (
+            format is None and "application/x-ndjson" in request.headers.get("accept", "")
+        )
+        try:
+            selected = parse_fields(fields)
+            cursor_version, offset = decode_cursor(cursor) if cursor else (None, 0)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        version, published_at, products = sales_agent.catalog_listing()
+        if cursor_version is not None and cursor_version != version:
+            raise HTTPException(status_code=410, detail="El catálogo cambió: vuelva a pedir desde el principio")
+
+        etag = listing_etag(version, published_at, cursor, limit, ",".join(selected), ndjson)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        offset = min(offset, len(products))
+        if ndjson:
+            # Sin límite se transmite todo el catálogo sin armarlo en memoria
+            end = len(products) if limit is None else min(offset + limit, len(products))
+            return StreamingResponse(
+                iter_ndjson(products, offset, end, selected),
+                media_type="application/x-ndjson",
+                headers=headers
+            )
+
+        limit = min(limit or settings.PRODUCTS_PAGE_SIZE, settings.PRODUCTS_PAGE_MAX)
+        page = catalog_page(products, version, offset, limit, selected)
+        return Response(content=fast_json_dumps(page), media_type="application/json", headers=headers)
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         logger.error(f"Error obteniendo productos: {str(e)}")
         raise HTTPException(status_code=500, detail="Error obteniendo productos")
 
+@app.get("/products/search")
+async def search_products(
+    q: str = Query("", max_length=200),
+    tienda: Optional[str] = None,
+    min_price: Optional[int] = Query(None, ge=0),
+    max_price: Optional[int] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Endpoint para buscar productos con el mismo motor que las respuestas del chat
+
+    La consulta puede traer rango de precio y atributos ("samsung 8gb
+    menos de 2 millones"); min_price/max_price mandan sobre los del texto.
+    La latencia de la búsqueda va en el encabezado X-Search-Latency-ms.
+    """
+    try:
+        if not sales_agent:
+            raise HTTPException(status_code=503, detail="Agente no disponible")
+
+        started = time.perf_counter()
+        found = sales_agent.search_catalog(
+            q, store=tienda, min_price=min_price, max_price=max_price, limit=limit, offset=offset
+        )
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        body = {
+            "query": q,
+            "total": found["total"],
+            "offset": offset,
+            "limit": limit,
+            "filters": found["filters"],
+            "products": [dict(product.to_dict(), score=round(score, 4)) for product, score in found["results"]]
+        }
+        return Response(
+            content=fast_json_dumps(body),
+            media_type="application/json",
+            headers={"X-Search-Latency-ms": f"{latency_ms:.2f}"}
+        )
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logger.error(f"Error buscando productos: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error buscando productos")
+
 def signal_handler(signum, frame):
     """Manejador de señales para graceful shutdown"""
     logger.info(f"Señal {signum} recibida, deteniendo servidor...")
@@ -188,6 +340,27 @@ async def main():
         logger.error(f"Error en servidor: {str(e)}")
         sys.exit(1)
 
+def run_workers():
+    """Ejecutar varios procesos worker (requiere estado compartido)"""
+    if settings.STATE_BACKEND == "memory":
+        logger.warning(
+            "WORKERS > 1 con STATE_BACKEND=memory: la memoria y la deduplicación "
+            "no se comparten entre workers (use STATE_BACKEND=sqlite)"
+        )
+
+    logger.info(f"Iniciando {settings.WORKERS} workers en http://0.0.0.0:8000")
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=settings.WORKERS,
+        log_level=settings.LOG_LEVEL.lower(),
+        access_log=True
+    )
+
 if __name__ == "__main__":
     # Ejecutar aplicación
-    asyncio.run(main())
\ No newline at end of file
+    if settings.WORKERS > 1:
+        run_workers()
+    else:
+        asyncio.run(main())
\ No newline at end of file
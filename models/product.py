@@ -2,17 +2,54 @@
 Modelos de datos para productos
 """
 from typing import Optional, Dict, Any, List
-from dataclasses import dataclass
 import re
+import sys
+
+from utils.helpers import normalize_text, parse_price
+
+# Campos públicos, en el orden del constructor
+FIELDS = ("nombre", "tienda", "precio", "disponibilidad", "imagen", "precio_cop")
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Una sola copia de los textos que se repiten entre miles de productos"""
+    return sys.intern(value) if type(value) is str else value
 
-@dataclass
 class Product:
-    """Representa un producto de las tiendas"""
-    nombre: str
-    tienda: str
-    precio: str = "Consultar"
-    disponibilidad: str = "Consultar"
-    imagen: Optional[str] = None
+    """Producto de las tiendas, con __slots__ y tienda, precio y disponibilidad internados"""
+
+    __slots__ = FIELDS + ("nombre_lower", "nombre_normalizado")
+
+    def __init__(
+        self,
+        nombre: str,
+        tienda: str,
+        precio: str = "Consultar",
+        disponibilidad: str = "Consultar",
+        imagen: Optional[str] = None,
+        precio_cop: Optional[int] = None
+    ):
+        self.nombre = nombre
+        self.tienda = _intern(tienda)
+        self.precio = _intern(precio)
+        self.disponibilidad = _intern(disponibilidad)
+        self.imagen = imagen
+        # Precio en pesos (COP) como entero; se obtiene de 'precio' si no se indica
+        self.precio_cop = parse_price(precio) if precio_cop is None else precio_cop
+
+        self.nombre_lower = nombre.lower()
+        normalized = normalize_text(nombre)
+        self.nombre_normalizado = self.nombre_lower if normalized == self.nombre_lower else normalized
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in FIELDS)
+        return f"Product({values})"
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in FIELDS)
+
+    __hash__ = None
 
     def to_dict(self) -> Dict[str, Any]:
         """Convertir a diccionario"""
@@ -21,7 +58,8 @@ class Product:
             'tienda': self.tienda,
             'precio': self.precio,
             'disponibilidad': self.disponibilidad,
-            'imagen': self.imagen
+            'imagen': self.imagen,
+            'precio_cop': self.precio_cop
         }
 
     @classmethod
@@ -48,11 +86,8 @@ class Product:
         if not query:
             return False
 
-        query_lower = query.lower()
-        nombre_lower = self.nombre.lower()
-
         # Búsqueda exacta o parcial
-        return query_lower in nombre_lower
+        return query.lower() in self.nombre_lower
 
     def get_display_info(self) -> str:
         """Obtener información formateada para mostrar"""
@@ -0,0 +1,162 @@
+"""
+Extractor compilado de payloads de webhook
+Detecta la "forma" del payload una vez y cachea un accesor compilado por forma
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Contenedores donde pueden vivir los campos. Los de primer nivel (raíz,
+# body, body.data y data) forman la firma de la forma; los anidados se
+# resuelven dentro del accesor solo si su clave padre existe en la forma.
+#   nombre: (contenedor padre, clave)
+_NESTED: Dict[str, Tuple[str, str]] = {
+    "bdm": ("bd", "mensaje"),
+    "bdme": ("bd", "message"),
+    "bdk": ("bd", "key"),
+    "bdx": ("bdme", "extendedTextMessage"),
+    "dm": ("d", "mensaje"),
+    "dme": ("d", "message"),
+    "dk": ("d", "key"),
+    "dx": ("dme", "extendedTextMessage"),
+}
+
+# Posición en la firma de cada contenedor de primer nivel
+_SIGNATURE_INDEX = {"r": 0, "b": 1, "bd": 2, "d": 3}
+
+# Candidatos por campo en orden de prioridad: (contenedor, clave).
+# Los candidatos de Evolution v2 (key.*, extendedTextMessage) van al final
+# para que solo completen campos que antes quedaban vacíos.
+_FIELDS: Tuple[Tuple[str, Tuple[Tuple[str, str], ...], str], ...] = (
+    ("server_url", (("b", "URL del servidor"), ("b", "server_url"), ("r", "URL del servidor"), ("r", "server_url")), ""),
+    ("instance_name", (("b", "nombreInstancia"), ("b", "instance"), ("b", "instancia"), ("r", "nombreInstancia"),
+                       ("r", "instance")), ""),
+    ("api_key", (("b", "clave API"), ("b", "apikey"), ("r", "clave API"), ("r", "apikey")), ""),
+    ("message_id", (("bd", "identificación"), ("bd", "id"), ("bd", "ID del mensaje"), ("d", "identificación"),
+                    ("d", "id"), ("bdk", "id"), ("dk", "id")), ""),
+    ("chat_id", (("bd", "Jid remoto"), ("bd", "remoteJid"), ("bd", "ID de chat"), ("d", "Jid remoto"),
+                 ("d", "remoteJid"), ("bdk", "remoteJid"), ("dk", "remoteJid")), ""),
+    ("content", (("bdm", "conversación"), ("bdm", "text"), ("bd", "contenido"), ("bdme", "conversation"),
+                 ("bdme", "text"), ("dm", "conversación"), ("dm", "text"), ("d", "contenido"),
+                 ("dme", "conversation"), ("dme", "text"), ("bdx", "text"), ("dx", "text")), ""),
+    ("user_name", (("bd", "nombrePush"), ("bd", "pushName"), ("bd", "notifyName"), ("bd", "nombre de usuario"),
+                   ("d", "nombrePush"), ("d", "pushName")), "Cliente"),
+)
+
+_MAX_SHAPES = 256
+_EMPTY: Dict[str, Any] = {}
+
+Signature = Tuple[Optional[Tuple[str, ...]], ...]
+Accessor = Callable[[Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+_accessors: Dict[Signature, Accessor] = {}
+_stats = {"hits": 0, "misses": 0}
+
+def _message_type(body_data: Dict[str, Any]) -> str:
+    """Tipo de mensaje (solo se lee del payload envuelto en body)"""
+    message_type = body_data.get("tipo de mensaje")
+    if message_type == "conversación" or message_type == "texto":
+        return message_type
+    return body_data.get("messageType") or body_data.get("type") or "text"
+
+def _compile(signature: Signature) -> Accessor:
+    """
+    Compilar el accesor de una forma de payload
+
+    Genera una función sin bucles que resuelve todos los campos en una sola
+    pasada, consultando solo las claves que existen en esta forma y en el
+    mismo orden de prioridad. El código generado contiene únicamente las
+    constantes de _FIELDS, nunca datos del payload.
+
+    Args:
+        signature: Claves presentes en raíz, body, body.data y data
+
+    Returns:
+        Accessor: Función (raíz, body, body.data, data) -> campos
+    """
+    def has(container: str, key: str) -> bool:
+        """La clave existe en un contenedor de primer nivel, o el anidado existe"""
+        if container in _SIGNATURE_INDEX:
+            keys = signature[_SIGNATURE_INDEX[container]]
+            return keys is not None and key in keys
+        return has(*_NESTED[container])
+
+    lines = ["def accessor(r, b, bd, d):"]
+    for name, (parent, key) in _NESTED.items():
+        if has(parent, key):
+            lookup = f"{parent}[{key!r}]" if parent in _SIGNATURE_INDEX else f"{parent}.get({key!r})"
+            lines.append(f"    {name} = {lookup}")
+            lines.append(f"    if type({name}) is not dict: {name} = _EMPTY")
+
+    lines.append("    return {")
+    for field, candidates, default in _FIELDS:
+        exprs = [
+            f"{container}[{key!r}]" if container in _SIGNATURE_INDEX else f"{container}.get({key!r})"
+            for container, key in candidates
+            if has(container, key)
+        ]
+        exprs.append(repr(default))
+        lines.append(f"        {field!r}: {' or '.join(exprs)},")
+    message_type = "_message_type(bd)" if signature[2] is not None else "'text'"
+    lines.append(f"        'message_type': {message_type},")
+    lines.append("    }")
+
+    namespace = {"_EMPTY": _EMPTY, "_message_type": _message_type}
+    exec("\n".join(lines), namespace)
+    return namespace["accessor"]
+
+def extract_webhook_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extraer los campos del mensaje de cualquier variante de payload
+
+    Soporta Evolution v1/v2, claves traducidas estilo n8n y payloads
+    planos o envueltos en "body". Cada campo toma el primer valor no vacío
+    según la misma prioridad que usaba WhatsAppMessage.from_webhook_data.
+
+    Args:
+        data: Payload del webhook
+
+    Returns:
+        Dict[str, Any]: Campos para construir un WhatsAppMessage
+    """
+    if type(data) is not dict:
+        data = _EMPTY
+
+    body = data.get("body")
+    if type(body) is not dict:
+        body = None
+    body_data = body.get("data") if body is not None else None
+    if type(body_data) is not dict:
+        body_data = None
+    flat_data = data.get("data")
+    if type(flat_data) is not dict:
+        flat_data = None
+
+    signature = (
+        tuple(data),
+        tuple(body) if body is not None else None,
+        tuple(body_data) if body_data is not None else None,
+        tuple(flat_data) if flat_data is not None else None,
+    )
+
+    accessor = _accessors.get(signature)
+    if accessor is None:
+        _stats["misses"] += 1
+        if len(_accessors) >= _MAX_SHAPES:
+            _accessors.clear()
+        accessor = _accessors[signature] = _compile(signature)
+    else:
+        _stats["hits"] += 1
+
+    return accessor(data, body, body_data, flat_data)
+
+def get_extractor_stats() -> Dict[str, Any]:
+    """
+    Obtener estadísticas de la caché de formas
+
+    Returns:
+        Dict[str, Any]: Formas compiladas, aciertos y fallos
+    """
+    return {
+        "shapes": len(_accessors),
+        "hits": _stats["hits"],
+        "misses": _stats["misses"]
+    }
@@ -14,19 +14,21 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import settings
 from models.product import Product
+from utils.state_backend import InMemoryStateBackend, StateBackend
 
 logger = logging.getLogger(__name__)
 
 class AIService:
     """Servicio para interactuar con modelos de IA"""
 
-    def __init__(self):
+    def __init__(self, state: Optional[StateBackend] = None):
         self.gemini_api_key = settings.GOOGLE_GEMINI_API_KEY
         self.openai_api_key = settings.OPENAI_API_KEY
         self.ollama_base_url = settings.OLLAMA_BASE_URL
         self.ollama_model = settings.OLLAMA_MODEL
         self.model = None
-        self.memory: Dict[str, List[Dict[str, str]]] = {}
+        # Memoria de conversación (en el backend de estado compartido entre workers)
+        self.state = state or InMemoryStateBackend(settings.DEDUP_TTL_SECONDS, settings.DEDUP_MAX_ENTRIES)
         self.session: Optional[aiohttp.ClientSession] = None
 
     async def initialize(self):
@@ -58,7 +60,7 @@ class AIService:
         else:
             logger.warning("Ningún servicio de IA disponible")
 
-    def add_to_memory(self, chat_id: str, message: str, response: str):
+    async def add_to_memory(self, chat_id: str, message: str, response: str):
         """
         Agregar intercambio a la memoria de la conversación
 
@@ -67,19 +69,15 @@ class AIService:
             message: Mensaje del usuario
             response: Respuesta del agente
         """
-        if chat_id not in self.memory:
-            self.memory[chat_id] = []
-
-        self.memory[chat_id].append({
-            "user": message,
-            "agent": response
-        })
-
         # Mantener solo las últimas N interacciones
-        if len(self.memory[chat_id]) > settings.CONTEXT_WINDOW_LENGTH:
-            self.memory[chat_id] = self.memory[chat_id][-settings.CONTEXT_WINDOW_LENGTH:]
-
-    def get_memory_context(self, chat_id: str) -> str:
+        await self.state.call(
+            self.state.append_memory,
+            chat_id,
+            {"user": message, "agent": response},
+            settings.CONTEXT_WINDOW_LENGTH
+        )
+
+    async def get_memory_context(self, chat_id: str) -> str:
         """
         Obtener contexto de memoria para el chat
 
@@ -89,11 +87,12 @@ class AIService:
         Returns:
             str: Contexto formateado
         """
-        if chat_id not in self.memory:
+        history = await self.state.call(self.state.get_memory, chat_id)
+        if not history:
             return ""
 
         context = "Historial de conversación:\n"
-        for i, exchange in enumerate(self.memory[chat_id], 1):
+        for i, exchange in enumerate(history, 1):
             context += f"{i}. Usuario: {exchange['user']}\n"
             context += f"   Agente: {exchange['agent']}\n"
 
@@ -113,7 +112,7 @@ class AIService:
         """
         try:
             # Preparar contexto
-            memory_context = self.get_memory_context(chat_id) if chat_id else ""
+            memory_context = await self.get_memory_context(chat_id) if chat_id else ""
 
             # Preparar información de productos
             products_info = ""
@@ -175,7 +174,7 @@ class AIService:
 
             # Agregar a memoria si hay chat_id
             if chat_id and response_text:
-                self.add_to_memory(chat_id, message, response_text)
+                await self.add_to_memory(chat_id, message, response_text)
 
             return response_text
 
@@ -199,7 +198,7 @@ class AIService:
         # Buscar producto relacionado
         relevant_product = None
         for product in products:
-            if any(keyword in message_lower for keyword in product.nombre.lower().split()):
+            if any(keyword in message_lower for keyword in product.nombre_lower.split()):
                 relevant_product = product
                 break
 
@@ -218,17 +217,14 @@ class AIService:
 
         return "💬 ¡Hola! ¿En qué producto tecnológico puedo ayudarte hoy? Disponemos de laptops, celulares y accesorios 🛒"
 
-    def clear_memory(self, chat_id: str = None):
+    async def clear_memory(self, chat_id: str = None):
         """
         Limpiar memoria de conversación
 
         Args:
             chat_id: ID específico del chat, si es None limpia toda la memoria
         """
-        if chat_id:
-            self.memory.pop(chat_id, None)
-        else:
-            self.memory.clear()
+        await self.state.call(self.state.clear_memory, chat_id)
 
     async def _check_ollama_availability(self) -> bool:
         """Verificar si Ollama está disponible"""
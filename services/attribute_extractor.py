@@ -0,0 +1,172 @@
+"""
+Extracción de atributos estructurados desde los nombres de producto
+Convierte "Laptop HP Core i5 16GB RAM 512GB SSD 15.6 pulgadas" en datos tipados
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.helpers import fold_accents
+
+# Marcas que venden las tiendas (token normalizado -> marca)
+BRANDS = {
+    "acer": "acer", "alienware": "dell", "anker": "anker", "aoc": "aoc", "apple": "apple",
+    "asus": "asus", "canon": "canon", "crucial": "crucial", "dell": "dell", "epson": "epson",
+    "genius": "genius", "gigabyte": "gigabyte", "hp": "hp", "huawei": "huawei", "hyperx": "hyperx",
+    "intel": "intel", "iphone": "apple", "ipad": "apple", "jbl": "jbl", "kingston": "kingston",
+    "lenovo": "lenovo", "lg": "lg", "logitech": "logitech", "macbook": "apple", "motorola": "motorola",
+    "msi": "msi", "nokia": "nokia", "oppo": "oppo", "razer": "razer", "realme": "realme",
+    "redragon": "redragon", "samsung": "samsung", "seagate": "seagate", "sony": "sony",
+    "toshiba": "toshiba", "wd": "wd", "xiaomi": "xiaomi", "redmi": "xiaomi", "zte": "zte",
+}
+
+# Capacidad: "16GB", "1 TB", "512 gb"
+_CAPACITY = re.compile(r"(?<![\w.])(\d+(?:[.,]\d+)?)\s*(gb|tb)\b")
+
+# Pantalla: '15.6 pulgadas', '27"', "24 pulg"
+_INCHES = re.compile(r"(?<![\w.])(\d{1,2}(?:[.,]\d)?)\s*(?:pulgadas|pulgada|pulg|plg|\"|''|”)")
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Palabras que marcan una capacidad como memoria RAM o como almacenamiento
+_RAM_WORDS = frozenset({"ram", "ddr4", "ddr5", "lpddr4", "lpddr5", "memoria"})
+_STORAGE_WORDS = frozenset({"ssd", "hdd", "nvme", "sata", "emmc", "rom", "almacenamiento", "disco", "interno"})
+_FILLER_WORDS = frozenset({"de", "en", "con"})
+
+# Sin etiqueta, una sola capacidad hasta este tamaño se toma como RAM
+MAX_UNLABELED_RAM_GB = 16
+
+def _capacity_gb(number: str, unit: str) -> int:
+    value = float(number.replace(",", "."))
+    return int(round(value * 1024 if unit == "tb" else value))
+
+def _label_word(words: List[str]) -> Optional[str]:
+    """Etiqueta ("ram", "storage" o None) de la primera palabra significativa"""
+    words = [word for word in words if word not in _FILLER_WORDS]
+    if words and words[0] in _RAM_WORDS:
+        return "ram"
+    if words and words[0] in _STORAGE_WORDS:
+        return "storage"
+    return None
+
+def _capacities(text: str) -> Tuple[Optional[int], Optional[int], List[int]]:
+    """
+    Capacidades de un texto ya en minúsculas y sin tildes
+
+    Un nombre pone las etiquetas antes de las cifras ("RAM 16GB SSD 512GB")
+    o después ("16GB RAM 512GB SSD"); el estilo lo decide la primera
+    capacidad y todas se etiquetan con la palabra de ese lado.
+
+    Returns:
+        Tuple[Optional[int], Optional[int], List[int]]: (RAM, almacenamiento,
+            capacidades sin etiqueta)
+    """
+    matches = list(_CAPACITY.finditer(text))
+    if not matches:
+        return None, None, []
+
+    def before(match):
+        return _label_word(list(reversed(_WORD.findall(text[max(0, match.start() - 16):match.start()]))))
+
+    def after(match):
+        return _label_word(_WORD.findall(text[match.end():match.end() + 24]))
+
+    prefixed = before(matches[0]) and (not after(matches[0]) or (before(matches[-1]) and not after(matches[-1])))
+    side = before if prefixed else after
+
+    ram: List[int] = []
+    storage: List[int] = []
+    unlabeled: List[int] = []
+    for match in matches:
+        gb = _capacity_gb(match.group(1), match.group(2))
+        label = side(match)
+        (ram if label == "ram" else storage if label == "storage" else unlabeled).append(gb)
+
+    # "16GB SSD 512GB": sin RAM marcada, un almacenamiento pequeño junto a otro mayor es la RAM
+    if not ram and storage and len(storage) + len(unlabeled) > 1:
+        smallest = min(storage)
+        if smallest <= 64 and smallest < max(storage + unlabeled):
+            ram.append(smallest)
+            storage.remove(smallest)
+
+    return (max(ram) if ram else None), (max(storage) if storage else None), unlabeled
+
+def extract_attributes(name: str) -> Dict[str, Any]:
+    """
+    Atributos tipados de un nombre de producto
+
+    Las capacidades sin etiqueta se reparten por tamaño: con dos, la
+    menor es RAM y la mayor almacenamiento ("8GB 256GB"); con una sola,
+    hasta MAX_UNLABELED_RAM_GB es RAM y más es almacenamiento.
+
+    Args:
+        name: Nombre del producto
+
+    Returns:
+        Dict[str, Any]: brand (str), ram_gb (int), storage_gb (int) e
+            inches (float), solo los encontrados
+    """
+    text = fold_accents((name or "").lower())
+    attributes: Dict[str, Any] = {}
+
+    for word in _WORD.findall(text):
+        if word in BRANDS:
+            attributes["brand"] = BRANDS[word]
+            break
+
+    ram, storage, unlabeled = _capacities(text)
+    unlabeled.sort()
+    if unlabeled and ram is None and (len(unlabeled) > 1 or unlabeled[0] <= MAX_UNLABELED_RAM_GB):
+        ram = unlabeled.pop(0)
+    if unlabeled and storage is None:
+        storage = unlabeled[-1]
+    if ram is not None:
+        attributes["ram_gb"] = ram
+    if storage is not None:
+        attributes["storage_gb"] = storage
+
+    match = _INCHES.search(text)
+    if match:
+        attributes["inches"] = float(match.group(1).replace(",", "."))
+
+    return attributes
+
+def extract_query_attributes(query: str, terms: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Atributos pedidos en una consulta ("samsung con 8gb")
+
+    A diferencia de los nombres, en una consulta una capacidad sin
+    etiqueta es ambigua: "8gb" puede ser RAM o almacenamiento, así que
+    se devuelve como memory_gb y el filtro acepta cualquiera de los dos.
+
+    Args:
+        query: Consulta del usuario
+        terms: Términos de la consulta ya corregidos (para marcas mal escritas)
+
+    Returns:
+        Dict[str, Any]: brand, ram_gb, storage_gb, memory_gb e inches, solo los pedidos
+    """
+    text = fold_accents((query or "").lower())
+    attributes: Dict[str, Any] = {}
+
+    for word in list(terms) + _WORD.findall(text):
+        if word in BRANDS:
+            attributes["brand"] = BRANDS[word]
+            break
+
+    ram, storage, unlabeled = _capacities(text)
+    if ram is not None:
+        attributes["ram_gb"] = ram
+    if storage is not None:
+        attributes["storage_gb"] = storage
+    if unlabeled:
+        attributes["memory_gb"] = unlabeled[0]
+
+    match = _INCHES.search(text)
+    if match:
+        attributes["inches"] = float(match.group(1).replace(",", "."))
+
+    return attributes
@@ -0,0 +1,122 @@
+"""
+Diferencias entre versiones del catálogo
+Cada actualización se compara con la versión vigente: sin cambios no se
+reemplaza nada, y con cambios la versión nueva conserva los Product sin
+cambios para que los índices reutilicen su tokenización
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.product import Product
+
+# Catálogo inmutable: tienda -> productos (tupla); cada versión es un diccionario nuevo
+Catalog = Dict[str, Tuple[Product, ...]]
+
+def product_key(product: Product) -> Tuple[str, str]:
+    """
+    Identidad estable de un producto entre actualizaciones
+
+    Args:
+        product: Producto del catálogo
+
+    Returns:
+        Tuple[str, str]: Tienda y nombre (el precio y la disponibilidad pueden cambiar)
+    """
+    return product.tienda, product.nombre
+
+def _keyed(products: Sequence[Product]) -> Dict[Tuple[str, ...], Product]:
+    """Productos por identidad; los nombres repetidos se numeran en orden de aparición"""
+    keyed: Dict[Tuple[str, ...], Product] = {}
+    for product in products:
+        key = product_key(product)
+        if key in keyed:
+            occurrence = 2
+            while key + (str(occurrence),) in keyed:
+                occurrence += 1
+            key = key + (str(occurrence),)
+        keyed[key] = product
+    return keyed
+
+def _same_offer(old: Product, new: Product) -> bool:
+    return (
+        old.precio == new.precio
+        and old.precio_cop == new.precio_cop
+        and old.disponibilidad == new.disponibilidad
+        and old.imagen == new.imagen
+    )
+
+@dataclass
+class CatalogDiff:
+    """Altas, bajas y cambios de una actualización, por tienda"""
+    added: List[Product] = field(default_factory=list)
+    removed: List[Product] = field(default_factory=list)
+    changed: List[Product] = field(default_factory=list)
+    unchanged: int = 0
+    # Versión nueva: productos sin cambios reutilizados de la anterior
+    catalog: Catalog = field(default_factory=dict)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Cantidades de la actualización
+
+        Returns:
+            Dict[str, int]: added, removed, changed y unchanged
+        """
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "changed": len(self.changed),
+            "unchanged": self.unchanged
+        }
+
+def diff_catalogs(current: Dict[str, Sequence[Product]], scraped: Dict[str, Sequence[Product]]) -> CatalogDiff:
+    """
+    Comparar el catálogo vigente con un scraping nuevo
+
+    La versión resultante conserva los objetos Product sin cambios de la
+    versión vigente (los índices reutilizan su trabajo por producto) y
+    sigue el orden del scraping nuevo. Una tienda que no devolvió
+    productos se considera caída y conserva los suyos.
+
+    Args:
+        current: Catálogo vigente
+        scraped: Productos recién obtenidos por tienda
+
+    Returns:
+        CatalogDiff: Diferencias y nueva versión inmutable del catálogo
+    """
+    diff = CatalogDiff()
+    for store in dict.fromkeys([*current, *scraped]):
+        old_products = current.get(store, ())
+        new_products = scraped.get(store, ())
+        if not new_products:
+            # Tienda caída: mantener lo que había antes que vaciarla
+            if old_products:
+                diff.catalog[store] = tuple(old_products)
+                diff.unchanged += len(old_products)
+            continue
+
+        old_keyed = _keyed(old_products)
+        version: List[Product] = []
+        for key, product in _keyed(new_products).items():
+            previous = old_keyed.pop(key, None)
+            if previous is None:
+                diff.added.append(product)
+                version.append(product)
+            elif _same_offer(previous, product):
+                diff.unchanged += 1
+                version.append(previous)
+            else:
+                diff.changed.append(product)
+                version.append(product)
+        diff.removed.extend(old_keyed.values())
+        diff.catalog[store] = tuple(version)
+    return diff
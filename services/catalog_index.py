@@ -0,0 +1,379 @@
+"""
+Índice invertido del catálogo de productos
+Se construye una vez por actualización del caché y responde consultas por tokens
+"""
+import heapq
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.product import Product
+from services.fuzzy_index import TrigramIndex
+from utils.bitmaps import bitmap_from_ids, bitmap_smallest
+from utils.helpers import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Palabras que no identifican productos (ni en nombres ni en consultas)
+STOPWORDS = frozenset({
+    "a", "al", "algo", "algun", "alguna", "alguno", "con", "cual", "cuanto", "cuesta", "de", "del",
+    "el", "en", "es", "esta", "este", "favor", "gracias", "hay", "hola", "buenas", "buenos",
+    "la", "las", "lo", "los", "me", "mi", "necesito", "o", "para", "por", "porfa", "precio",
+    "que", "quiero", "se", "si", "sin", "son", "su", "sus", "tiene", "tienen", "tienes", "un",
+    "una", "unas", "uno", "unos", "vale", "venden", "y", "busco", "the", "and", "for", "with"
+})
+
+# Un token usa bitmap si aparece en al menos 1/BITMAP_DENSITY de los
+# productos (y en BITMAP_MIN_DF): ahí el bitmap ocupa menos que la tupla
+BITMAP_DENSITY = 128
+BITMAP_MIN_DF = 256
+
+# Un solo término en común nombra un producto solo si aparece en a lo sumo
+# estos productos: "tienen laptops?" o "precio samsung" no nombran ninguno,
+# aunque la tienda tenga apenas dos Samsung; "k380" sí
+DISTINCTIVE_MAX_DF = 1
+
+# Multiplicadores de relevancia estática (no dependen de la consulta)
+AVAILABLE_BOOST = 1.2
+SOLD_OUT_BOOST = 0.6
+PRICE_BOOST = 1.1
+
+def product_boost(product: Product) -> float:
+    """
+    Relevancia estática de un producto: disponibilidad y precio publicado
+
+    Args:
+        product: Producto del catálogo
+
+    Returns:
+        float: Multiplicador (1.0 = neutro)
+    """
+    availability = normalize_text(product.disponibilidad or "")
+    if "agotado" in availability or "sin stock" in availability or availability.startswith("no "):
+        boost = SOLD_OUT_BOOST
+    elif "disponible" in availability or "stock" in availability or "unidades" in availability:
+        boost = AVAILABLE_BOOST
+    else:
+        boost = 1.0
+
+    if product.precio_cop:
+        boost *= PRICE_BOOST
+    return boost
+
+def _singular(token: str) -> str:
+    """Quitar el plural más común para que "laptops" y "laptop" coincidan"""
+    if len(token) <= 3 or not token.isalpha() or token.endswith(("us", "ss", "is")):
+        return token
+    if token.endswith("es") and len(token) > 5 and token[-3] in "lrdz":
+        return token[:-2]
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenizar un nombre de producto o una consulta
+
+    Minúsculas, sin tildes ni puntuación, sin stopwords y en singular.
+
+    Args:
+        text: Texto a tokenizar
+
+    Returns:
+        List[str]: Tokens en orden de aparición
+    """
+    return tokenize_normalized(normalize_text(text))
+
+def tokenize_normalized(normalized: str) -> List[str]:
+    """
+    Tokenizar un texto ya pasado por normalize_text (p. ej. Product.nombre_normalizado)
+
+    Args:
+        normalized: Texto normalizado
+
+    Returns:
+        List[str]: Tokens en orden de aparición
+    """
+    return [_singular(word) for word in normalized.split() if word not in STOPWORDS]
+
+class CatalogIndex:
+    """
+    Índice invertido token -> productos sobre el catálogo aplanado
+
+    Los productos se aplanan una sola vez y se identifican por su posición
+    (doc_id). Las posiciones siguen la relevancia estática (disponibles y
+    con precio primero, nombres cortos antes que largos), así que entre
+    productos igual de coincidentes los de menor doc_id son los mejores y
+    truncar candidatos por doc_id conserva los más relevantes.
+
+    Los tokens raros apuntan a una tupla ordenada de doc_ids; los
+    frecuentes, a un bitmap (un entero con un bit por producto) para
+    intersectarlos en C. Las consultas parten del token más raro e
+    intersectan con los siguientes, así el costo depende del token menos
+    frecuente y no del tamaño del catálogo.
+
+    Con el índice de la versión anterior del catálogo, los productos que
+    siguen siendo el mismo objeto (sin cambios, ver catalog_diff) reusan
+    sus tokens y su relevancia en vez de volver a calcularlos.
+    """
+
+    def __init__(self, products_by_store: Dict[str, List[Product]], previous: Optional["CatalogIndex"] = None):
+        started = time.perf_counter()
+
+        # Catálogo de origen (para saber si el índice sigue vigente)
+        self.source = products_by_store
+
+        flat = [product for store_products in products_by_store.values() for product in store_products]
+        flat_tokens: List[Tuple[str, ...]] = []
+        flat_boosts: List[float] = []
+        previous_ids = previous.doc_ids_by_object() if previous is not None else {}
+        # Una sola copia de cada token para todos los productos (y entre versiones)
+        vocabulary: Dict[str, str] = {token: token for token in previous.df} if previous is not None else {}
+        self.reused = 0
+        for product in flat:
+            old_id = previous_ids.get(id(product))
+            if old_id is not None:
+                flat_tokens.append(previous.doc_tokens[old_id])
+                flat_boosts.append(previous.boosts[old_id])
+                self.reused += 1
+            else:
+                tokens = dict.fromkeys(tokenize_normalized(product.nombre_normalizado))
+                flat_tokens.append(tuple(vocabulary.setdefault(token, token) for token in tokens))
+                flat_boosts.append(product_boost(product))
+        order = sorted(range(len(flat)), key=lambda i: (-flat_boosts[i], len(flat_tokens[i])))
+
+        self.products: List[Product] = [flat[i] for i in order]
+        self.doc_tokens: List[Tuple[str, ...]] = [flat_tokens[i] for i in order]
+        self.boosts: List[float] = [flat_boosts[i] for i in order]
+
+        postings: Dict[str, List[int]] = {}
+        for doc_id, tokens in enumerate(self.doc_tokens):
+            for token in tokens:
+                plist = postings.get(token)
+                if plist is None:
+                    postings[token] = [doc_id]
+                else:
+                    plist.append(doc_id)
+
+        size = len(self.products)
+        bitmap_min_df = max(BITMAP_MIN_DF, size // BITMAP_DENSITY)
+
+        self.df: Dict[str, int] = {token: len(plist) for token, plist in postings.items()}
+        self.postings: Dict[str, Tuple[int, ...]] = {}
+        self.bitmaps: Dict[str, int] = {}
+        for token, plist in postings.items():
+            if len(plist) >= bitmap_min_df:
+                self.bitmaps[token] = bitmap_from_ids(plist, size)
+            else:
+                self.postings[token] = tuple(plist)
+
+        # Vocabulario para corregir errores de tipeo en las consultas
+        self.fuzzy = TrigramIndex(self.df.items())
+
+        self.build_seconds = time.perf_counter() - started
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def doc_ids_by_object(self) -> Dict[int, int]:
+        """
+        doc_id de cada producto indexado, por identidad del objeto
+
+        Válido mientras el índice exista (mantiene vivos sus productos).
+
+        Returns:
+            Dict[int, int]: id(producto) -> doc_id
+        """
+        return {id(product): doc_id for doc_id, product in enumerate(self.products)}
+
+    def search(self, query: str, limit: int = 10, min_similarity: Optional[float] = None) -> List[Tuple[int, int]]:
+        """
+        Buscar productos por tokens en común con la consulta
+
+        Args:
+            query: Consulta del usuario
+            limit: Máximo de resultados
+            min_similarity: Similitud mínima para corregir tokens mal escritos
+                (None desactiva la corrección)
+
+        Returns:
+            List[Tuple[int, int]]: (doc_id, tokens en común), de más a menos coincidencias
+        """
+        return self.search_terms(self.query_terms(query, min_similarity), limit)
+
+    def query_terms(self, query: str, min_similarity: Optional[float] = None) -> List[str]:
+        """
+        Tokens de la consulta presentes en el catálogo, del más raro al más frecuente
+
+        Args:
+            query: Consulta del usuario
+            min_similarity: Similitud mínima para corregir tokens mal escritos
+                (None desactiva la corrección)
+
+        Returns:
+            List[str]: Tokens conocidos (o corregidos) sin repetir
+        """
+        terms, _ = self._resolve(tokenize(query), min_similarity)
+        return terms
+
+    def _resolve(self, tokens: List[str], min_similarity: Optional[float]) -> Tuple[List[str], bool]:
+        """
+        Mapear tokens al vocabulario, corrigiendo los desconocidos si se pide
+
+        Returns:
+            Tuple[List[str], bool]: (términos ordenados por frecuencia,
+                hay una referencia con números desconocida)
+        """
+        df = self.df
+        terms = set()
+        unknown_reference = False
+        for token in tokens:
+            if token in df:
+                terms.add(token)
+            elif not token.isalpha():
+                unknown_reference = True
+            elif min_similarity is not None:
+                correction = self.fuzzy.correct(token, min_similarity)
+                if correction is not None:
+                    terms.add(correction[0])
+        return sorted(terms, key=df.__getitem__), unknown_reference
+
+    def search_terms(self, terms: List[str], limit: int) -> List[Tuple[int, int]]:
+        """
+        Intersección progresiva del token más raro al más frecuente
+
+        Los términos deben venir de query_terms (conocidos y ordenados).
+        Cada token restringe los candidatos a los productos que también lo
+        contienen; si la restricción dejaría cero candidatos, el token se
+        omite (relajación). Los niveles anteriores, con un token menos en
+        común, completan el resultado si faltan productos.
+
+        Args:
+            terms: Términos conocidos, del más raro al más frecuente (query_terms)
+            limit: Máximo de resultados
+
+        Returns:
+            List[Tuple[int, int]]: (doc_id, tokens en común), de más a menos coincidencias
+        """
+        if not terms or limit <= 0:
+            return []
+        if terms[0] in self.bitmaps:
+            # Todos los tokens son frecuentes: intersección de bitmaps
+            return self._search_bitmaps(terms, limit)
+
+        doc_tokens = self.doc_tokens
+        candidates = set(self.postings[terms[0]])
+        matched = 1
+        levels: List[Tuple[set, int]] = []
+
+        for term in terms[1:]:
+            # Pocos candidatos (token raro): verificarlos uno a uno
+            narrowed = {doc_id for doc_id in candidates if term in doc_tokens[doc_id]}
+            if narrowed:
+                levels.append((candidates, matched))
+                candidates = narrowed
+                matched += 1
+
+        results = [(doc_id, matched) for doc_id in heapq.nsmallest(limit, candidates)]
+
+        # Completar con productos de niveles más laxos
+        seen = candidates
+        for level, level_matched in reversed(levels):
+            if len(results) >= limit:
+                break
+            extra = heapq.nsmallest(limit - len(results), level - seen)
+            results.extend((doc_id, level_matched) for doc_id in extra)
+            seen = level
+
+        return results
+
+    def _search_bitmaps(self, terms: List[str], limit: int) -> List[Tuple[int, int]]:
+        """Misma intersección progresiva que search_terms, sobre bitmaps"""
+        bitmaps = self.bitmaps
+        candidates = bitmaps[terms[0]]
+        matched = 1
+        levels: List[Tuple[int, int]] = []
+
+        for term in terms[1:]:
+            narrowed = candidates & bitmaps[term]
+            if narrowed:
+                levels.append((candidates, matched))
+                candidates = narrowed
+                matched += 1
+
+        results = [(doc_id, matched) for doc_id in bitmap_smallest(candidates, limit)]
+
+        seen = candidates
+        for level, level_matched in reversed(levels):
+            if len(results) >= limit:
+                break
+            extra = bitmap_smallest(level & ~seen, limit - len(results))
+            results.extend((doc_id, level_matched) for doc_id in extra)
+            seen = level
+
+        return results
+
+    def term_bitmap(self, term: str) -> int:
+        """
+        Bitmap de los productos que contienen un término
+
+        Args:
+            term: Término conocido (de query_terms)
+
+        Returns:
+            int: Bitmap (0 si el término no está en el catálogo)
+        """
+        bitmap = self.bitmaps.get(term)
+        if bitmap is not None:
+            return bitmap
+        return bitmap_from_ids(self.postings.get(term, ()), len(self.products))
+
+    def best_match(self, query: str, min_similarity: Optional[float] = None) -> Optional[Product]:
+        """
+        Producto que contiene todos los tokens de la consulta conocidos por el catálogo
+
+        Exige al menos dos tokens en común o, si solo hay uno, que sea
+        distintivo (presente en a lo sumo DISTINCTIVE_MAX_DF productos): una
+        sola palabra genérica como "laptops" o una marca no nombran un
+        producto, y elegir uno cualquiera enviaría su imagen. Tampoco
+        admite referencias con números desconocidas ("a15" no coincide con "A2").
+
+        Args:
+            query: Consulta del usuario
+            min_similarity: Similitud mínima para corregir tokens mal escritos
+                (None desactiva la corrección)
+
+        Returns:
+            Optional[Product]: Producto encontrado o None
+        """
+        terms, unknown_reference = self._resolve(tokenize(query), min_similarity)
+        if unknown_reference or not terms:
+            return None
+
+        doc_id, overlap = self.search_terms(terms, limit=1)[0]
+        if overlap < len(terms):
+            return None
+        if overlap == 1 and self.df[terms[0]] > DISTINCTIVE_MAX_DF:
+            return None
+        return self.products[doc_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas del índice
+
+        Returns:
+            Dict[str, Any]: Productos, vocabulario y tiempo de construcción
+        """
+        return {
+            "products": len(self.products),
+            "vocabulary": len(self.df),
+            "postings": sum(self.df.values()),
+            "bitmap_terms": len(self.bitmaps),
+            "fuzzy_terms": len(self.fuzzy),
+            "reused_products": self.reused,
+            "build_ms": round(self.build_seconds * 1000, 2)
+        }
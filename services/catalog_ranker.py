@@ -0,0 +1,89 @@
+"""
+Ranking BM25 de productos del catálogo
+Elige las alternativas más relevantes para la consulta del cliente
+"""
+import heapq
+import math
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.product import Product
+from services.catalog_index import CatalogIndex
+
+# Candidatos puntuados por consulta (los de más tokens en común y mejor relevancia estática)
+MAX_CANDIDATES = 64
+
+class CatalogRanker:
+    """
+    Ranking BM25 sobre los nombres de producto, precalculado por catálogo
+
+    Al construirse calcula el IDF de cada término y, por producto, el
+    factor de normalización por longitud de BM25 multiplicado por su
+    relevancia estática (disponibilidad y precio). Como en un nombre cada
+    término aparece una vez (tf = 1), la puntuación de un producto es ese
+    factor por la suma de IDF de los términos en común, y puntuar cuesta
+    una pasada por los candidatos. Los candidatos salen del índice
+    invertido (acotados a MAX_CANDIDATES) y el top-k se elige con un heap.
+    """
+
+    def __init__(self, index: CatalogIndex, k1: float = 1.2, b: float = 0.75):
+        self.index = index
+        self.k1 = k1
+        self.b = b
+
+        size = len(index)
+        self.idf = {
+            term: math.log(1 + (size - df + 0.5) / (df + 0.5))
+            for term, df in index.df.items()
+        }
+
+        lengths = [len(tokens) for tokens in index.doc_tokens]
+        avg_length = sum(lengths) / size if size else 1.0
+        self.doc_weights = array("d", (
+            (k1 + 1) / (1 + k1 * (1 - b + b * length / avg_length)) * boost
+            for length, boost in zip(lengths, index.boosts)
+        ))
+
+    def top_k(self, query: str, k: int, min_similarity: Optional[float] = None,
+              candidates: Optional[Iterable[int]] = None) -> List[Tuple[Product, float]]:
+        """
+        Productos más relevantes para una consulta
+
+        Args:
+            query: Consulta del usuario
+            k: Cantidad de productos
+            min_similarity: Similitud mínima para corregir tokens mal escritos
+                (None desactiva la corrección)
+            candidates: doc_ids ya filtrados (por ejemplo por rango de precio);
+                se puntúan todos, tengan o no términos en común
+
+        Returns:
+            List[Tuple[Product, float]]: (producto, puntuación) de mayor a menor
+        """
+        index = self.index
+        terms = index.query_terms(query, min_similarity)
+        if k <= 0 or (not terms and candidates is None):
+            return []
+        if candidates is None:
+            candidates = (doc_id for doc_id, _ in index.search_terms(terms, MAX_CANDIDATES))
+
+        idf = self.idf
+        weights = self.doc_weights
+        doc_tokens = index.doc_tokens
+        term_idf = [(term, idf[term]) for term in terms]
+
+        scored = []
+        for doc_id in candidates:
+            tokens = doc_tokens[doc_id]
+            score = weights[doc_id] * sum(value for term, value in term_idf if term in tokens)
+            # A igual puntuación gana el de menor doc_id (mejor relevancia estática)
+            scored.append((score, -doc_id))
+
+        return [
+            (index.products[-neg_doc_id], round(score, 4))
+            for score, neg_doc_id in heapq.nlargest(k, scored)
+        ]
@@ -0,0 +1,94 @@
+"""
+Enrutador de eventos de Evolution API
+Descarta en O(1) los eventos que no requieren respuesta antes de procesarlos
+"""
+import logging
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Eventos que contienen mensajes entrantes de clientes
+MESSAGE_EVENTS = frozenset({"messages.upsert", "mensajes.upsert"})
+
+# Máximo de tipos de evento distintos con contador propio
+MAX_TRACKED_EVENTS = 64
+
+_EMPTY: Dict[str, Any] = {}
+
+class EventRouter:
+    """Filtro barato de eventos del webhook con contadores por tipo"""
+
+    def __init__(self):
+        self._events: Dict[str, Dict[str, int]] = {}
+        self._dropped_by_reason: Dict[str, int] = {}
+
+    def route(self, data: Dict[str, Any]) -> Tuple[bool, str]:
+        """
+        Decidir si un webhook debe procesarse
+
+        Solo inspecciona el campo "event", key.fromMe y si el remoteJid es
+        un grupo o difusión; no construye ningún modelo.
+
+        Args:
+            data: Payload del webhook
+
+        Returns:
+            Tuple[bool, str]: (procesar, razón si se descarta)
+        """
+        body = data.get("body")
+        if type(body) is dict:
+            data = body
+
+        event = data.get("event") or data.get("evento")
+        event = event.lower().replace("_", ".") if type(event) is str else ""
+
+        inner = data.get("data")
+        if type(inner) is not dict:
+            inner = _EMPTY
+        key = inner.get("key")
+        if type(key) is not dict:
+            key = inner
+
+        if event and event not in MESSAGE_EVENTS:
+            reason = "evento_ignorado"
+        elif key.get("fromMe") is True:
+            reason = "mensaje_propio"
+        else:
+            remote_jid = key.get("remoteJid") or inner.get("remoteJid") or inner.get("Jid remoto") or ""
+            if type(remote_jid) is str and remote_jid.endswith("@g.us"):
+                reason = "grupo"
+            elif type(remote_jid) is str and remote_jid.endswith("@broadcast"):
+                reason = "difusion"
+            else:
+                reason = ""
+
+        self._count(event or "sin_evento", reason)
+        return not reason, reason
+
+    def _count(self, event: str, reason: str):
+        """Actualizar contadores por tipo de evento y por razón de descarte"""
+        counters = self._events.get(event)
+        if counters is None:
+            if len(self._events) >= MAX_TRACKED_EVENTS:
+                event = "otros"
+                counters = self._events.get(event)
+            if counters is None:
+                counters = self._events[event] = {"accepted": 0, "dropped": 0}
+
+        if reason:
+            counters["dropped"] += 1
+            self._dropped_by_reason[reason] = self._dropped_by_reason.get(reason, 0) + 1
+        else:
+            counters["accepted"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener contadores del enrutador
+
+        Returns:
+            Dict[str, Any]: Contadores por tipo de evento y por razón de descarte
+        """
+        return {
+            "by_event": {event: dict(counters) for event, counters in self._events.items()},
+            "dropped_by_reason": dict(self._dropped_by_reason)
+        }
@@ -0,0 +1,170 @@
+"""
+Catálogo columnar de atributos con facetas en bitmaps
+Filtra "samsung con 8gb" como intersección de bitmaps en vez de dejarlo al LLM
+"""
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.attribute_extractor import extract_attributes
+from services.catalog_index import CatalogIndex
+from utils.bitmaps import bitmap_count, bitmap_from_ids
+from utils.helpers import normalize_text
+
+# Columnas numéricas: atributo -> (typecode del arreglo, escala al guardar)
+# 0 significa "desconocido"; las pulgadas se guardan en décimas (15.6 -> 156)
+NUMERIC_COLUMNS = {
+    "ram_gb": ("H", 1),
+    "storage_gb": ("I", 1),
+    "inches": ("H", 10),
+}
+
+class FacetIndex:
+    """
+    Atributos de cada producto guardados por columna, con un bitmap por valor
+
+    Cada atributo es un arreglo con una posición por doc_id (la marca se
+    codifica como índice en la lista brands, 0 = sin marca), así los
+    atributos de 100k productos ocupan unos cientos de KB en vez de un
+    diccionario por producto. Por cada valor distinto hay un bitmap de
+    los productos que lo tienen, y un filtro de varias facetas es un AND
+    de enteros. Con el índice de la versión anterior, los productos sin
+    cambios copian sus atributos de las columnas viejas en vez de volver
+    a extraerlos del nombre.
+    """
+
+    def __init__(self, index: CatalogIndex, previous: Optional["FacetIndex"] = None):
+        started = time.perf_counter()
+        self.index = index
+        size = len(index)
+
+        self.brands: List[str] = [""]
+        brand_codes: Dict[str, int] = {}
+        self.columns: Dict[str, array] = {
+            name: array(typecode, bytes(array(typecode).itemsize * size))
+            for name, (typecode, _) in NUMERIC_COLUMNS.items()
+        }
+        self.columns["brand"] = array("H", bytes(2 * size))
+
+        previous_ids = previous.index.doc_ids_by_object() if previous is not None else {}
+        ids: Dict[Tuple[str, Any], List[int]] = {}
+        store_ids: Dict[str, List[int]] = {}
+        for doc_id, product in enumerate(index.products):
+            store_ids.setdefault(product.tienda, []).append(doc_id)
+            old_id = previous_ids.get(id(product))
+            if old_id is not None:
+                attributes = previous.attributes(old_id)
+            else:
+                attributes = extract_attributes(product.nombre)
+            for name, value in attributes.items():
+                if name == "brand":
+                    code = brand_codes.get(value)
+                    if code is None:
+                        code = brand_codes[value] = len(self.brands)
+                        self.brands.append(value)
+                    self.columns["brand"][doc_id] = code
+                    ids.setdefault(("brand", code), []).append(doc_id)
+                else:
+                    stored = int(round(value * NUMERIC_COLUMNS[name][1]))
+                    self.columns[name][doc_id] = stored
+                    ids.setdefault((name, stored), []).append(doc_id)
+
+        self._brand_codes = brand_codes
+        self.facets: Dict[Tuple[str, int], int] = {
+            key: bitmap_from_ids(doc_ids, size) for key, doc_ids in ids.items()
+        }
+        # Tienda normalizada ("megapack") -> bitmap de sus productos
+        self.stores: Dict[str, int] = {
+            normalize_text(store): bitmap_from_ids(doc_ids, size) for store, doc_ids in store_ids.items()
+        }
+        self.build_seconds = time.perf_counter() - started
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def attributes(self, doc_id: int) -> Dict[str, Any]:
+        """
+        Atributos de un producto leídos de las columnas
+
+        Args:
+            doc_id: Posición del producto en el índice
+
+        Returns:
+            Dict[str, Any]: Atributos conocidos del producto
+        """
+        result: Dict[str, Any] = {}
+        brand = self.columns["brand"][doc_id]
+        if brand:
+            result["brand"] = self.brands[brand]
+        for name, (_, scale) in NUMERIC_COLUMNS.items():
+            stored = self.columns[name][doc_id]
+            if stored:
+                result[name] = stored / scale if scale != 1 else stored
+        return result
+
+    def _bitmap(self, name: str, value: Any) -> int:
+        if name == "brand":
+            code = self._brand_codes.get(value)
+            return self.facets.get(("brand", code), 0) if code else 0
+        return self.facets.get((name, int(round(value * NUMERIC_COLUMNS[name][1]))), 0)
+
+    def filter(self, attributes: Dict[str, Any]) -> Optional[int]:
+        """
+        Bitmap de los productos que cumplen todos los atributos pedidos
+
+        memory_gb (capacidad sin etiqueta en la consulta) acepta RAM o
+        almacenamiento de ese tamaño.
+
+        Args:
+            attributes: Atributos de extract_query_attributes
+
+        Returns:
+            Optional[int]: Bitmap (0 si ningún producto cumple) o None si no hay atributos
+        """
+        result: Optional[int] = None
+        for name, value in attributes.items():
+            if name == "memory_gb":
+                bitmap = self._bitmap("ram_gb", value) | self._bitmap("storage_gb", value)
+            elif name == "brand" or name in NUMERIC_COLUMNS:
+                bitmap = self._bitmap(name, value)
+            else:
+                continue
+            result = bitmap if result is None else result & bitmap
+            if not result:
+                return 0
+        return result
+
+    def store(self, name: str) -> int:
+        """
+        Bitmap de los productos de una tienda
+
+        Args:
+            name: Nombre de la tienda (sin distinguir mayúsculas ni tildes)
+
+        Returns:
+            int: Bitmap (0 si la tienda no existe)
+        """
+        return self.stores.get(normalize_text(name), 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas del índice de facetas
+
+        Returns:
+            Dict[str, Any]: Productos con cada atributo, facetas y tiempo de construcción
+        """
+        stats: Dict[str, Any] = {
+            "facets": len(self.facets),
+            "brands": len(self.brands) - 1,
+            "stores": len(self.stores),
+            "build_ms": round(self.build_seconds * 1000, 1),
+        }
+        for name in ("brand", *NUMERIC_COLUMNS):
+            stats[f"with_{name}"] = sum(
+                bitmap_count(bitmap) for (facet, _), bitmap in self.facets.items() if facet == name
+            )
+        return stats
@@ -0,0 +1,112 @@
+"""
+Índice de n-gramas de caracteres para tolerar errores de tipeo
+Corrige tokens de la consulta contra el vocabulario del catálogo
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Relleno de inicio y fin: da peso a la primera y la última letra
+_PAD = "$$"
+
+# Tokens más cortos no se corrigen ("hp", "5g"...): demasiadas coincidencias
+MIN_TOKEN_LENGTH = 3
+
+# Correcciones recordadas por índice (los mismos errores se repiten)
+_MAX_CACHED_CORRECTIONS = 10000
+
+def trigrams(token: str) -> Tuple[str, ...]:
+    """
+    Trigramas de caracteres de un token, con relleno en los extremos
+
+    Args:
+        token: Token normalizado
+
+    Returns:
+        Tuple[str, ...]: Trigramas distintos en orden de aparición
+    """
+    padded = f"{_PAD}{token}{_PAD}"
+    return tuple(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+class TrigramIndex:
+    """
+    Índice trigrama -> términos sobre el vocabulario del catálogo
+
+    Se indexan los términos (palabras distintas de los nombres), no los
+    productos, así que el costo de una corrección depende del tamaño del
+    vocabulario y no del catálogo. Los candidatos son los términos que
+    comparten algún trigrama con el token; se puntúan con el coeficiente
+    de Dice sobre trigramas y, a igual puntaje, gana el más frecuente.
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, int]]):
+        """
+        Args:
+            terms: Pares (término, frecuencia en el catálogo)
+        """
+        self.terms: List[str] = []
+        self.frequencies: List[int] = []
+        self.gram_counts: List[int] = []
+        self.grams: Dict[str, List[int]] = {}
+
+        for term, frequency in terms:
+            if len(term) < MIN_TOKEN_LENGTH or not term.isalpha():
+                continue
+            term_id = len(self.terms)
+            self.terms.append(term)
+            self.frequencies.append(frequency)
+            term_grams = trigrams(term)
+            self.gram_counts.append(len(term_grams))
+            for gram in term_grams:
+                self.grams.setdefault(gram, []).append(term_id)
+
+        self._corrections: Dict[Tuple[str, float], Optional[Tuple[str, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def correct(self, token: str, min_similarity: float) -> Optional[Tuple[str, float]]:
+        """
+        Término del vocabulario más parecido a un token desconocido
+
+        Args:
+            token: Token normalizado que no está en el vocabulario
+            min_similarity: Similitud mínima (Dice entre 0 y 1)
+
+        Returns:
+            Optional[Tuple[str, float]]: (término, similitud) o None
+        """
+        if len(token) < MIN_TOKEN_LENGTH or not token.isalpha() or min_similarity > 1:
+            return None
+
+        key = (token, min_similarity)
+        if key in self._corrections:
+            return self._corrections[key]
+
+        result = self._best_candidate(token, min_similarity)
+        if len(self._corrections) >= _MAX_CACHED_CORRECTIONS:
+            self._corrections.clear()
+        self._corrections[key] = result
+        return result
+
+    def _best_candidate(self, token: str, min_similarity: float) -> Optional[Tuple[str, float]]:
+        token_grams = trigrams(token)
+        size = len(token_grams)
+
+        shared: Dict[int, int] = {}
+        for gram in token_grams:
+            for term_id in self.grams.get(gram, ()):
+                shared[term_id] = shared.get(term_id, 0) + 1
+
+        best: Optional[Tuple[float, int, int]] = None
+        gram_counts = self.gram_counts
+        frequencies = self.frequencies
+        for term_id, common in shared.items():
+            similarity = 2.0 * common / (size + gram_counts[term_id])
+            if similarity < min_similarity:
+                continue
+            candidate = (similarity, frequencies[term_id], -term_id)
+            if best is None or candidate > best:
+                best = candidate
+
+        if best is None:
+            return None
+        return self.terms[-best[2]], round(best[0], 3)
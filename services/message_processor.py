@@ -2,18 +2,63 @@
 Servicio para procesar y validar mensajes
 """
 import logging
-from typing import Dict, Any, Optional, Tuple
+import re
+import zlib
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
+from config.settings import settings
 from models.message import WhatsAppMessage
 from models.product import Product
+from services.catalog_index import CatalogIndex, tokenize
+from services.attribute_extractor import extract_attributes, extract_query_attributes
+from services.catalog_ranker import CatalogRanker
+from services.facet_index import FacetIndex
+from services.price_index import PriceIndex
+from services.semantic_index import SemanticIndex, build_semantic_index
+from utils.bitmaps import bitmap_count, bitmap_from_ids, bitmap_smallest
+from utils.helpers import fold_accents, parse_price
+from utils.state_backend import InMemoryStateBackend, StateBackend
 
 logger = logging.getLogger(__name__)
 
+# Monto en una consulta: "2 millones", "1.5 palos", "800 mil", "$1.500.000"
+_AMOUNT = r"\$?\s*(\d+(?:[.,]\d+)*)\s*(millones|millon|palos|palo|mill|m|mil|lucas|luca|k)?\b"
+
+# Multiplicador de cada unidad (coloquiales incluidos)
+_AMOUNT_UNITS = {
+    "millones": 1_000_000, "millon": 1_000_000, "palos": 1_000_000, "palo": 1_000_000,
+    "mill": 1_000_000, "m": 1_000_000, "mil": 1_000, "lucas": 1_000, "luca": 1_000, "k": 1_000
+}
+
+# Intenciones de rango de precio (sobre el texto en minúsculas y sin tildes)
+_PRICE_BETWEEN = re.compile(rf"\b(?:entre|de)\s+{_AMOUNT}\s+(?:y|a|hasta)\s+{_AMOUNT}")
+_PRICE_MAX = re.compile(
+    rf"\b(?:menos de|menor a|menor de|hasta|maximo|max|no mas de|por debajo de|inferior a|que no pase de)\s+{_AMOUNT}"
+)
+_PRICE_MIN = re.compile(rf"\b(?:mas de|mayor a|mayor de|desde|minimo|por encima de|superior a|arriba de)\s+{_AMOUNT}")
+
+# Un monto sin unidad menor que esto no es un precio ("más de 16 gb")
+_MIN_PRICE_AMOUNT = 1000
+
+# Productos filtrados por precio o atributos que se rankean (los de mejor relevancia estática)
+MAX_FILTERED_CANDIDATES = 512
+
+# Resultados alcanzables con offset + limit en search_catalog
+MAX_SEARCH_RESULTS = 500
+
 class MessageProcessor:
     """Servicio para procesar mensajes de WhatsApp"""
 
-    def __init__(self):
-        self.processed_messages = set()
+    def __init__(self, state: Optional[StateBackend] = None):
+        # Mensajes procesados (en el backend de estado compartido entre workers)
+        self.state = state or InMemoryStateBackend(settings.DEDUP_TTL_SECONDS, settings.DEDUP_MAX_ENTRIES)
+
+        # Índice del catálogo (se reconstruye en cada actualización del caché)
+        self.catalog_index: Optional[CatalogIndex] = None
+        self.catalog_ranker: Optional[CatalogRanker] = None
+        self.semantic_index: Optional[SemanticIndex] = None
+        self.price_index: Optional[PriceIndex] = None
+        self.facet_index: Optional[FacetIndex] = None
 
     def normalize_message_data(self, webhook_data: Dict[str, Any]) -> WhatsAppMessage:
         """
@@ -71,36 +116,185 @@ class MessageProcessor:
 
         return True, ""
 
-    def process_products(self, products: Dict[str, Product], query: str) -> Dict[str, Any]:
+    def build_catalog_index(self, products: Dict[str, List[Product]]) -> CatalogIndex:
+        """
+        Construir el índice del catálogo (una vez por actualización del caché)
+
+        Args:
+            products: Diccionario con productos por tienda
+
+        Returns:
+            CatalogIndex: Índice construido
+        """
+        self.install_indexes(self.prepare_indexes(products))
+        return self.catalog_index
+
+    def prepare_indexes(self, products: Dict[str, Sequence[Product]],
+                        previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Construir todos los índices de una versión del catálogo sin instalarlos
+
+        No modifica el estado del procesador, así que puede correr en otro
+        hilo mientras se siguen atendiendo consultas con la versión vigente.
+
+        Args:
+            products: Productos por tienda de la nueva versión
+            previous: Índices de la versión anterior (export_indexes) para
+                reutilizar la tokenización y los atributos de los productos
+                sin cambios (el resto de cada índice se reconstruye)
+
+        Returns:
+            Dict[str, Any]: Índices listos para install_indexes
+        """
+        previous = previous or {}
+        catalog_index = CatalogIndex(products, previous.get("catalog_index"))
+        stats = catalog_index.get_stats()
+        logger.info(
+            f"Índice de catálogo construido: {stats['products']} productos "
+            f"({stats['reused_products']} reutilizados), {stats['vocabulary']} términos en {stats['build_ms']} ms"
+        )
+        return {
+            "catalog_index": catalog_index,
+            "catalog_ranker": CatalogRanker(catalog_index),
+            "price_index": PriceIndex(catalog_index),
+            "facet_index": FacetIndex(catalog_index, previous.get("facet_index")),
+            "semantic_index": self._build_semantic_index(catalog_index)
+        }
+
+    def install_indexes(self, indexes: Dict[str, Any]):
+        """
+        Poner en uso los índices de una versión del catálogo (sin esperas en medio)
+
+        Args:
+            indexes: Índices de prepare_indexes
+        """
+        self.catalog_index = indexes["catalog_index"]
+        self.catalog_ranker = indexes["catalog_ranker"]
+        self.price_index = indexes["price_index"]
+        self.facet_index = indexes["facet_index"]
+        self.semantic_index = indexes["semantic_index"]
+
+    def export_indexes(self) -> Dict[str, Any]:
+        """
+        Índices del catálogo vigente, para guardarlos en un snapshot o reutilizarlos
+
+        El índice semántico no se incluye: su matriz ya se persiste aparte
+        (SEMANTIC_INDEX_PATH) y se vuelve a mapear al restaurar.
+
+        Returns:
+            Dict[str, Any]: Índices por nombre (vacío si no hay catálogo indexado)
+        """
+        if self.catalog_index is None:
+            return {}
+        return {
+            "catalog_index": self.catalog_index,
+            "catalog_ranker": self.catalog_ranker,
+            "price_index": self.price_index,
+            "facet_index": self.facet_index
+        }
+
+    def restore_indexes(self, indexes: Dict[str, Any]) -> CatalogIndex:
+        """
+        Adoptar índices cargados de un snapshot sin reconstruirlos
+
+        Args:
+            indexes: Índices de export_indexes
+
+        Returns:
+            CatalogIndex: Índice restaurado
+        """
+        indexes = dict(indexes, semantic_index=self._build_semantic_index(indexes["catalog_index"]))
+        self.install_indexes(indexes)
+        return self.catalog_index
+
+    def _build_semantic_index(self, index: CatalogIndex) -> Optional[SemanticIndex]:
+        """Construir (o mapear desde disco) el índice semántico de una versión del catálogo"""
+        if not settings.SEMANTIC_SEARCH_ENABLED:
+            return None
+        try:
+            semantic_index = build_semantic_index(
+                index.doc_tokens, index.df, (product.nombre for product in index.products),
+                settings.SEMANTIC_DIMENSIONS, settings.SEMANTIC_INDEX_PATH
+            )
+            if semantic_index is None:
+                logger.info("NumPy no instalado: búsqueda semántica desactivada")
+            return semantic_index
+        except Exception as e:
+            logger.error(f"Error construyendo índice semántico: {str(e)}")
+            return None
+
+    def _semantic_alternatives(self, query: str, exclude: List[Product], limit: int) -> List[Product]:
+        """
+        Alternativas por similitud semántica para completar las de BM25
+
+        Args:
+            query: Consulta del usuario
+            exclude: Productos ya elegidos
+            limit: Máximo de productos a devolver
+
+        Returns:
+            List[Product]: Productos más parecidos a la consulta
+        """
+        if self.semantic_index is None or limit <= 0:
+            return []
+
+        products = self.catalog_index.products
+        chosen = {id(product) for product in exclude}
+        hits = self.semantic_index.search(query, limit + len(exclude), settings.SEMANTIC_MIN_SCORE)
+        return [products[doc_id] for doc_id, _ in hits if id(products[doc_id]) not in chosen][:limit]
+
+    def process_products(
+        self,
+        products: Dict[str, List[Product]],
+        query: str,
+        min_similarity: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Procesar productos y encontrar coincidencias
 
         Args:
             products: Diccionario con productos por tienda
             query: Consulta del usuario
+            min_similarity: Similitud mínima para corregir errores de tipeo
+                (por defecto FUZZY_MIN_SIMILARITY; mayor que 1 la desactiva)
 
         Returns:
             Dict[str, Any]: Resultado del procesamiento
         """
         try:
-            all_products = []
-            for store_products in products.values():
-                all_products.extend(store_products)
-
-            # Buscar producto que coincida
-            matched_product = None
-            for product in all_products:
-                if product.matches_query(query):
-                    matched_product = product
-                    break
-
-            # Si no hay coincidencia exacta, tomar el primero como alternativa
-            alternatives = all_products[:3] if all_products else []
+            index = self.catalog_index
+            if index is None or index.source is not products:
+                index = self.build_catalog_index(products)
+
+            if min_similarity is None:
+                min_similarity = settings.FUZZY_MIN_SIMILARITY
+
+            # "laptops de menos de 2 millones", "samsung con 8gb": filtrar por precio
+            # y atributos antes de rankear
+            price_range = self.extract_price_range(query)
+            rest = price_range[2] if price_range is not None else query
+            attributes = extract_query_attributes(rest, index.query_terms(rest, min_similarity))
+            if set(attributes) == {"brand"}:
+                # La marca sola ya la resuelve el ranking por términos
+                attributes = {}
+            if price_range is not None or attributes:
+                return self._process_filtered(index, rest, price_range, attributes, min_similarity)
+
+            # Buscar producto que coincida (tolerando errores de tipeo)
+            matched_product = index.best_match(query, min_similarity)
+
+            # Alternativas ordenadas por relevancia (BM25), completadas por similitud
+            # semántica ("algo para jugar"); sin nada de eso, los productos de mejor
+            # relevancia estática (disponibles y con precio)
+            ranked = self.catalog_ranker.top_k(query, 3, min_similarity)
+            alternatives = [product for product, _ in ranked]
+            alternatives += self._semantic_alternatives(query, alternatives, 3 - len(alternatives))
+            alternatives = alternatives or index.products[:3]
 
             return {
                 "productoEncontrado": matched_product,
                 "alternativas": alternatives,
-                "totalProductos": len(all_products)
+                "totalProductos": len(index)
             }
 
         except Exception as e:
@@ -111,6 +305,245 @@ class MessageProcessor:
                 "totalProductos": 0
             }
 
+    def _process_filtered(
+        self,
+        index: CatalogIndex,
+        query: str,
+        price_range: Optional[Tuple[Optional[int], Optional[int], str]],
+        attributes: Dict[str, Any],
+        min_similarity: float
+    ) -> Dict[str, Any]:
+        """
+        Procesar una consulta con rango de precio y/o atributos
+
+        Los candidatos salen del índice de precios, cruzado con los
+        productos que contienen algún término de la consulta (en cualquier
+        posición del nombre), y de la intersección de facetas; solo ellos
+        se rankean.
+
+        Args:
+            index: Índice del catálogo vigente
+            query: Consulta sin la expresión de precio
+            price_range: (mínimo, máximo, consulta sin el rango) de extract_price_range
+            attributes: Atributos pedidos (extract_query_attributes)
+            min_similarity: Similitud mínima para corregir errores de tipeo
+
+        Returns:
+            Dict[str, Any]: Resultado del procesamiento
+        """
+        min_price, max_price = price_range[:2] if price_range is not None else (None, None)
+        result: Dict[str, Any] = {"totalProductos": len(index)}
+
+        bitmap: Optional[int] = None
+        if price_range is not None:
+            bitmap = bitmap_from_ids(self.price_index.lookup(min_price, max_price), len(index))
+            terms = index.query_terms(query, min_similarity)
+            if terms:
+                # "laptops": también "HP Victus Laptop", no solo los que empiezan por la palabra
+                named = 0
+                for term in terms:
+                    named |= index.term_bitmap(term)
+                bitmap &= named
+            result["rangoPrecio"] = {"min": min_price, "max": max_price, "candidatos": bitmap_count(bitmap)}
+
+        if attributes:
+            facets = self.facet_index.filter(attributes)
+            bitmap = facets if bitmap is None else bitmap & facets
+            result["atributos"] = dict(attributes, candidatos=bitmap_count(bitmap))
+
+        candidates = bitmap_smallest(bitmap, MAX_FILTERED_CANDIDATES) if bitmap is not None else None
+
+        # El producto nombrado solo cuenta si cumple los filtros
+        matched_product = index.best_match(query, min_similarity)
+        if matched_product is not None:
+            if price_range is not None and not self._in_price_range(matched_product, min_price, max_price):
+                matched_product = None
+            elif not self._has_attributes(matched_product, attributes):
+                matched_product = None
+
+        ranked = self.catalog_ranker.top_k(query, 3, min_similarity, candidates=candidates)
+        result["productoEncontrado"] = matched_product
+        result["alternativas"] = [product for product, _ in ranked]
+
+        logger.info(f"Consulta filtrada por precio {min_price}-{max_price} y atributos {attributes}")
+        return result
+
+    def search_catalog(
+        self,
+        query: str,
+        store: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        limit: int = 20,
+        offset: int = 0,
+        min_similarity: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Buscar en el catálogo con filtros y paginación (GET /products/search)
+
+        Sigue los pasos de process_products: rango de precio y atributos
+        reconocidos en la consulta (los límites explícitos mandan sobre los
+        del texto), candidatos del índice de precios de todo el catálogo,
+        las facetas y la tienda, y ranking BM25 de los de mejor relevancia estática. Cada
+        término de la consulta restringe los candidatos si deja alguno,
+        como en search_terms; sin términos, los resultados siguen la
+        relevancia estática.
+
+        Args:
+            query: Consulta (puede traer rango de precio y atributos)
+            store: Tienda (None = todas)
+            min_price: Precio mínimo en COP
+            max_price: Precio máximo en COP
+            limit: Máximo de resultados
+            offset: Resultados a saltar
+            min_similarity: Similitud mínima para corregir errores de tipeo
+
+        Returns:
+            Dict[str, Any]: total (coincidencias), results [(producto, puntuación)]
+                y filters (los filtros aplicados)
+        """
+        result: Dict[str, Any] = {"total": 0, "results": [], "filters": {}}
+        index = self.catalog_index
+        if index is None or not len(index):
+            return result
+        if min_similarity is None:
+            min_similarity = settings.FUZZY_MIN_SIMILARITY
+
+        text = query or ""
+        price_range = self.extract_price_range(text)
+        if price_range is not None:
+            text = price_range[2]
+            min_price = price_range[0] if min_price is None else min_price
+            max_price = price_range[1] if max_price is None else max_price
+        terms = index.query_terms(text, min_similarity)
+        if tokenize(text) and not terms:
+            # Ninguna palabra de la consulta existe en el catálogo
+            return result
+        attributes = extract_query_attributes(text, terms)
+        if set(attributes) == {"brand"}:
+            attributes = {}
+
+        filters = result["filters"]
+        bitmap: Optional[int] = None
+        if min_price is not None or max_price is not None:
+            bitmap = bitmap_from_ids(self.price_index.lookup(min_price, max_price), len(index))
+            filters["precio"] = {"min": min_price, "max": max_price}
+        if attributes:
+            facets = self.facet_index.filter(attributes)
+            bitmap = facets if bitmap is None else bitmap & facets
+            filters["atributos"] = attributes
+        if store:
+            stores = self.facet_index.store(store)
+            bitmap = stores if bitmap is None else bitmap & stores
+            filters["tienda"] = store
+
+        matched_terms = 0
+        for term in terms:
+            term_bitmap = index.term_bitmap(term)
+            narrowed = term_bitmap if bitmap is None else bitmap & term_bitmap
+            if narrowed:
+                bitmap = narrowed
+                matched_terms += 1
+        if terms and not matched_terms:
+            return result
+
+        window = min(offset + limit, MAX_SEARCH_RESULTS)
+        if bitmap is None:
+            # Sin consulta ni filtros: el catálogo en orden de relevancia estática
+            result["total"] = len(index)
+            ranked = [(index.products[doc_id], 0.0) for doc_id in range(min(window, len(index)))]
+        else:
+            result["total"] = bitmap_count(bitmap)
+            if terms:
+                candidates = bitmap_smallest(bitmap, max(window, MAX_FILTERED_CANDIDATES))
+                ranked = self.catalog_ranker.top_k(text, window, min_similarity, candidates=candidates)
+            else:
+                ranked = [(index.products[doc_id], 0.0) for doc_id in bitmap_smallest(bitmap, window)]
+
+        result["results"] = ranked[offset:window]
+        return result
+
+    def _in_price_range(self, product: Product, min_price: Optional[int], max_price: Optional[int]) -> bool:
+        """Verificar si el precio de un producto está dentro del rango"""
+        price = product.precio_cop
+        if not price:
+            return False
+        return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+
+    def _has_attributes(self, product: Product, attributes: Dict[str, Any]) -> bool:
+        """Verificar si un producto tiene los atributos pedidos"""
+        if not attributes:
+            return True
+        found = extract_attributes(product.nombre)
+        for name, value in attributes.items():
+            if name == "memory_gb":
+                if value not in (found.get("ram_gb"), found.get("storage_gb")):
+                    return False
+            elif found.get(name) != value:
+                return False
+        return True
+
+    def extract_price_range(self, message: str) -> Optional[Tuple[Optional[int], Optional[int], str]]:
+        """
+        Reconocer una intención de rango de precio en el mensaje
+
+        Entiende "menos de 2 millones", "hasta 800 mil", "más de 1.500.000",
+        "entre 1 y 2 palos", "de 500 a 900 mil"... Un monto sin unidad
+        toma la del otro extremo del rango.
+
+        Args:
+            message: Mensaje del usuario
+
+        Returns:
+            Optional[Tuple[Optional[int], Optional[int], str]]: (mínimo,
+                máximo, mensaje sin la expresión de precio) o None
+        """
+        if not message:
+            return None
+
+        text = fold_accents(message.lower())
+
+        match = _PRICE_BETWEEN.search(text)
+        if match:
+            low_unit = match.group(2) or match.group(4)
+            low = self._parse_amount(match.group(1), low_unit)
+            high = self._parse_amount(match.group(3), match.group(4) or match.group(2))
+            if low is not None and high is not None:
+                low, high = min(low, high), max(low, high)
+                return low, high, self._without(text, match)
+
+        match = _PRICE_MAX.search(text)
+        if match:
+            amount = self._parse_amount(match.group(1), match.group(2))
+            if amount is not None:
+                return None, amount, self._without(text, match)
+
+        match = _PRICE_MIN.search(text)
+        if match:
+            amount = self._parse_amount(match.group(1), match.group(2))
+            if amount is not None:
+                return amount, None, self._without(text, match)
+
+        return None
+
+    def _parse_amount(self, number: str, unit: Optional[str]) -> Optional[int]:
+        """Convertir un monto de la consulta a COP ("1.5" + "millones" -> 1500000)"""
+        if not unit:
+            amount = parse_price(number)
+            return amount if amount and amount >= _MIN_PRICE_AMOUNT else None
+
+        # Con unidad, un único separador seguido de 1-2 dígitos es decimal ("1.5 millones")
+        if re.fullmatch(r"\d+[.,]\d{1,2}", number):
+            value = float(number.replace(",", "."))
+        else:
+            value = parse_price(number) or 0
+        amount = int(round(value * _AMOUNT_UNITS[unit]))
+        return amount or None
+
+    def _without(self, text: str, match: "re.Match") -> str:
+        """Texto sin el fragmento reconocido"""
+        return f"{text[:match.start()]} {text[match.end():]}".strip()
+
     def extract_keywords(self, message: str) -> list:
         """
         Extraer palabras clave del mensaje
@@ -152,9 +585,11 @@ class MessageProcessor:
 
         return list(set(keywords))  # Remover duplicados
 
-    def is_duplicate_message(self, message: WhatsAppMessage) -> bool:
+    async def is_duplicate_message(self, message: WhatsAppMessage) -> bool:
         """
-        Verificar si el mensaje es duplicado
+        Verificar si el mensaje es duplicado (y registrarlo si no lo es)
+
+        Debe llamarse una sola vez por mensaje entrante.
 
         Args:
             message: Mensaje a verificar
@@ -162,19 +597,10 @@ class MessageProcessor:
         Returns:
             bool: True si es mensaje duplicado
         """
-        message_key = f"{message.chat_id}:{message.message_id}:{hash(message.content)}"
-
-        if message_key in self.processed_messages:
-            return True
-
-        self.processed_messages.add(message_key)
-
-        # Limpiar mensajes antiguos (mantener solo 1000)
-        if len(self.processed_messages) > 1000:
-            # Remover 200 mensajes antiguos
-            self.processed_messages = set(list(self.processed_messages)[200:])
-
-        return False
+        # crc32 y no hash(): la clave debe coincidir entre workers (hash() varía por proceso)
+        content_hash = zlib.crc32(message.content.encode("utf-8"))
+        message_key = f"{message.chat_id}:{message.message_id}:{content_hash}"
+        return await self.state.call(self.state.check_and_add, message_key)
 
     def prepare_ai_context(self, message: WhatsAppMessage, products: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -205,10 +631,6 @@ class MessageProcessor:
         Returns:
             Tuple[bool, str]: (debe_responder, razón)
         """
-        # No responder a mensajes duplicados
-        if self.is_duplicate_message(message):
-            return False, "Mensaje duplicado"
-
         # No responder a mensajes vacíos o inválidos
         is_valid, reason = self.validate_message(message)
         if not is_valid:
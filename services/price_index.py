@@ -0,0 +1,63 @@
+"""
+Índice de precios del catálogo
+Responde rangos de precio ("menos de 2 millones") con búsqueda binaria
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Optional
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.catalog_index import CatalogIndex
+
+class PriceIndex:
+    """
+    Arreglo de precios ordenado con el doc_id de cada uno
+
+    Dos arreglos paralelos (precio ascendente y doc_id), así un rango se
+    resuelve con dos bisect y un corte. Los productos sin precio no se
+    indexan. El tipo de producto no se deduce aquí: quien consulta cruza
+    el rango con los términos de la consulta (bitmaps del índice), que
+    aparecen en cualquier posición del nombre.
+    """
+
+    def __init__(self, index: CatalogIndex):
+        self.index = index
+
+        pairs = sorted(
+            (product.precio_cop, doc_id)
+            for doc_id, product in enumerate(index.products)
+            if product.precio_cop
+        )
+        self.prices = array("q", (price for price, _ in pairs))
+        self.doc_ids = array("l", (doc_id for _, doc_id in pairs))
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def lookup(self, min_price: Optional[int], max_price: Optional[int]) -> array:
+        """
+        Productos con precio dentro de un rango (extremos incluidos)
+
+        Args:
+            min_price: Precio mínimo en COP (None = sin mínimo)
+            max_price: Precio máximo en COP (None = sin máximo)
+
+        Returns:
+            array: doc_ids del más barato al más caro
+        """
+        prices = self.prices
+        start = bisect_left(prices, min_price) if min_price is not None else 0
+        end = bisect_right(prices, max_price) if max_price is not None else len(prices)
+        return self.doc_ids[start:end]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas del índice de precios
+
+        Returns:
+            Dict[str, Any]: Productos con precio
+        """
+        return {"priced_products": len(self)}
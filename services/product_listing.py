@@ -0,0 +1,158 @@
+"""
+Listado paginado del catálogo para GET /products
+Cursores por versión, selección de campos, NDJSON en streaming y ETag
+"""
+import base64
+import zlib
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.product import FIELDS, Product
+from utils.helpers import fast_json_dumps
+
+# Campos por defecto (los que devolvía el listado completo)
+DEFAULT_FIELDS = ("nombre", "tienda", "precio", "disponibilidad")
+
+# Productos por bloque al escribir NDJSON
+NDJSON_CHUNK = 500
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Campos pedidos en ?fields=nombre,precio
+
+    Args:
+        fields: Lista separada por comas (None o vacío = campos por defecto)
+
+    Returns:
+        Tuple[str, ...]: Campos en el orden pedido, sin repetidos
+
+    Raises:
+        ValueError: Si algún campo no existe
+    """
+    if not fields:
+        return DEFAULT_FIELDS
+    selected = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in selected if name not in FIELDS]
+    if unknown or not selected:
+        raise ValueError(f"Campos desconocidos: {', '.join(unknown)} (disponibles: {', '.join(FIELDS)})")
+    return selected
+
+def encode_cursor(version: int, offset: int) -> str:
+    """Cursor opaco: versión del catálogo y posición siguiente"""
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode("ascii")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Leer un cursor de encode_cursor
+
+    Args:
+        cursor: Cursor recibido en ?cursor=
+
+    Returns:
+        Tuple[int, int]: (versión, posición)
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        version, offset = base64.urlsafe_b64decode(padded).decode("ascii").split(":")
+        version, offset = int(version), int(offset)
+    except ValueError:
+        raise ValueError("Cursor inválido")
+    if offset < 0:
+        raise ValueError("Cursor inválido")
+    return version, offset
+
+def product_row(product: Product, fields: Sequence[str]) -> Dict[str, Any]:
+    """Producto como diccionario con solo los campos pedidos"""
+    return {name: getattr(product, name) for name in fields}
+
+def catalog_page(
+    products: Sequence[Product],
+    version: int,
+    offset: int,
+    limit: int,
+    fields: Sequence[str]
+) -> Dict[str, Any]:
+    """
+    Una página del catálogo
+
+    Args:
+        products: Productos de la versión vigente
+        version: Versión del catálogo (va en el cursor siguiente)
+        offset: Posición del primer producto
+        limit: Máximo de productos
+        fields: Campos a incluir
+
+    Returns:
+        Dict[str, Any]: total, version, products y next_cursor (None en la última página)
+    """
+    end = min(offset + limit, len(products))
+    return {
+        "total": len(products),
+        "version": version,
+        "products": [product_row(products[i], fields) for i in range(offset, end)],
+        "next_cursor": encode_cursor(version, end) if end < len(products) else None
+    }
+
+def iter_ndjson(products: Sequence[Product], offset: int, end: int, fields: Sequence[str]) -> Iterator[bytes]:
+    """
+    Productos como NDJSON (un objeto por línea), en bloques
+
+    Args:
+        products: Productos de la versión vigente
+        offset: Posición del primer producto
+        end: Posición final (exclusiva)
+        fields: Campos a incluir
+
+    Yields:
+        bytes: Bloque de hasta NDJSON_CHUNK líneas
+    """
+    for start in range(offset, end, NDJSON_CHUNK):
+        yield b"".join(
+            fast_json_dumps(product_row(products[i], fields)) + b"\n"
+            for i in range(start, min(start + NDJSON_CHUNK, end))
+        )
+
+def listing_etag(version: int, published_at: float, *variant: Any) -> str:
+    """
+    ETag débil de un listado: versión del catálogo y parámetros de la respuesta
+
+    Es débil porque la misma representación puede viajar comprimida o no.
+
+    Args:
+        version: Versión del catálogo
+        published_at: Momento de publicación de la versión
+        variant: Parámetros que cambian el contenido (cursor, límite, campos, formato)
+
+    Returns:
+        str: Valor para el encabezado ETag
+    """
+    variant_hash = zlib.crc32("|".join(map(str, variant)).encode("utf-8"))
+    return f'W/"{version}-{int(published_at * 1000):x}-{variant_hash:08x}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Comparación débil de If-None-Match con el ETag actual
+
+    Args:
+        if_none_match: Encabezado If-None-Match (puede traer varios ETags o *)
+        etag: ETag de la respuesta
+
+    Returns:
+        bool: True si el cliente ya tiene esta representación
+    """
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
@@ -4,7 +4,9 @@ Servicio para hacer scraping de productos de las tiendas
 import asyncio
 import aiohttp
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urldefrag, urljoin
 from bs4 import BeautifulSoup
 
 import sys
@@ -13,9 +15,29 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import settings
 from models.product import Product
+from services.catalog_index import CatalogIndex
+from services.site_crawler import SiteCrawler
+from utils.helpers import format_currency, parse_price
+from utils.page_cache import PageCache
 
 logger = logging.getLogger(__name__)
 
+# Precio en pesos dentro de la tarjeta del producto ("$ 1.660.000", "$1.660.000,00")
+PRICE_PATTERN = re.compile(r"\$(?:\s|&nbsp;)*(\d[\d.,]*)")
+
+# Caracteres después del título donde se busca el precio
+PRICE_WINDOW = 2000
+
+# Montos menores no son precios de productos (cuotas, descuentos en %...)
+MIN_PRICE_COP = 1000
+
+# Enlace que abre antes del título de la tarjeta (<a href="..."><h2>Nombre</h2>)
+LINK_PATTERN = re.compile(r"<a\s[^>]*?href=[\"']([^\"']+)[\"']", re.IGNORECASE)
+
+# Versión de _extract_product_cards: al cambiar la extracción, subirla para
+# que las páginas cacheadas se vuelvan a extraer (del HTML guardado, sin descargar)
+EXTRACTOR_VERSION = "2"
+
 class ScrapingService:
     """Servicio para hacer scraping de sitios web"""
 
@@ -24,6 +46,16 @@ class ScrapingService:
         self.megacomputer_url = settings.MEGACOMPUTER_URL
         self.session: Optional[aiohttp.ClientSession] = None
 
+        # Métricas del último rastreo de cada tienda
+        self.crawl_stats: Dict[str, Dict[str, Any]] = {}
+
+        # Caché HTTP de páginas en disco (se abre en el primer rastreo)
+        self.page_cache: Optional[PageCache] = None
+
+        # Índice de la última lista consultada con find_product_by_query
+        self._query_index: Optional[CatalogIndex] = None
+        self._query_index_source: Optional[List[Product]] = None
+
     async def __aenter__(self):
         """Inicializar sesión HTTP"""
         self.session = aiohttp.ClientSession()
@@ -31,8 +63,26 @@ class ScrapingService:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Cerrar sesión HTTP"""
+        await self.close()
+
+    async def close(self):
+        """Cerrar la sesión HTTP y la caché de páginas (se reabren en el próximo scraping)"""
         if self.session:
             await self.session.close()
+            self.session = None
+        if self.page_cache:
+            # Espera las escrituras pendientes de la caché: en otro hilo
+            await asyncio.to_thread(self.page_cache.close)
+            self.page_cache = None
+
+    def _get_page_cache(self) -> Optional[PageCache]:
+        """Caché de páginas, abierta en el primer uso (None si está desactivada)"""
+        if self.page_cache is None and settings.PAGE_CACHE_ENABLED:
+            try:
+                self.page_cache = PageCache(settings.PAGE_CACHE_PATH)
+            except Exception as e:
+                logger.warning(f"Caché de páginas no disponible: {str(e)}")
+        return self.page_cache
 
     async def scrape_megapack(self) -> List[Product]:
         """
@@ -80,6 +130,10 @@ class ScrapingService:
                 logger.error(f"Error scraping MegaComputer: {str(megacomputer_products)}")
                 megacomputer_products = []
 
+            if self.page_cache is not None:
+                # Páginas que ya no se enlazan desde la tienda
+                await self.page_cache.prune(settings.PAGE_CACHE_MAX_AGE)
+
             return {
                 "MegaPack": megapack_products,
                 "MegaComputer": megacomputer_products
@@ -93,6 +147,16 @@ class ScrapingService:
         """
         Hacer scraping de un sitio web específico
 
+        Rastrea la página inicial, las categorías, la paginación y las
+        fichas de producto (hasta CRAWL_MAX_DEPTH saltos y CRAWL_MAX_PAGES
+        páginas). Un producto que aparece en varias páginas se guarda una
+        vez, con precio si alguna de ellas lo trae. Las páginas que no
+        cambiaron desde el rastreo anterior (304 o mismos bytes) no se
+        vuelven a extraer: sus productos salen de la caché de páginas.
+        Un producto se identifica por nombre y enlace a su ficha: la tarjeta
+        de un listado y la ficha misma cuentan como uno, y dos productos
+        distintos con el mismo nombre se guardan los dos.
+
         Args:
             url: URL del sitio web
             store_name: Nombre de la tienda
@@ -104,21 +168,46 @@ class ScrapingService:
             await self.__aenter__()
 
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-
-            async with self.session.get(url, headers=headers, timeout=30) as response:
-                if response.status != 200:
-                    logger.error(f"Error HTTP {response.status} para {url}")
-                    return []
-
-                html = await response.text()
-                return self._extract_products_from_html(html, store_name)
+            products: Dict[Tuple[str, str], Product] = {}
+
+            def add(cards: List[Tuple[Product, str]]):
+                for product, product_url in cards:
+                    key = (product.nombre, product_url)
+                    known = products.get(key)
+                    if known is None or (known.precio_cop is None and product.precio_cop is not None):
+                        products[key] = product
+
+            def collect(page_url: str, html: str) -> List[Dict[str, Any]]:
+                cards = self._extract_product_cards(html, store_name, page_url)
+                add(cards)
+                return [dict(product.to_dict(), url=product_url) for product, product_url in cards]
+
+            def collect_cached(page_url: str, items: List[Dict[str, Any]]):
+                cards = []
+                for item in items:
+                    fields = dict(item)
+                    product_url = fields.pop("url", page_url)
+                    cards.append((Product(**fields), product_url))
+                add(cards)
+
+            crawler = SiteCrawler(
+                self.session,
+                settings.CRAWL_MAX_PAGES,
+                settings.CRAWL_MAX_DEPTH,
+                settings.CRAWL_CONCURRENCY,
+                settings.CRAWL_HOST_RATE,
+                self._get_page_cache(),
+                EXTRACTOR_VERSION
+            )
+            stats = await crawler.crawl(url, collect, collect_cached)
+            self.crawl_stats[store_name] = dict(stats, products=len(products))
+            logger.info(
+                f"Encontrados {len(products)} productos en {store_name}: {stats['pages']} páginas "
+                f"({stats['not_modified']} sin modificar, {stats['unchanged']} iguales, "
+                f"{stats['failed']} con error, {stats['discovered']} URLs) en {stats['seconds']:.1f} s"
+            )
+            return list(products.values())
 
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout scraping {url}")
-            return []
         except Exception as e:
             logger.error(f"Error scraping {url}: {str(e)}")
             return []
@@ -134,8 +223,23 @@ class ScrapingService:
         Returns:
             List[Product]: Lista de productos encontrados
         """
-        import re
+        return [product for product, _ in self._extract_product_cards(html, store_name, "")]
 
+    def _extract_product_cards(self, html: str, store_name: str, page_url: str) -> List[Tuple[Product, str]]:
+        """
+        Extraer productos desde HTML con el enlace a la ficha de cada uno
+
+        El enlace es el que envuelve al título de la tarjeta; si no hay
+        (la ficha del producto), es la página misma.
+
+        Args:
+            html: Contenido HTML
+            store_name: Nombre de la tienda
+            page_url: URL de la página
+
+        Returns:
+            List[Tuple[Product, str]]: Productos encontrados y su URL
+        """
         productos = []
 
         # Regex para encontrar títulos de productos (h1-h6)
@@ -143,19 +247,61 @@ class ScrapingService:
         regex = r'<h[1-6][^>]*>([^<]{3,200})</h[1-6]>'
         matches = re.finditer(regex, html, re.IGNORECASE | re.DOTALL)
 
-        for match in matches:
+        matches = list(matches)
+        previous_end = 0
+        for position, match in enumerate(matches):
             nombre = match.group(1).strip()
 
             # Filtrar títulos que parezcan productos
             if self._is_product_title(nombre):
-                productos.append(Product(
+                # El precio de la tarjeta está entre este título y el siguiente
+                end = matches[position + 1].start() if position + 1 < len(matches) else len(html)
+                price = self._extract_price(html[match.end():min(end, match.end() + PRICE_WINDOW)])
+                start = max(previous_end, match.start() - PRICE_WINDOW)
+                product_url = self._card_link(html[start:match.start()], page_url)
+                productos.append((Product(
                     nombre=nombre,
-                    tienda=store_name
-                ))
+                    tienda=store_name,
+                    precio=format_currency(price) if price else "Consultar",
+                    precio_cop=price
+                ), product_url))
+            previous_end = match.end()
 
-        logger.info(f"Encontrados {len(productos)} productos en {store_name}")
+        logger.debug(f"Encontrados {len(productos)} productos en {store_name}")
         return productos
 
+    def _card_link(self, html: str, page_url: str) -> str:
+        """
+        URL del enlace que sigue abierto al llegar al título de la tarjeta
+
+        Args:
+            html: Fragmento anterior al título (desde el título previo)
+            page_url: URL de la página, para enlaces relativos y como respaldo
+
+        Returns:
+            str: URL absoluta sin fragmento
+        """
+        links = list(LINK_PATTERN.finditer(html))
+        if links and "</a" not in html[links[-1].end():].lower():
+            return urldefrag(urljoin(page_url, links[-1].group(1)))[0]
+        return urldefrag(page_url)[0]
+
+    def _extract_price(self, html: str) -> Optional[int]:
+        """
+        Extraer el primer precio en pesos de un fragmento HTML
+
+        Args:
+            html: Fragmento posterior al título del producto
+
+        Returns:
+            Optional[int]: Precio en COP o None si no aparece
+        """
+        match = PRICE_PATTERN.search(html)
+        if not match:
+            return None
+        price = parse_price(match.group(1))
+        return price if price and price >= MIN_PRICE_COP else None
+
     def _is_product_title(self, title: str) -> bool:
         """
         Determinar si un título parece ser de un producto
@@ -207,20 +353,12 @@ class ScrapingService:
         if not query or not products:
             return None
 
-        query_lower = query.lower()
-
-        # Búsqueda exacta primero
-        for product in products:
-            if product.matches_query(query):
-                return product
-
-        # Si no hay coincidencia exacta, buscar alternativas
-        alternatives = []
-        for product in products[:5]:  # Limitar a 5 alternativas
-            if query_lower in product.nombre.lower():
-                alternatives.append(product)
+        # El índice se reutiliza mientras se consulte la misma lista
+        if self._query_index_source is not products:
+            self._query_index = CatalogIndex({"": products})
+            self._query_index_source = products
 
-        return alternatives[0] if alternatives else None
+        return self._query_index.best_match(query, settings.FUZZY_MIN_SIMILARITY)
 
     def get_all_products(self, store_data: Dict[str, List[Product]]) -> List[Product]:
         """
@@ -0,0 +1,376 @@
+"""
+Búsqueda semántica local sobre el catálogo con NumPy
+Embeddings TF-IDF de n-gramas de caracteres con hashing, sin red ni modelos externos
+"""
+import hashlib
+import logging
+import os
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional; sin él la búsqueda semántica se desactiva
+    np = None
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.catalog_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Cambiar si cambia la codificación: invalida las matrices persistidas
+ENCODER_VERSION = 1
+
+# Conceptos frecuentes en consultas sin nombre de producto: cada palabra
+# de la consulta agrega los términos de catálogo que suele implicar
+CONCEPTS: Dict[str, Tuple[str, ...]] = {
+    "jugar": ("gamer", "gaming", "rgb", "144hz"),
+    "juego": ("gamer", "gaming", "rgb", "144hz"),
+    "gamer": ("gaming", "rgb"),
+    "universidad": ("laptop", "notebook", "portatil", "tablet"),
+    "estudiar": ("laptop", "notebook", "portatil", "tablet"),
+    "estudiante": ("laptop", "notebook", "portatil", "tablet"),
+    "colegio": ("laptop", "tablet"),
+    "trabajo": ("laptop", "monitor", "teclado", "mouse"),
+    "oficina": ("laptop", "monitor", "teclado", "mouse"),
+    "computador": ("laptop", "notebook", "portatil", "pc"),
+    "computadora": ("laptop", "notebook", "portatil", "pc"),
+    "musica": ("audifono", "bluetooth", "parlante"),
+    "escuchar": ("audifono", "bluetooth", "parlante"),
+    "llamar": ("celular", "smartphone"),
+    "telefono": ("celular", "smartphone"),
+    "movil": ("celular", "smartphone"),
+    "foto": ("celular", "camara"),
+    "cargar": ("cargador", "usb"),
+    "bateria": ("cargador",),
+    "escribir": ("teclado",),
+    "almacenamiento": ("ssd", "disco"),
+    "guardar": ("ssd", "disco"),
+    "pantalla": ("monitor",),
+}
+
+def expand_query(tokens: Iterable[str]) -> List[str]:
+    """
+    Agregar a la consulta los términos de catálogo de sus conceptos
+
+    Args:
+        tokens: Tokens de la consulta (ya tokenizados)
+
+    Returns:
+        List[str]: Tokens originales seguidos de los implicados, sin repetir
+    """
+    expanded = dict.fromkeys(tokens)
+    for token in list(expanded):
+        for implied in CONCEPTS.get(token, ()):
+            expanded.setdefault(implied)
+    return list(expanded)
+
+def _features(token: str, dims: int) -> List[Tuple[int, float]]:
+    """
+    Buckets con signo de los n-gramas (3 a 5) de un token
+
+    Usa crc32 (estable entre procesos) para que la matriz persistida siga
+    siendo válida tras reiniciar.
+    """
+    padded = f"<{token}>"
+    grams = [padded]
+    for n in (3, 4, 5):
+        grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+    features = []
+    for gram in grams:
+        hashed = zlib.crc32(gram.encode("utf-8"))
+        features.append((hashed % dims, 1.0 if hashed & 0x80000000 else -1.0))
+    return features
+
+def _term_vector(token: str, weight: float, dims: int) -> "np.ndarray":
+    """Vector de un término: sus n-gramas con signo, normalizado y escalado por su IDF"""
+    vector = np.zeros(dims, dtype=np.float32)
+    for bucket, sign in _features(token, dims):
+        vector[bucket] += sign
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector *= weight / norm
+    return vector
+
+# Vectores de términos de consulta recordados por índice
+_MAX_CACHED_TERMS = 10000
+
+class SemanticIndex:
+    """
+    Matriz densa float32 (productos x dimensiones) con un vector por producto
+
+    Cada término se codifica como la suma con signo de sus n-gramas de
+    caracteres en un espacio de dimensión fija (feature hashing), escalada
+    por su IDF; cada producto es la suma de sus términos normalizada (L2).
+    Así "portatiles" y "portatil", o "samsumg" y "samsung", quedan cerca
+    aunque no compartan el token exacto. Una consulta se puntúa con un
+    único producto matriz-vector y el top-k sale de argpartition.
+    """
+
+    def __init__(self, matrix: "np.ndarray", idf: Dict[str, float], default_idf: float, fingerprint: str):
+        self.matrix = matrix
+        self.dims = matrix.shape[1]
+        self.idf = idf
+        self.default_idf = default_idf
+        self.fingerprint = fingerprint
+        self._term_vectors: Dict[str, "np.ndarray"] = {}
+
+    @staticmethod
+    def available() -> bool:
+        """NumPy está instalado"""
+        return np is not None
+
+    @staticmethod
+    def fingerprint_for(names: Iterable[str], dims: int) -> str:
+        """
+        Huella del catálogo y la codificación (para validar la matriz persistida)
+
+        Args:
+            names: Nombres de producto en orden de doc_id
+            dims: Dimensiones del embedding
+
+        Returns:
+            str: Hash hexadecimal
+        """
+        digest = hashlib.sha1(f"{ENCODER_VERSION}:{dims}".encode("utf-8"))
+        for name in names:
+            digest.update(name.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, doc_tokens: Sequence[Sequence[str]], df: Dict[str, int], dims: int,
+              fingerprint: str = "", matrix: Optional["np.ndarray"] = None) -> "SemanticIndex":
+        """
+        Codificar el catálogo (una vez por actualización del caché)
+
+        Args:
+            doc_tokens: Tokens de cada producto en orden de doc_id
+            df: Frecuencia de documento de cada término
+            dims: Dimensiones del embedding
+            fingerprint: Huella del catálogo (ver fingerprint_for)
+            matrix: Matriz ya calculada (persistida) para no recodificar los productos
+
+        Returns:
+            SemanticIndex: Índice construido
+        """
+        size = len(doc_tokens)
+        idf = {term: float(np.log((1 + size) / (1 + freq)) + 1) for term, freq in df.items()}
+        default_idf = float(np.median(list(idf.values()))) if idf else 1.0
+
+        if matrix is None:
+            # Un vector por término del vocabulario (los productos los comparten)
+            terms = list(df)
+            term_matrix = np.zeros((len(terms) + 1, dims), dtype=np.float32)
+            for i, term in enumerate(terms):
+                term_matrix[i] = _term_vector(term, idf[term], dims)
+            matrix = cls._encode_documents(doc_tokens, terms, term_matrix, dims)
+        return cls(matrix, idf, default_idf, fingerprint)
+
+    @staticmethod
+    def _encode_documents(doc_tokens: Sequence[Sequence[str]], terms: List[str], term_matrix: "np.ndarray",
+                          dims: int) -> "np.ndarray":
+        """Productos como suma de sus términos, normalizada (por bloques para acotar la memoria)"""
+        size = len(doc_tokens)
+        term_ids = {term: i for i, term in enumerate(terms)}
+        width = max((len(tokens) for tokens in doc_tokens), default=0)
+
+        # La última fila de term_matrix es cero: rellena los productos con menos términos
+        ids = np.full((size, max(width, 1)), len(terms), dtype=np.int32)
+        for doc_id, tokens in enumerate(doc_tokens):
+            ids[doc_id, :len(tokens)] = [term_ids[token] for token in tokens]
+
+        matrix = np.zeros((size, dims), dtype=np.float32)
+        block = 65536
+        for start in range(0, size, block):
+            matrix[start:start + block] = term_matrix[ids[start:start + block]].sum(axis=1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def encode_query(self, query: str) -> Optional["np.ndarray"]:
+        """
+        Vector de una consulta (con sus conceptos expandidos)
+
+        Args:
+            query: Consulta del usuario
+
+        Returns:
+            Optional[np.ndarray]: Vector normalizado o None si no tiene términos
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+
+        idf = self.idf
+        original = set(tokens)
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for token in expand_query(tokens):
+            if token not in idf:
+                # Una palabra de concepto fuera del catálogo ("universidad") solo aporta sus
+                # términos implicados, y de esos solo los que existen en el catálogo: sus
+                # n-gramas confundirían ("computador" ~ "cargador"). Las demás palabras
+                # desconocidas (mal escritas) sí aportan sus n-gramas.
+                if token in CONCEPTS or token not in original:
+                    continue
+            vector += self._query_term_vector(token)
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _query_term_vector(self, token: str) -> "np.ndarray":
+        """Vector de un término de consulta (los desconocidos, p. ej. mal escritos, usan el IDF mediano)"""
+        vector = self._term_vectors.get(token)
+        if vector is None:
+            if len(self._term_vectors) >= _MAX_CACHED_TERMS:
+                self._term_vectors.clear()
+            vector = _term_vector(token, self.idf.get(token, self.default_idf), self.dims)
+            self._term_vectors[token] = vector
+        return vector
+
+    def search(self, query: str, k: int, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        Productos más similares a una consulta
+
+        Args:
+            query: Consulta del usuario
+            k: Cantidad de productos
+            min_score: Similitud coseno mínima
+
+        Returns:
+            List[Tuple[int, float]]: (doc_id, similitud) de mayor a menor
+        """
+        vector = self.encode_query(query)
+        if vector is None or k <= 0 or not len(self.matrix):
+            return []
+        return self.search_vector(vector, k, min_score)
+
+    def search_vector(self, vector: "np.ndarray", k: int, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        Top-k por similitud coseno para un vector ya codificado
+
+        Args:
+            vector: Vector normalizado de la consulta
+            k: Cantidad de productos
+            min_score: Similitud coseno mínima
+
+        Returns:
+            List[Tuple[int, float]]: (doc_id, similitud) de mayor a menor
+        """
+        scores = self.matrix @ vector
+        k = min(k, len(scores))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in top if scores[doc_id] >= min_score]
+
+    @staticmethod
+    def matrix_path(path: str, fingerprint: str) -> str:
+        """
+        Archivo de la matriz de un catálogo: la huella va en el nombre
+
+        Así un archivo solo puede contener la matriz de su huella y no hay
+        que emparejar la matriz con metadatos escritos aparte.
+
+        Args:
+            path: Ruta configurada (SEMANTIC_INDEX_PATH)
+            fingerprint: Huella del catálogo (fingerprint_for)
+
+        Returns:
+            str: Ruta del .npy de esa huella
+        """
+        root, ext = os.path.splitext(path)
+        return f"{root}.{fingerprint[:20]}{ext or '.npy'}"
+
+    def save(self, path: str):
+        """
+        Persistir la matriz para no recalcularla al reiniciar
+
+        Args:
+            path: Ruta configurada; el archivo real lleva la huella (matrix_path)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Escritura atómica con temporal propio del proceso: otro worker nunca
+        # lee un archivo a medias ni pisa el temporal de este
+        target = self.matrix_path(path, self.fingerprint)
+        temp_path = f"{target}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, self.matrix)
+        os.replace(temp_path, target)
+        self._remove_stale(path, target)
+
+    @staticmethod
+    def _remove_stale(path: str, keep: str):
+        """Borrar matrices de catálogos anteriores (un worker que las tenga mapeadas sigue leyéndolas)"""
+        root, ext = os.path.splitext(path)
+        directory = os.path.dirname(path) or "."
+        prefix = f"{os.path.basename(root)}."
+        suffix = ext or ".npy"
+        for name in os.listdir(directory):
+            candidate = os.path.join(directory, name)
+            if name.startswith(prefix) and name.endswith(suffix) and candidate != keep:
+                try:
+                    os.remove(candidate)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def load_matrix(path: str, fingerprint: str) -> Optional["np.ndarray"]:
+        """
+        Cargar una matriz persistida si corresponde al mismo catálogo
+
+        Args:
+            path: Ruta configurada (SEMANTIC_INDEX_PATH)
+            fingerprint: Huella esperada del catálogo
+
+        Returns:
+            Optional[np.ndarray]: Matriz (mapeada en memoria) o None
+        """
+        try:
+            return np.load(SemanticIndex.matrix_path(path, fingerprint), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+def build_semantic_index(doc_tokens: Sequence[Sequence[str]], df: Dict[str, int], names: Iterable[str],
+                         dims: int, path: str = "") -> Optional[SemanticIndex]:
+    """
+    Construir el índice semántico reutilizando la matriz persistida si es válida
+
+    Args:
+        doc_tokens: Tokens de cada producto en orden de doc_id
+        df: Frecuencia de documento de cada término
+        names: Nombres de producto en orden de doc_id
+        dims: Dimensiones del embedding
+        path: Ruta del .npy persistido ("" para no persistir)
+
+    Returns:
+        Optional[SemanticIndex]: Índice, o None si NumPy no está instalado
+    """
+    if np is None:
+        return None
+
+    started = time.perf_counter()
+    fingerprint = SemanticIndex.fingerprint_for(names, dims)
+    cached = SemanticIndex.load_matrix(path, fingerprint) if path else None
+
+    index = SemanticIndex.build(doc_tokens, df, dims, fingerprint, matrix=cached)
+    if cached is not None:
+        logger.info(f"Matriz semántica cargada de {path} ({cached.shape[0]} productos)")
+        return index
+
+    if path:
+        try:
+            index.save(path)
+        except OSError as e:
+            logger.warning(f"No se pudo persistir la matriz semántica: {str(e)}")
+    logger.info(
+        f"Matriz semántica construida: {index.matrix.shape[0]}x{dims} en "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return index
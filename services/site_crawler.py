@@ -0,0 +1,352 @@
+"""
+Rastreo de las páginas de una tienda: categorías, paginación y fichas de producto
+Cola con prioridad, pool acotado de workers y límite de peticiones por host
+"""
+import asyncio
+import hashlib
+import itertools
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlsplit, urlunsplit
+
+import aiohttp
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.page_cache import CachedPage, PageCache
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# Segundos por petición
+REQUEST_TIMEOUT = 30
+
+HREF_PATTERN = re.compile(r'<a\s[^>]*?href\s*=\s*["\']([^"\'#]+)', re.IGNORECASE)
+
+# Enlaces que nunca son páginas del catálogo
+SKIPPED_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".css", ".js",
+    ".pdf", ".zip", ".xml", ".json", ".mp4"
+)
+SKIPPED_PATHS = re.compile(
+    r"/(?:cart|carrito|checkout|login|logout|account|mi-cuenta|my-account|wishlist|wp-admin|wp-login|feed)(?:/|$|\.)",
+    re.IGNORECASE
+)
+
+# Parámetros que no cambian el contenido (se quitan para no rastrear dos veces lo mismo)
+IGNORED_PARAMS = ("utm_", "fbclid", "gclid", "orderby", "sort", "add-to-cart")
+
+PAGINATION_PATTERN = re.compile(r"(?:[?&](?:page|pagina|pg)=\d+|/(?:page|pagina)/\d+)", re.IGNORECASE)
+CATEGORY_PATTERN = re.compile(
+    r"/(?:categoria|categorias|category|categories|product-category|collections?|catalogo|tienda|shop)(?:/|$)",
+    re.IGNORECASE
+)
+PRODUCT_PATTERN = re.compile(r"/(?:producto|productos|product|products|item|p)/", re.IGNORECASE)
+
+# URLs en cola como máximo por página del presupuesto (acota la memoria del rastreo)
+DISCOVERY_FACTOR = 10
+
+# Prioridad en la cola (menor = antes): los listados primero, descubren más productos
+PRIORITY_PAGINATION = 0
+PRIORITY_CATEGORY = 1
+PRIORITY_PRODUCT = 2
+PRIORITY_OTHER = 3
+
+def canonical_url(url: str) -> Optional[str]:
+    """
+    Forma canónica de una URL para no visitarla dos veces
+
+    Args:
+        url: URL absoluta
+
+    Returns:
+        Optional[str]: URL sin fragmento, con esquema y host en minúsculas y
+            parámetros ordenados, o None si no es http(s)
+    """
+    url, _ = urldefrag(url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.netloc:
+        return None
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(IGNORED_PARAMS)
+    ))
+    return urlunsplit((scheme, parts.netloc.lower(), parts.path or "/", query, ""))
+
+def _site(host: str) -> str:
+    return host[4:] if host.startswith("www.") else host
+
+def link_priority(url: str) -> Optional[int]:
+    """
+    Clasificar un enlace del mismo sitio
+
+    Args:
+        url: URL canónica
+
+    Returns:
+        Optional[int]: Prioridad en la cola, o None si no se debe rastrear
+    """
+    parts = urlsplit(url)
+    path = parts.path.lower()
+    if path.endswith(SKIPPED_EXTENSIONS) or SKIPPED_PATHS.search(path):
+        return None
+    location = path + ("?" + parts.query if parts.query else "")
+    if PAGINATION_PATTERN.search(location):
+        return PRIORITY_PAGINATION
+    if CATEGORY_PATTERN.search(path):
+        return PRIORITY_CATEGORY
+    if PRODUCT_PATTERN.search(path):
+        return PRIORITY_PRODUCT
+    return PRIORITY_OTHER
+
+class HostRateLimiter:
+    """Espaciado mínimo entre peticiones al mismo host"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, host: str):
+        """Esperar el turno de una petición al host (cada llamada reserva el siguiente)"""
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class SiteCrawler:
+    """
+    Rastreador de una tienda sobre una sesión aiohttp existente
+
+    Parte de la página inicial y sigue los enlaces del mismo sitio hasta
+    max_depth saltos y max_pages páginas descargadas. Las URLs se
+    deduplican en forma canónica. La cola tiene prioridad: primero la
+    paginación y las categorías, después las fichas de producto, así el
+    presupuesto de páginas se gasta en los listados antes que en fichas
+    que repiten lo que ya mostraba el listado. Los demás enlaces solo se
+    siguen desde la página inicial (menús con nombres de categoría
+    propios). Hasta concurrency peticiones a la vez, y como mucho
+    host_rate por segundo a cada host. Con una PageCache, las páginas que
+    no cambiaron (304 o mismo hash) reutilizan sus enlaces y lo extraído
+    sin volver a leer el HTML.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        max_pages: int,
+        max_depth: int,
+        concurrency: int,
+        host_rate: float,
+        cache: Optional[PageCache] = None,
+        cache_tag: str = ""
+    ):
+        self.session = session
+        self.max_pages = max(max_pages, 1)
+        self.max_depth = max(max_depth, 0)
+        self.concurrency = max(concurrency, 1)
+        self.limiter = HostRateLimiter(host_rate)
+        # Caché de páginas: GET condicionales y lo extraído de cada página
+        self.cache = cache
+        self.cache_tag = cache_tag
+
+    async def crawl(
+        self,
+        start_url: str,
+        on_page: Callable[[str, str], List[Dict[str, Any]]],
+        on_cached: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Rastrear un sitio
+
+        Args:
+            start_url: Página inicial
+            on_page: Se llama con (url, html) por cada página que hay que
+                extraer; devuelve lo extraído (serializable a JSON) para la caché
+            on_cached: Se llama con (url, lo extraído antes) cuando la página
+                no cambió (304 o mismo contenido) y no se vuelve a extraer
+
+        Returns:
+            Dict[str, Any]: Páginas descargadas, no modificadas, con el mismo
+                contenido, extraídas, fallidas, URLs descubiertas y duración
+        """
+        started = time.monotonic()
+        start = canonical_url(start_url)
+        if start is None:
+            raise ValueError(f"URL inválida: {start_url}")
+
+        site = _site(urlsplit(start).netloc)
+        queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        order = itertools.count()
+        seen = {start}
+        max_discovered = self.max_pages * DISCOVERY_FACTOR
+        stats = {"pages": 0, "not_modified": 0, "unchanged": 0, "parsed": 0, "failed": 0}
+        remaining = self.max_pages
+        queue.put_nowait((PRIORITY_PAGINATION, 0, next(order), start))
+
+        def schedule(links: List[Tuple[int, str]], depth: int):
+            for priority, link in sorted(links):
+                if len(seen) >= max_discovered:
+                    return
+                if link not in seen:
+                    seen.add(link)
+                    queue.put_nowait((priority, depth, next(order), link))
+
+        async def worker():
+            nonlocal remaining
+            while True:
+                _, depth, _, url = await queue.get()
+                try:
+                    if remaining <= 0:
+                        # Presupuesto agotado: solo vaciar la cola
+                        continue
+                    remaining -= 1
+                    links = await self._visit(url, site, on_page, on_cached, stats)
+                    if links is None:
+                        stats["failed"] += 1
+                        continue
+                    stats["pages"] += 1
+                    if depth < self.max_depth and remaining > 0:
+                        # Los enlaces sin categoría reconocible solo desde la página inicial
+                        schedule([link for link in links if link[0] != PRIORITY_OTHER or depth == 0], depth + 1)
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.error(f"Error procesando {url}: {str(e)}")
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        stats["discovered"] = len(seen)
+        stats["seconds"] = round(time.monotonic() - started, 2)
+        return stats
+
+    async def _visit(
+        self,
+        url: str,
+        site: str,
+        on_page: Callable[[str, str], List[Dict[str, Any]]],
+        on_cached: Optional[Callable[[str, List[Dict[str, Any]]], None]],
+        stats: Dict[str, int]
+    ) -> Optional[List[Tuple[int, str]]]:
+        """Descargar (o revalidar) una página y extraerla si cambió: sus enlaces, o None si falló"""
+        cached = await self.cache.get(url) if self.cache is not None else None
+        response = await self._fetch(url, cached)
+        if response is None:
+            return None
+        final_url, html, etag, last_modified, content_hash = response
+
+        if html is None:
+            stats["not_modified"] += 1
+        elif cached is not None and cached.content_hash == content_hash:
+            stats["unchanged"] += 1
+            html = None
+        # html None: el contenido es el de la caché
+
+        page = CachedPage(
+            url,
+            etag or (cached.etag if cached is not None else None),
+            last_modified or (cached.last_modified if cached is not None else None),
+            content_hash or cached.content_hash,
+            [],
+            [],
+            self.cache_tag
+        )
+        if html is None and cached.tag == self.cache_tag and on_cached is not None:
+            page.links, page.items = cached.links, cached.items
+            on_cached(final_url, cached.items)
+            await self.cache.put(page)
+            return page.links
+
+        body_changed = html is not None
+        if html is None:
+            # Mismo contenido pero extraído con otra versión del extractor
+            html = await self.cache.get_body(url)
+        if html is None:
+            # El HTML guardado ya no está (entrada borrada entre medias): descargarla entera
+            response = await self._fetch(url, None)
+            if response is None:
+                return None
+            final_url, html, page.etag, page.last_modified, page.content_hash = response
+            body_changed = True
+        stats["parsed"] += 1
+        page.items = on_page(final_url, html)
+        page.links = self._links(html, final_url, site)
+        if self.cache is not None:
+            await self.cache.put(page, html if body_changed else None)
+        return page.links
+
+    async def _fetch(
+        self,
+        url: str,
+        cached: Optional[CachedPage]
+    ) -> Optional[Tuple[str, Optional[str], Optional[str], Optional[str], Optional[str]]]:
+        """
+        Descargar una página HTML, condicional si está en caché
+
+        Args:
+            url: URL canónica
+            cached: Entrada de la caché (sus validadores van en la petición)
+
+        Returns:
+            Optional[Tuple[...]]: (URL final, html o None si 304, ETag,
+                Last-Modified, hash del contenido o None si 304), o None si falló
+        """
+        await self.limiter.wait(urlsplit(url).netloc)
+        headers = dict(HEADERS, **cached.conditional_headers()) if cached is not None else HEADERS
+        try:
+            async with self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT) as response:
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if response.status == 304 and cached is not None:
+                    return str(response.url), None, etag, last_modified, None
+                if response.status != 200:
+                    logger.warning(f"Error HTTP {response.status} para {url}")
+                    return None
+                if "html" not in response.content_type:
+                    return None
+                body = await response.read()
+                try:
+                    encoding = response.get_encoding()
+                except RuntimeError:
+                    encoding = "utf-8"
+                content_hash = hashlib.blake2b(body, digest_size=16).hexdigest()
+                html = body.decode(encoding, errors="replace")
+                return str(response.url), html, etag, last_modified, content_hash
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout rastreando {url}")
+            return None
+        except aiohttp.ClientError as e:
+            logger.warning(f"Error rastreando {url}: {str(e)}")
+            return None
+
+    def _links(self, html: str, base_url: str, site: str) -> List[Tuple[int, str]]:
+        """Enlaces a rastrear de una página: (prioridad, URL canónica)"""
+        links: Dict[str, int] = {}
+        for match in HREF_PATTERN.finditer(html):
+            href = match.group(1).strip()
+            if href.startswith(("mailto:", "tel:", "javascript:", "whatsapp:")):
+                continue
+            url = canonical_url(urljoin(base_url, href))
+            if url is None or url in links or _site(urlsplit(url).netloc) != site:
+                continue
+            priority = link_priority(url)
+            if priority is not None:
+                links[url] = priority
+        return [(priority, url) for url, priority in links.items()]
@@ -114,7 +114,7 @@ async def main():
 
             # Verificación periódica de salud
             if sales_agent:
-                status = sales_agent.get_status()
+                status = await sales_agent.get_status()
                 if not status["is_running"]:
                     logger.error("⚠️ Agente detenido, reiniciando...")
                     await sales_agent.start()
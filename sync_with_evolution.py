@@ -94,21 +94,6 @@ async def check_ai_health():
         logger.error(f"❌ Error en servicio de IA: {str(e)}")
         return False
 
-async def update_products_cache():
-    """Actualizar caché de productos"""
-    try:
-        from services.scraping_service import ScrapingService
-        async with ScrapingService() as scraper:
-            products = await scraper.scrape_all_stores()
-            total_products = sum(len(p) for p in products.values())
-
-            logger.info(f"📦 Caché de productos actualizado: {total_products} productos")
-            return total_products
-
-    except Exception as e:
-        logger.error(f"❌ Error actualizando productos: {str(e)}")
-        return 0
-
 async def log_status():
     """Log del estado actual"""
     status_msg = f"""
@@ -139,8 +124,8 @@ async def sync_loop():
         update_status("is_running", False)
         return
 
-    # Actualizar caché de productos
-    await update_products_cache()
+    # El catálogo lo actualiza el propio agente (CATALOG_REFRESH_INTERVAL):
+    # scrapear también aquí solo duplicaría el trabajo contra las tiendas
 
     # Bucle de sincronización
     sync_counter = 0
@@ -157,10 +142,6 @@ async def sync_loop():
                 await check_evolution_health()
                 await check_ai_health()
 
-                # Actualizar productos cada 10 minutos
-                if sync_counter % 20 == 0:  # Cada 10 minutos (30s * 20)
-                    await update_products_cache()
-
             # Simular procesamiento de mensajes (en producción esto vendría del webhook)
             # Aquí podrías agregar lógica para procesar mensajes pendientes
 
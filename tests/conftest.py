@@ -0,0 +1,8 @@
+"""
+Configuración común de las pruebas
+Los módulos del proyecto se importan desde la raíz del repositorio
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,34 @@
+"""
+Pruebas del control de admisión: caché de respuestas por chat y salida
+del modo shedding sin tráfico
+"""
+from core.admission import MODE_NORMAL, MODE_SHEDDING, AdmissionController
+
+def make_controller(depth, **overrides):
+    options = dict(max_queue=10, max_inflight=2, recovery_ratio=0.5, min_shed_seconds=0, cache_size=10)
+    options.update(overrides)
+    return AdmissionController(queue_depth=lambda: depth[0], **options)
+
+def test_cached_answers_are_not_shared_between_chats():
+    controller = make_controller([0])
+    controller.remember_answer("chat-a", "¿Tienen la laptop HP?", "Hola Ana, sí: la que viste ayer")
+
+    assert controller.cached_answer("chat-a", "tienen la laptop hp") == "Hola Ana, sí: la que viste ayer"
+    assert controller.cached_answer("chat-b", "¿Tienen la laptop HP?") is None
+
+def test_shedding_ends_when_traffic_stops_without_new_messages():
+    depth = [20]
+    controller = make_controller(depth)
+    assert not controller.admit()
+    assert controller.get_stats()["mode"] == MODE_SHEDDING
+
+    # La cola se vacía y no llegan más mensajes: /health ya no debe reportar saturación
+    depth[0] = 0
+    assert controller.get_stats()["mode"] == MODE_NORMAL
+
+def test_finishing_llm_calls_ends_shedding():
+    controller = make_controller([0])
+    with controller.llm_call(), controller.llm_call():
+        assert not controller.admit()
+        assert controller.mode == MODE_SHEDDING
+    assert controller.mode == MODE_NORMAL
@@ -0,0 +1,74 @@
+"""
+Pruebas de diff_catalogs: altas, bajas, cambios y tiendas caídas
+"""
+from models.product import Product
+from services.catalog_diff import diff_catalogs
+
+def laptop(nombre, precio="$ 1.899.000", disponibilidad="Disponible", tienda="MegaPack"):
+    return Product(nombre=nombre, tienda=tienda, precio=precio, disponibilidad=disponibilidad)
+
+CURRENT = {
+    "MegaPack": (
+        laptop("Laptop Lenovo IdeaPad 3"),
+        laptop("Laptop HP Pavilion 15", precio="$ 2.499.000"),
+        laptop("Laptop Asus VivoBook 14", disponibilidad="Disponible"),
+    ),
+    "MegaComputer": (
+        laptop("Celular Samsung Galaxy A15", precio="$ 699.000", tienda="MegaComputer"),
+    )
+}
+
+def test_added_removed_and_changed_products():
+    scraped = {
+        "MegaPack": [
+            laptop("Laptop Lenovo IdeaPad 3"),
+            laptop("Laptop HP Pavilion 15", precio="$ 2.299.000"),
+            laptop("Laptop Acer Nitro 5", precio="$ 3.299.000"),
+        ],
+        "MegaComputer": [
+            laptop("Celular Samsung Galaxy A15", precio="$ 699.000", tienda="MegaComputer"),
+        ]
+    }
+    diff = diff_catalogs(CURRENT, scraped)
+
+    assert [p.nombre for p in diff.added] == ["Laptop Acer Nitro 5"]
+    assert [p.nombre for p in diff.removed] == ["Laptop Asus VivoBook 14"]
+    assert [(p.nombre, p.precio) for p in diff.changed] == [("Laptop HP Pavilion 15", "$ 2.299.000")]
+    assert diff.counts() == {"added": 1, "removed": 1, "changed": 1, "unchanged": 2}
+    assert diff.has_changes
+
+    # La versión nueva sigue el orden del scraping y conserva los objetos sin cambios
+    assert [p.nombre for p in diff.catalog["MegaPack"]] == [
+        "Laptop Lenovo IdeaPad 3", "Laptop HP Pavilion 15", "Laptop Acer Nitro 5"
+    ]
+    assert diff.catalog["MegaPack"][0] is CURRENT["MegaPack"][0]
+    assert diff.catalog["MegaPack"][1] is scraped["MegaPack"][1]
+    assert diff.catalog["MegaComputer"][0] is CURRENT["MegaComputer"][0]
+
+def test_availability_change_counts_as_changed():
+    scraped = dict(CURRENT, MegaPack=[
+        *CURRENT["MegaPack"][:2], laptop("Laptop Asus VivoBook 14", disponibilidad="Agotado")
+    ])
+    diff = diff_catalogs(CURRENT, scraped)
+    assert [p.disponibilidad for p in diff.changed] == ["Agotado"]
+    assert not diff.added and not diff.removed
+
+def test_same_scraping_has_no_changes():
+    scraped = {store: [laptop(p.nombre, p.precio, p.disponibilidad, p.tienda) for p in products]
+               for store, products in CURRENT.items()}
+    diff = diff_catalogs(CURRENT, scraped)
+    assert not diff.has_changes
+    assert diff.counts()["unchanged"] == 4
+    assert all(new is old for store in CURRENT for new, old in zip(diff.catalog[store], CURRENT[store]))
+
+def test_store_without_products_keeps_its_previous_catalog():
+    diff = diff_catalogs(CURRENT, {"MegaPack": list(CURRENT["MegaPack"]), "MegaComputer": []})
+    assert not diff.has_changes
+    assert diff.catalog["MegaComputer"] == CURRENT["MegaComputer"]
+
+def test_repeated_names_are_matched_in_order():
+    current = {"MegaPack": (laptop("Mouse Logitech"), laptop("Mouse Logitech", precio="$ 99.000"))}
+    scraped = {"MegaPack": [laptop("Mouse Logitech"), laptop("Mouse Logitech", precio="$ 89.000")]}
+    diff = diff_catalogs(current, scraped)
+    assert [p.precio for p in diff.changed] == ["$ 89.000"]
+    assert diff.catalog["MegaPack"][0] is current["MegaPack"][0]
@@ -0,0 +1,166 @@
+"""
+Pruebas de la búsqueda en el catálogo: producto nombrado (best_match),
+resultados de search_catalog y process_products
+"""
+import pytest
+
+from config.settings import settings
+from models.product import Product
+from services.catalog_index import CatalogIndex
+from services.message_processor import MessageProcessor
+
+CATALOG = {
+    "MegaPack": [
+        Product(nombre="Laptop HP Pavilion 15 Core i5 8GB RAM 512GB SSD", tienda="MegaPack",
+                precio="$ 2.499.000", disponibilidad="Disponible"),
+        Product(nombre="Laptop Lenovo IdeaPad 3 Ryzen 5 8GB 256GB SSD", tienda="MegaPack",
+                precio="$ 1.899.000", disponibilidad="Disponible"),
+        Product(nombre="Laptop Asus VivoBook 14 Core i3 4GB 128GB SSD", tienda="MegaPack",
+                precio="$ 1.299.000", disponibilidad="Agotado"),
+        Product(nombre="Laptop Acer Aspire 5 Core i7 16GB 1TB SSD", tienda="MegaPack",
+                precio="$ 3.199.000", disponibilidad="Disponible"),
+        Product(nombre="Monitor Samsung Odyssey G5 27 pulgadas 144Hz", tienda="MegaPack",
+                precio="$ 1.150.000", disponibilidad="Disponible"),
+    ],
+    "MegaComputer": [
+        Product(nombre="Celular Apple iPhone 13 128GB Negro", tienda="MegaComputer",
+                precio="$ 3.599.000", disponibilidad="Disponible"),
+        Product(nombre="Celular Samsung Galaxy A15 128GB Azul", tienda="MegaComputer",
+                precio="$ 699.000", disponibilidad="Disponible"),
+        Product(nombre="Teclado Logitech K380 Inalámbrico", tienda="MegaComputer",
+                precio="$ 189.000", disponibilidad="Disponible"),
+        Product(nombre="Mouse Logitech G203 Gamer RGB", tienda="MegaComputer",
+                precio="Consultar", disponibilidad="Consultar"),
+    ]
+}
+
+@pytest.fixture(scope="module")
+def index():
+    return CatalogIndex(CATALOG)
+
+@pytest.fixture(scope="module")
+def processor():
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "SEMANTIC_SEARCH_ENABLED", False)
+        processor = MessageProcessor()
+        processor.build_catalog_index(CATALOG)
+        yield processor
+
+# El tipo de producto no siempre es la primera palabra del nombre
+MIXED_CATALOG = {
+    "MegaPack": [
+        Product(nombre="Laptop Lenovo IdeaPad 3", tienda="MegaPack", precio="$ 1.799.000"),
+        Product(nombre="HP Victus Laptop 8GB 512GB", tienda="MegaPack", precio="$ 1.899.000"),
+        Product(nombre="Laptop Acer Nitro 5", tienda="MegaPack", precio="$ 3.299.000"),
+    ],
+    "MegaComputer": [
+        Product(nombre="Celular Samsung Galaxy A15", tienda="MegaComputer", precio="$ 799.000"),
+        Product(nombre="Samsung Galaxy A05", tienda="MegaComputer", precio="$ 499.000"),
+        Product(nombre="Celular Xiaomi Redmi 13C", tienda="MegaComputer", precio="$ 599.000"),
+        Product(nombre="Monitor Samsung 24 pulgadas", tienda="MegaComputer", precio="$ 1.499.000"),
+    ]
+}
+
+@pytest.fixture(scope="module")
+def mixed_processor():
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "SEMANTIC_SEARCH_ENABLED", False)
+        processor = MessageProcessor()
+        processor.build_catalog_index(MIXED_CATALOG)
+        yield processor
+
+@pytest.mark.parametrize("query", [
+    "tienen laptops?",
+    "hola, venden laptop",
+    "precio samsung",
+    "logitech",
+    "busco un celular",
+])
+def test_best_match_ignores_a_single_generic_word(index, query):
+    assert index.best_match(query) is None
+
+@pytest.mark.parametrize("query, expected", [
+    ("precio iphone 13", "Celular Apple iPhone 13 128GB Negro"),
+    ("tienen la laptop hp pavilion?", "Laptop HP Pavilion 15 Core i5 8GB RAM 512GB SSD"),
+    ("k380", "Teclado Logitech K380 Inalámbrico"),
+    ("cuanto vale el monitor odyssey", "Monitor Samsung Odyssey G5 27 pulgadas 144Hz"),
+])
+def test_best_match_finds_the_named_product(index, query, expected):
+    product = index.best_match(query)
+    assert product is not None and product.nombre == expected
+
+def test_best_match_tolerates_typos(index):
+    product = index.best_match("lenovo ideapda", min_similarity=0.5)
+    assert product is not None and product.nombre.startswith("Laptop Lenovo")
+
+def test_best_match_rejects_unknown_model_numbers(index):
+    # "a25" no es el "A15" del catálogo
+    assert index.best_match("samsung galaxy a25") is None
+
+def test_search_ranks_products_with_more_terms_first(index):
+    results = index.search("laptop core i7 16gb", limit=3)
+    best_doc, matched = results[0]
+    assert index.products[best_doc].nombre.startswith("Laptop Acer Aspire 5")
+    assert matched == max(m for _, m in results)
+    assert all(index.products[doc_id].nombre.startswith("Laptop") for doc_id, _ in results)
+
+def test_process_products_generic_query_has_alternatives_but_no_match(processor):
+    result = processor.process_products(CATALOG, "tienen laptops?")
+    assert result["productoEncontrado"] is None
+    assert result["alternativas"]
+    assert all(p.nombre.startswith("Laptop") for p in result["alternativas"])
+
+@pytest.mark.parametrize("query, expected", [
+    ("laptops de menos de 2 millones", {"Laptop Lenovo IdeaPad 3", "HP Victus Laptop 8GB 512GB"}),
+    ("samsung menos de 1 millon", {"Celular Samsung Galaxy A15", "Samsung Galaxy A05"}),
+    ("celular samsung menos de 1 millon",
+     {"Celular Samsung Galaxy A15", "Samsung Galaxy A05", "Celular Xiaomi Redmi 13C"}),
+])
+def test_price_range_keeps_products_whose_type_word_is_not_first(mixed_processor, query, expected):
+    result = mixed_processor.process_products(MIXED_CATALOG, query)
+    assert {p.nombre for p in result["alternativas"]} == expected
+    assert result["rangoPrecio"]["candidatos"] == len(expected)
+
+def test_price_range_without_a_named_product_returns_nothing(mixed_processor):
+    result = mixed_processor.process_products(MIXED_CATALOG, "monitor de menos de 1 millon")
+    assert result["alternativas"] == []
+
+def test_search_catalog_filters_by_price_store_and_paginates(processor):
+    result = processor.search_catalog("laptop de menos de 2 millones")
+    names = [product.nombre for product, _ in result["results"]]
+    assert result["filters"]["precio"] == {"min": None, "max": 2_000_000}
+    assert result["total"] == 2
+    assert set(names) == {
+        "Laptop Lenovo IdeaPad 3 Ryzen 5 8GB 256GB SSD",
+        "Laptop Asus VivoBook 14 Core i3 4GB 128GB SSD"
+    }
+
+    store = processor.search_catalog("logitech", store="MegaComputer")
+    assert store["total"] == 2
+    assert processor.search_catalog("logitech", store="MegaPack")["total"] == 0
+
+    first = processor.search_catalog("laptop", limit=2)
+    second = processor.search_catalog("laptop", limit=2, offset=2)
+    assert first["total"] == second["total"] == 4
+    paged = [p.nombre for p, _ in first["results"] + second["results"]]
+    assert len(set(paged)) == 4
+
+def test_search_catalog_unknown_words_return_nothing(processor):
+    result = processor.search_catalog("zzzz qqqq")
+    assert result["total"] == 0 and result["results"] == []
+
+def test_semantic_matrix_file_is_keyed_by_catalog_fingerprint(index, tmp_path):
+    semantic_index = pytest.importorskip("services.semantic_index")
+    pytest.importorskip("numpy")
+    path = str(tmp_path / "semantic_index.npy")
+    names = [product.nombre for product in index.products]
+    built = semantic_index.build_semantic_index(index.doc_tokens, index.df, names, 32, path)
+
+    # Otro catálogo no puede leer la matriz de este, y al guardar el suyo borra la anterior
+    other = semantic_index.SemanticIndex.fingerprint_for(names[:-1], 32)
+    assert semantic_index.SemanticIndex.load_matrix(path, other) is None
+    cached = semantic_index.SemanticIndex.load_matrix(path, built.fingerprint)
+    assert cached is not None and cached.shape == built.matrix.shape
+
+    semantic_index.build_semantic_index(index.doc_tokens[:-1], index.df, names[:-1], 32, path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"semantic_index.{other[:20]}.npy"]
@@ -0,0 +1,152 @@
+"""
+Pruebas del planificador por chat: orden por chat, paralelismo,
+contrapresión y liberación de carriles inactivos
+"""
+import asyncio
+
+from core.chat_scheduler import ChatScheduler
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_messages_of_a_chat_run_in_order():
+    async def scenario():
+        scheduler = ChatScheduler(lanes=4, lane_capacity=100, max_pending=1000, idle_timeout=1.0)
+        seen = []
+
+        def job(chat_id, n):
+            async def handle():
+                # Esperas decrecientes: sin carril serial, los últimos terminarían primero
+                await asyncio.sleep(0.001 * (10 - n))
+                seen.append((chat_id, n))
+            return handle
+
+        for n in range(10):
+            for chat_id in ("a", "b", "c"):
+                assert scheduler.submit(chat_id, job(chat_id, n))
+
+        assert await scheduler.drain(timeout=5)
+        await scheduler.close()
+        for chat_id in ("a", "b", "c"):
+            assert [n for chat, n in seen if chat == chat_id] == list(range(10))
+
+    run(scenario())
+
+def test_different_chats_run_in_parallel():
+    async def scenario():
+        scheduler = ChatScheduler(lanes=8, lane_capacity=10, max_pending=100, idle_timeout=1.0)
+        chats = [f"chat-{i}" for i in range(20)]
+        lanes = {scheduler.lane_for(chat_id) for chat_id in chats}
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        for chat_id in chats:
+            scheduler.submit(chat_id, job)
+        assert await scheduler.drain(timeout=5)
+        await scheduler.close()
+        # Un trabajo a la vez por carril, todos los carriles a la vez
+        assert peak == len(lanes)
+
+    run(scenario())
+
+def test_failing_job_does_not_stop_the_lane():
+    async def scenario():
+        scheduler = ChatScheduler(lanes=1, lane_capacity=10, max_pending=10, idle_timeout=1.0)
+        done = []
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def ok():
+            done.append(True)
+
+        scheduler.submit("a", fail)
+        scheduler.submit("a", ok)
+        assert await scheduler.drain(timeout=5)
+        await scheduler.close()
+        assert done == [True]
+        assert scheduler.get_stats()["processed"] == 2
+
+    run(scenario())
+
+def test_backpressure_rejects_when_full():
+    async def scenario():
+        scheduler = ChatScheduler(lanes=1, lane_capacity=2, max_pending=100, idle_timeout=1.0)
+        release = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+
+        # El primero pasa a ejecución y deja la cola del carril libre para dos más
+        assert scheduler.submit("a", blocked)
+        while not scheduler.get_stats()["busy_lanes"]:
+            await asyncio.sleep(0.001)
+        assert scheduler.submit("a", blocked)
+        assert scheduler.submit("a", blocked)
+        assert not scheduler.submit("a", blocked)
+
+        global_limit = ChatScheduler(lanes=4, lane_capacity=10, max_pending=2, idle_timeout=1.0)
+        assert global_limit.submit("a", blocked)
+        assert global_limit.submit("b", blocked)
+        assert not global_limit.submit("c", blocked)
+
+        release.set()
+        assert await scheduler.drain(timeout=5)
+        assert await global_limit.drain(timeout=5)
+        await scheduler.close()
+        await global_limit.close()
+        assert scheduler.get_stats()["rejected"] == 1
+        assert global_limit.get_stats()["rejected"] == 1
+
+    run(scenario())
+
+def test_idle_lanes_are_reclaimed_and_respawned():
+    async def scenario():
+        scheduler = ChatScheduler(lanes=4, lane_capacity=10, max_pending=100, idle_timeout=0.05)
+        done = []
+
+        async def job():
+            done.append(True)
+
+        scheduler.submit("a", job)
+        scheduler.submit("b", job)
+        assert await scheduler.drain(timeout=5)
+        await asyncio.sleep(0.2)
+
+        stats = scheduler.get_stats()
+        assert stats["active_lanes"] == 0
+        assert stats["lanes_reclaimed"] == stats["lanes_spawned"]
+
+        # Un chat que vuelve a escribir obtiene un carril nuevo
+        assert scheduler.submit("a", job)
+        assert await scheduler.drain(timeout=5)
+        await scheduler.close()
+        assert len(done) == 3
+        assert scheduler.get_stats()["lanes_spawned"] == stats["lanes_spawned"] + 1
+
+    run(scenario())
+
+def test_close_drains_pending_and_rejects_new_jobs():
+    async def scenario():
+        scheduler = ChatScheduler(lanes=2, lane_capacity=10, max_pending=100, idle_timeout=1.0)
+        done = []
+
+        async def job():
+            await asyncio.sleep(0.01)
+            done.append(True)
+
+        for _ in range(5):
+            scheduler.submit("a", job)
+        await scheduler.close(timeout=5)
+
+        assert len(done) == 5
+        assert not scheduler.submit("a", job)
+
+    run(scenario())
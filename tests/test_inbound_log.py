@@ -0,0 +1,129 @@
+"""
+Pruebas del log de entrada: persistencia, recuperación tras una caída,
+devolución de entradas y límite de intentos
+"""
+import asyncio
+
+from core.inbound_log import InboundLog
+
+def run(coro):
+    return asyncio.run(coro)
+
+def make_log(path, lease_seconds=60.0, max_attempts=3):
+    return InboundLog(path=str(path), batch_window=0.001, lease_seconds=lease_seconds, max_attempts=max_attempts)
+
+async def crash(log):
+    """Simular una caída: el proceso deja de escribir y de latir sin liberar nada"""
+    log._flusher.cancel()
+    await asyncio.gather(log._flusher, return_exceptions=True)
+    log._executor.shutdown(wait=True)
+
+def test_append_returns_ids_in_order(tmp_path):
+    async def scenario():
+        log = make_log(tmp_path / "inbound.db")
+        await log.open()
+        ids = await asyncio.gather(*(log.append({"n": n}) for n in range(20)))
+        await log.close()
+
+        assert ids == sorted(ids) and len(set(ids)) == 20
+        stats = log.get_stats()
+        assert stats["appended"] == 20
+        # Los appends concurrentes comparten commit
+        assert stats["commits"] < 20
+
+    run(scenario())
+
+def test_pending_entries_are_replayed_after_a_crash(tmp_path):
+    async def scenario():
+        crashed = make_log(tmp_path / "inbound.db", lease_seconds=0.05)
+        await crashed.open()
+        first = await crashed.append({"n": 1})
+        await crashed.append({"n": 2})
+        await crashed.append({"n": 3})
+        crashed.complete(first)
+        await asyncio.sleep(0.05)
+        await crash(crashed)
+
+        survivor = make_log(tmp_path / "inbound.db", lease_seconds=0.05)
+        await survivor.open()
+        # Mientras el latido del dueño es reciente, sus entradas no se tocan
+        await asyncio.sleep(0.15)
+        claimed = await survivor.claim_orphans()
+        assert [payload["n"] for _, payload in claimed] == [2, 3]
+
+        # Ya reclamadas: no se reproducen dos veces
+        assert await survivor.claim_orphans() == []
+        await survivor.close()
+
+    run(scenario())
+
+def test_clean_shutdown_hands_over_pending_entries_at_once(tmp_path):
+    async def scenario():
+        stopped = make_log(tmp_path / "inbound.db")
+        await stopped.open()
+        await stopped.append({"n": 1})
+        await stopped.close()
+
+        restarted = make_log(tmp_path / "inbound.db")
+        await restarted.open()
+        claimed = await restarted.claim_orphans()
+        await restarted.close()
+        assert [payload["n"] for _, payload in claimed] == [1]
+
+    run(scenario())
+
+def test_released_entries_are_retried_until_max_attempts(tmp_path):
+    async def scenario():
+        log = make_log(tmp_path / "inbound.db", max_attempts=2)
+        await log.open()
+        entry_id = await log.append({"n": 1})
+
+        # Las entradas propias en curso no se reclaman
+        assert await log.claim_orphans() == []
+
+        # Envío fallido: la entrada vuelve a estar disponible para el mismo proceso
+        for _ in range(2):
+            log.release(entry_id)
+            await asyncio.sleep(0.05)
+            assert [claimed_id for claimed_id, _ in await log.claim_orphans()] == [entry_id]
+
+        log.release(entry_id)
+        await asyncio.sleep(0.05)
+        assert await log.claim_orphans() == []
+        stats = log.get_stats()
+        await log.close()
+        assert stats["released"] == 3
+        assert stats["abandoned"] == 1
+
+    run(scenario())
+
+def test_completed_entries_are_not_released(tmp_path):
+    async def scenario():
+        log = make_log(tmp_path / "inbound.db")
+        await log.open()
+        entry_id = await log.append({"n": 1})
+        log.complete(entry_id)
+        log.release(entry_id)
+        await asyncio.sleep(0.05)
+        assert await log.claim_orphans() == []
+        await log.close()
+
+    run(scenario())
+
+def test_release_is_written_on_close_and_ignored_after(tmp_path):
+    async def scenario():
+        log = make_log(tmp_path / "inbound.db")
+        await log.open()
+        entry_id = await log.append({"n": 1})
+        log.release(entry_id)
+        await log.close()
+        # Después de cerrar no hay escritor: no debe fallar
+        log.release(entry_id)
+
+        reopened = make_log(tmp_path / "inbound.db")
+        await reopened.open()
+        claimed = await reopened.claim_orphans()
+        await reopened.close()
+        assert [claimed_id for claimed_id, _ in claimed] == [entry_id]
+
+    run(scenario())
@@ -0,0 +1,39 @@
+"""
+Pruebas del agrupador de ráfagas: ventana adaptativa y retención máxima
+"""
+import asyncio
+
+from core.message_coalescer import MessageCoalescer
+from models.message import WhatsAppMessage
+
+def text(chat_id, n):
+    return WhatsAppMessage(message_id=str(n), chat_id=chat_id, content=f"mensaje {n}",
+                           user_name="Cliente", message_type="text")
+
+def test_max_hold_caps_a_burst_that_keeps_growing():
+    async def scenario():
+        flushed = []
+        coalescer = MessageCoalescer(
+            on_flush=lambda chat_id, items: flushed.append((asyncio.get_running_loop().time(), len(items))),
+            min_window=0.1, max_window=0.1, idle_timeout=5.0, max_messages=100, max_hold=0.3
+        )
+        started = asyncio.get_running_loop().time()
+        assert not coalescer.offer(text("a", 0))
+        # Cada mensaje extiende la ventana de 0.1 s; la retención máxima corta en 0.3 s
+        for n in range(1, 12):
+            await asyncio.sleep(0.05)
+            coalescer.offer(text("a", n))
+        await asyncio.sleep(0.2)
+        coalescer.flush_all()
+
+        first_flush, size = flushed[0]
+        assert 0.25 <= first_flush - started <= 0.45
+        assert size > 1
+        assert sum(size for _, size in flushed) == 11
+
+    asyncio.run(scenario())
+
+def test_max_hold_is_never_below_max_window():
+    coalescer = MessageCoalescer(lambda *_: None, min_window=0.5, max_window=2.0, idle_timeout=5.0,
+                                 max_messages=8, max_hold=1.0)
+    assert coalescer.max_hold == 2.0
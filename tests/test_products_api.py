@@ -0,0 +1,65 @@
+"""
+Pruebas de los endpoints de productos sobre un catálogo instalado en el agente
+"""
+import asyncio
+import importlib
+
+import pytest
+
+from config.settings import settings
+from core.sales_agent import SalesAgent
+from models.product import Product
+
+CATALOG = {
+    "MegaPack": [
+        Product(nombre="Laptop Lenovo IdeaPad 3", tienda="MegaPack", precio="$ 1.799.000"),
+        Product(nombre="HP Victus Laptop 8GB 512GB", tienda="MegaPack", precio="$ 1.899.000"),
+        Product(nombre="Laptop Acer Nitro 5", tienda="MegaPack", precio="$ 3.299.000"),
+        Product(nombre="Mouse Logitech para Laptop", tienda="MegaPack", precio="$ 59.000"),
+    ],
+    "MegaComputer": [
+        Product(nombre="Celular Samsung Galaxy A15", tienda="MegaComputer", precio="$ 799.000"),
+        Product(nombre="Monitor Samsung 24 pulgadas", tienda="MegaComputer", precio="$ 1.499.000"),
+    ]
+}
+
+httpx = pytest.importorskip("httpx")
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """GET a la aplicación con un agente que ya tiene el catálogo (sin arrancarlo)"""
+    monkeypatch.setattr(settings, "LOG_FILE", str(tmp_path / "agente.log"))
+    monkeypatch.setattr(settings, "STATE_BACKEND", "memory")
+    monkeypatch.setattr(settings, "SEMANTIC_SEARCH_ENABLED", False)
+    main = importlib.import_module("main")
+
+    agent = SalesAgent()
+    agent.products_cache = CATALOG
+    agent.message_processor.build_catalog_index(CATALOG)
+    monkeypatch.setattr(main, "sales_agent", agent)
+
+    def get(path, **params):
+        async def request():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await http.get(path, params=params)
+        return asyncio.run(request())
+
+    yield get
+    agent.state.close()
+
+def test_search_counts_every_product_named_by_the_query_within_the_price(client):
+    response = client("/products/search", q="laptop", max_price=2_000_000)
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["total"] == 3
+    assert body["filters"]["precio"] == {"min": None, "max": 2_000_000}
+    assert {product["nombre"] for product in body["products"]} == {
+        "Laptop Lenovo IdeaPad 3", "HP Victus Laptop 8GB 512GB", "Mouse Logitech para Laptop"
+    }
+
+def test_search_price_in_the_query_text(client):
+    body = client("/products/search", q="samsung de menos de 1 millon").json()
+    assert body["total"] == 1
+    assert [product["nombre"] for product in body["products"]] == ["Celular Samsung Galaxy A15"]
@@ -0,0 +1,354 @@
+"""
+Pruebas del agente con estado compartido en SQLite: reproducción del log
+de entrada tras una caída, reintento de respuestas fallidas, adopción
+del catálogo publicado por otro worker, un solo scraping entre workers
+y caché de búsquedas
+"""
+import asyncio
+
+import pytest
+
+from config.settings import settings
+from core.sales_agent import SalesAgent
+from models.message import WhatsAppMessage
+from models.product import Product
+
+WEBHOOK = {
+    "event": "messages.upsert",
+    "instance": "ventas-01",
+    "server_url": "https://evoapi.example.com",
+    "apikey": "0000",
+    "data": {
+        "id": "3EB0C767D26A1D3B8C47",
+        "remoteJid": "573001234567@s.whatsapp.net",
+        "message": {"conversation": "tienen monitores samsung de 27?"},
+        "pushName": "Andrés"
+    }
+}
+
+@pytest.fixture
+def shared_state(tmp_path, monkeypatch):
+    """Configuración multi-worker: estado y log de entrada compartidos en archivos"""
+    overrides = {
+        "STATE_BACKEND": "sqlite",
+        "STATE_DB_PATH": str(tmp_path / "state.db"),
+        "STATE_SYNC_SECONDS": 0,
+        "INBOUND_LOG_ENABLED": True,
+        "INBOUND_LOG_PATH": str(tmp_path / "inbound.db"),
+        "INBOUND_LOG_BATCH_MS": 1,
+        "INBOUND_LOG_LEASE_SECONDS": 0.1,
+        "COALESCE_ENABLED": False,
+        "ADMISSION_ENABLED": False,
+        "SNAPSHOT_ENABLED": False,
+        "SEMANTIC_SEARCH_ENABLED": False,
+        "CATALOG_REFRESH_ENABLED": False
+    }
+    for name, value in overrides.items():
+        monkeypatch.setattr(settings, name, value)
+
+def make_agent(send):
+    """Agente con el envío de WhatsApp y la IA reemplazados"""
+    agent = SalesAgent()
+
+    async def generate_response(content, products, chat_id):
+        return f"respuesta a {content}"
+
+    agent.ai_service.generate_response = generate_response
+    agent.whatsapp_service.send_text_message = send
+    return agent
+
+async def start(agent):
+    agent._start_scheduler()
+    await agent._open_inbound_log()
+
+async def crash(agent):
+    """Caída a mitad de un mensaje: nada más llega a disco y nadie late"""
+    log = agent.inbound_log
+    agent._recovery_task.cancel()
+    log._flusher.cancel()
+    await asyncio.gather(agent._recovery_task, log._flusher, return_exceptions=True)
+    log._executor.shutdown(wait=True)
+
+    lanes = [lane.task for lane in agent.scheduler._lanes.values() if lane.task]
+    for task in lanes:
+        task.cancel()
+    await asyncio.gather(*lanes, return_exceptions=True)
+    agent.state.close()
+
+async def wait_for(condition, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "tiempo de espera agotado"
+        await asyncio.sleep(0.01)
+
+def test_message_interrupted_by_a_crash_is_answered_after_restart(shared_state):
+    async def scenario():
+        sending = asyncio.Event()
+
+        async def hang(chat_id, text, delay=0):
+            sending.set()
+            await asyncio.Event().wait()
+
+        crashed = make_agent(hang)
+        await start(crashed)
+        assert await crashed.enqueue_message(WEBHOOK)
+        # La clave de deduplicación ya está en el estado compartido
+        await asyncio.wait_for(sending.wait(), timeout=5)
+        await crash(crashed)
+
+        sent = []
+
+        async def send(chat_id, text, delay=0):
+            sent.append(chat_id)
+            return True
+
+        restarted = make_agent(send)
+        await asyncio.sleep(settings.INBOUND_LOG_LEASE_SECONDS * 2)
+        await start(restarted)
+        await wait_for(lambda: sent)
+        await restarted.stop()
+
+        assert sent == ["573001234567@s.whatsapp.net"]
+
+    asyncio.run(scenario())
+
+def test_failed_reply_is_retried_without_a_restart(shared_state):
+    async def scenario():
+        attempts = []
+
+        async def flaky(chat_id, text, delay=0):
+            attempts.append(chat_id)
+            return len(attempts) > 1
+
+        agent = make_agent(flaky)
+        await start(agent)
+        assert await agent.enqueue_message(WEBHOOK)
+        await wait_for(lambda: len(attempts) == 2)
+        await asyncio.sleep(settings.INBOUND_LOG_LEASE_SECONDS)
+
+        stats = agent.inbound_log.get_stats()
+        await agent.stop()
+        assert len(attempts) == 2
+        assert stats["released"] == 1
+        assert stats["completed"] == 1
+
+    asyncio.run(scenario())
+
+def test_redelivered_webhook_is_still_deduplicated(shared_state):
+    async def scenario():
+        sent = []
+
+        async def send(chat_id, text, delay=0):
+            sent.append(chat_id)
+            return True
+
+        agent = make_agent(send)
+        await start(agent)
+        await agent.enqueue_message(WEBHOOK)
+        await agent.enqueue_message(WEBHOOK)
+        await agent.scheduler.drain(timeout=5)
+        await agent.stop()
+        assert len(sent) == 1
+
+    asyncio.run(scenario())
+
+def test_catalog_published_by_another_worker_loads_in_background(shared_state):
+    async def scenario():
+        publisher = SalesAgent()
+        reader = SalesAgent()
+        catalog = {"MegaPack": [Product(nombre="Monitor Samsung Odyssey 27 pulgadas", tienda="MegaPack")]}
+        version = publisher.state.save_catalog(catalog)
+
+        # No bloquea: se sigue respondiendo con la versión vigente mientras carga
+        reader._sync_products_cache()
+        assert reader._catalog_version == 0
+        assert reader._sync_task is not None
+        await reader._sync_task
+
+        assert reader._catalog_version == version
+        assert reader.message_processor.catalog_index.source is reader.products_cache
+        assert len(reader.message_processor.catalog_index) == 1
+        publisher.state.close()
+        reader.state.close()
+
+    asyncio.run(scenario())
+
+def test_query_cache_keeps_price_filters_apart(shared_state, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_CACHE_ENABLED", True)
+
+    async def scenario():
+        agent = SalesAgent()
+        agent.state.save_catalog({"MegaPack": [
+            Product(nombre="Laptop HP Pavilion 15", tienda="MegaPack", precio="$ 2.499.000"),
+            Product(nombre="Laptop Lenovo IdeaPad 3", tienda="MegaPack", precio="$ 1.899.000")
+        ]})
+        await agent._load_shared_catalog()
+
+        above = agent._search_products("laptop más de 2 millones")
+        below = agent._search_products("laptop menos de 2 millones")
+        assert [p.nombre for p in above["alternativas"]] == ["Laptop HP Pavilion 15"]
+        assert [p.nombre for p in below["alternativas"]] == ["Laptop Lenovo IdeaPad 3"]
+
+        # Mayúsculas, tildes y signos no cambian la consulta: reutiliza el resultado
+        assert agent._search_products("¿Laptop mas de 2 millones?") is above
+        agent.state.close()
+
+    asyncio.run(scenario())
+
+def test_start_after_initialize_does_not_load_the_catalog_again(shared_state, monkeypatch):
+    monkeypatch.setattr(settings, "validate_config", lambda: {"valid": True, "errors": []})
+
+    async def scenario():
+        agent = make_agent(None)
+        scrapes = []
+
+        async def noop():
+            return True
+
+        async def scrape():
+            scrapes.append(1)
+            return True
+
+        agent.ai_service.initialize = noop
+        agent.whatsapp_service.validate_connection = noop
+        agent.refresh_products = scrape
+
+        # Como en main.py: initialize() en el arranque y luego start()
+        assert await agent.initialize()
+        await agent.start()
+        assert agent.is_running
+        assert scrapes == [1]
+        await agent.stop()
+
+    asyncio.run(scenario())
+
+CATALOG = {"MegaPack": [Product(nombre="Monitor Samsung Odyssey 27 pulgadas", tienda="MegaPack")]}
+
+def test_only_one_worker_scrapes_and_the_others_adopt_its_catalog(shared_state):
+    async def scenario():
+        workers = [SalesAgent() for _ in range(3)]
+        release = asyncio.Event()
+        scrapes = []
+
+        async def scrape_all_stores():
+            scrapes.append(1)
+            await release.wait()
+            return CATALOG
+
+        for worker in workers:
+            worker.scraping_service.scrape_all_stores = scrape_all_stores
+
+        refreshes = [asyncio.create_task(worker.refresh_products()) for worker in workers]
+        await wait_for(lambda: scrapes)
+        await asyncio.sleep(0.2)
+        release.set()
+
+        assert await asyncio.gather(*refreshes) == [True, True, True]
+        assert scrapes == [1]
+        assert {worker._catalog_version for worker in workers} == {1}
+        assert all(len(worker.message_processor.catalog_index) == 1 for worker in workers)
+        for worker in workers:
+            worker.state.close()
+
+    asyncio.run(scenario())
+
+def test_worker_scrapes_itself_when_the_lease_holder_fails(shared_state):
+    async def scenario():
+        holder, waiter = SalesAgent(), SalesAgent()
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            return {}
+
+        async def working():
+            return CATALOG
+
+        holder.scraping_service.scrape_all_stores = failing
+        waiter.scraping_service.scrape_all_stores = working
+
+        failed = asyncio.create_task(holder.refresh_products())
+        await asyncio.sleep(0.05)
+        waiting = asyncio.create_task(waiter.refresh_products())
+        await asyncio.sleep(0.2)
+        assert not waiting.done()
+        release.set()
+
+        assert not await failed
+        assert await waiting
+        assert waiter._catalog_version == 1
+        holder.state.close()
+        waiter.state.close()
+
+    asyncio.run(scenario())
+
+def test_burst_releases_every_entry_when_preparation_fails(shared_state):
+    agent = make_agent(None)
+    completed, released, prepared = [], [], []
+    agent._complete_entries = lambda *ids: completed.extend(ids)
+    agent._release_entries = lambda *ids: released.extend(ids)
+
+    async def prepare(message, check_duplicate=True):
+        # El primero es un duplicado; el segundo falla al escribir en el estado compartido
+        prepared.append(message)
+        if len(prepared) == 1:
+            return None
+        if len(prepared) == 2:
+            raise RuntimeError("database is locked")
+        return message
+
+    agent._prepare_message = prepare
+    items = [
+        (WhatsAppMessage(message_id=f"m{i}", chat_id="573001234567", content=f"hola {i}", user_name="Andrés"), i)
+        for i in (1, 2, 3, 4)
+    ]
+
+    assert not asyncio.run(agent._handle_burst(items))
+    assert completed == [1]
+    assert released == [2, 3, 4]
+    agent.state.close()
+
+def test_snapshot_older_than_the_shared_catalog_is_replaced(shared_state, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SNAPSHOT_ENABLED", True)
+    monkeypatch.setattr(settings, "SNAPSHOT_PATH", str(tmp_path / "catalog.snapshot"))
+
+    async def scenario():
+        writer = SalesAgent()
+        writer.state.save_catalog(CATALOG)
+        await writer._load_shared_catalog()
+        await writer._save_snapshot()
+
+        # Otro worker publica una versión más nueva después del snapshot
+        newer = {"MegaPack": CATALOG["MegaPack"] + [Product(nombre="Laptop Lenovo IdeaPad 3", tienda="MegaPack")]}
+        latest = writer.state.save_catalog(newer)
+
+        agent = SalesAgent()
+        assert agent._load_snapshot()
+        assert agent._catalog_version == latest - 1
+        agent._catalog_checked_at = float("-inf")
+        agent._sync_products_cache()
+        await agent._sync_task
+        assert agent._catalog_version == latest
+        assert len(agent.message_processor.catalog_index) == 2
+        writer.state.close()
+        agent.state.close()
+
+    asyncio.run(scenario())
+
+def test_stop_closes_the_page_cache(shared_state, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PAGE_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "PAGE_CACHE_PATH", str(tmp_path / "pages.db"))
+
+    async def scenario():
+        agent = SalesAgent()
+        cache = agent.scraping_service._get_page_cache()
+        assert await cache.get("https://megapack.co/") is None
+
+        await agent.stop()
+        assert agent.scraping_service.page_cache is None
+        assert cache._executor._shutdown
+        with pytest.raises(Exception):
+            cache._db.execute("SELECT 1")
+
+    asyncio.run(scenario())
@@ -0,0 +1,68 @@
+"""
+Pruebas del scraping de una tienda local (aiohttp): productos repetidos
+entre páginas y productos distintos con el mismo nombre
+"""
+import asyncio
+
+from aiohttp import web
+
+from config.settings import settings
+from services.scraping_service import ScrapingService
+
+LISTING = """
+<a href="/p/hp-15-i5"><h2>Laptop HP 15</h2></a><span>$ 2.199.000</span>
+<a href="/p/hp-15-i7#reviews"><h2>Laptop HP 15</h2></a><span>$ 2.899.000</span>
+<a href="/">Inicio</a><h2>Laptop Lenovo IdeaPad 3</h2>
+"""
+
+PRODUCT = '<a href="/">Inicio</a><h1>Laptop HP 15</h1><p>$ 2.199.000</p>'
+
+async def serve():
+    """Tienda con un listado y la ficha de uno de sus productos"""
+    async def listing(request):
+        return web.Response(text=LISTING, content_type="text/html")
+
+    async def product(request):
+        return web.Response(text=PRODUCT, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/", listing)
+    app.router.add_get("/p/hp-15-i5", product)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+def test_products_are_deduplicated_by_name_and_link(monkeypatch):
+    monkeypatch.setattr(settings, "PAGE_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "CRAWL_MAX_PAGES", 10)
+    monkeypatch.setattr(settings, "CRAWL_MAX_DEPTH", 1)
+    monkeypatch.setattr(settings, "CRAWL_HOST_RATE", 0)
+
+    async def scenario():
+        runner, url = await serve()
+        scraper = ScrapingService()
+        try:
+            products = await scraper._scrape_website(url, "MegaPack")
+        finally:
+            await scraper.close()
+            await runner.cleanup()
+
+        # La ficha de /p/hp-15-i5 es el mismo producto que su tarjeta; /p/hp-15-i7 es otro
+        assert scraper.crawl_stats["MegaPack"]["pages"] >= 2
+        assert sorted((p.nombre, p.precio_cop) for p in products) == [
+            ("Laptop HP 15", 2_199_000),
+            ("Laptop HP 15", 2_899_000),
+            ("Laptop Lenovo IdeaPad 3", None),
+        ]
+
+    asyncio.run(scenario())
+
+def test_product_cards_link_to_their_product_page():
+    cards = ScrapingService()._extract_product_cards(LISTING, "MegaPack", "https://megapack.co/laptops/")
+    assert [product_url for _, product_url in cards] == [
+        "https://megapack.co/p/hp-15-i5",
+        "https://megapack.co/p/hp-15-i7",
+        "https://megapack.co/laptops/",
+    ]
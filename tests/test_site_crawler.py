@@ -0,0 +1,57 @@
+"""
+Pruebas del rastreo con caché de páginas contra una tienda local (aiohttp)
+"""
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+from services.site_crawler import SiteCrawler
+from utils.page_cache import PageCache
+
+PAGE = "<h1>Laptop HP Pavilion 15</h1><p>$ 2.499.000</p>"
+ETAG = '"v1"'
+
+async def serve():
+    """Tienda de una sola página con ETag (responde 304 si el cliente ya la tiene)"""
+    async def home(request):
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304, headers={"ETag": ETAG})
+        return web.Response(text=PAGE, content_type="text/html", headers={"ETag": ETAG})
+
+    app = web.Application()
+    app.router.add_get("/", home)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+async def crawl(url, cache, tag, pages):
+    async with aiohttp.ClientSession() as session:
+        crawler = SiteCrawler(session, 1, 0, 1, 0, cache, tag)
+        return await crawler.crawl(url, lambda page_url, html: pages.append(html) or [], lambda *args: None)
+
+def test_page_is_downloaded_again_when_its_cached_html_is_gone(tmp_path):
+    async def scenario():
+        runner, url = await serve()
+        cache = PageCache(str(tmp_path / "pages.db"))
+        try:
+            pages = []
+            await crawl(url, cache, "v1", pages)
+            assert pages == [PAGE]
+
+            # Extractor nuevo con la página sin cambios (304), pero el HTML guardado ya no está
+            async def gone(page_url):
+                return None
+            cache.get_body = gone
+
+            stats = await crawl(url, cache, "v2", pages)
+            assert pages == [PAGE, PAGE]
+            assert stats["failed"] == 0 and stats["parsed"] == 1
+            assert (await cache.get(url)).tag == "v2"
+        finally:
+            cache.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
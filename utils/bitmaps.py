@@ -0,0 +1,85 @@
+"""
+Bitmaps de documentos sobre enteros de Python
+Un bit por producto: intersecciones y uniones en C con & y |
+"""
+import sys
+from array import array
+from itertools import compress, count
+from typing import Iterable, List
+
+def bitmap_from_ids(doc_ids: Iterable[int], size: int) -> int:
+    """
+    Construir un bitmap a partir de IDs de documento
+
+    Args:
+        doc_ids: IDs (posiciones) de los documentos
+        size: Total de documentos
+
+    Returns:
+        int: Entero con el bit doc_id encendido por cada documento
+    """
+    buffer = bytearray((size + 7) // 8)
+    for doc_id in doc_ids:
+        buffer[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(buffer, "little")
+
+def _words(bitmap: int) -> array:
+    """Palabras de 64 bits del bitmap, de la menos a la más significativa"""
+    words = array("Q", bitmap.to_bytes((bitmap.bit_length() + 63) // 64 * 8, "little"))
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words
+
+def bitmap_smallest(bitmap: int, limit: int) -> List[int]:
+    """
+    IDs más bajos presentes en un bitmap
+
+    Args:
+        bitmap: Bitmap de documentos
+        limit: Máximo de IDs a devolver
+
+    Returns:
+        List[int]: IDs en orden ascendente
+    """
+    doc_ids: List[int] = []
+    if not bitmap or limit <= 0:
+        return doc_ids
+
+    words = _words(bitmap)
+    # compress() salta en C las palabras vacías; solo se visitan las que tienen bits
+    for index in compress(count(), words):
+        word = words[index]
+        base = index << 6
+        while word:
+            lowest = word & -word
+            doc_ids.append(base + lowest.bit_length() - 1)
+            if len(doc_ids) >= limit:
+                return doc_ids
+            word ^= lowest
+    return doc_ids
+
+def bitmap_ids(bitmap: int) -> List[int]:
+    """
+    Todos los IDs presentes en un bitmap
+
+    Args:
+        bitmap: Bitmap de documentos
+
+    Returns:
+        List[int]: IDs en orden ascendente
+    """
+    if not bitmap:
+        return []
+    return bitmap_smallest(bitmap, bitmap.bit_length())
+
+def bitmap_count(bitmap: int) -> int:
+    """
+    Cantidad de documentos en un bitmap
+
+    Args:
+        bitmap: Bitmap de documentos
+
+    Returns:
+        int: Bits encendidos
+    """
+    return bin(bitmap).count("1")
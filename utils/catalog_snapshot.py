@@ -0,0 +1,107 @@
+"""
+Snapshot del catálogo y sus índices en disco
+Permite arrancar en milisegundos sin esperar el scraping de las tiendas
+"""
+import gc
+import json
+import logging
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Formato: MAGIC | versión (uint16) | largo del encabezado (uint32) | encabezado JSON | pickle
+MAGIC = b"AVCS"
+_PREFIX = struct.Struct("<4sHI")
+
+# Subir cuando cambie la estructura de los índices: los snapshots viejos se ignoran
+FORMAT_VERSION = 4
+
+def _runtime() -> str:
+    """Versión de Python: pickle de objetos propios solo es fiable en la misma"""
+    return f"{sys.version_info[0]}.{sys.version_info[1]}"
+
+def save_snapshot(path: str, payload: Dict[str, Any], header: Dict[str, Any]) -> int:
+    """
+    Guardar un snapshot de forma atómica (archivo temporal + rename)
+
+    Args:
+        path: Ruta del snapshot
+        payload: Objetos a serializar (catálogo e índices)
+        header: Metadatos legibles sin deserializar el contenido
+
+    Returns:
+        int: Bytes escritos
+    """
+    header = dict(header, format=FORMAT_VERSION, runtime=_runtime(), created_at=time.time())
+    header_bytes = json.dumps(header).encode("utf-8")
+    body = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(body)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return _PREFIX.size + len(header_bytes) + len(body)
+
+def _read_header(f) -> Optional[Dict[str, Any]]:
+    prefix = f.read(_PREFIX.size)
+    if len(prefix) < _PREFIX.size:
+        return None
+    magic, version, header_length = _PREFIX.unpack(prefix)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    header = json.loads(f.read(header_length).decode("utf-8"))
+    if header.get("runtime") != _runtime():
+        return None
+    return header
+
+def load_snapshot(path: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Cargar un snapshot compatible
+
+    Solo se cargan archivos escritos por save_snapshot en el propio
+    directorio de datos del agente (pickle no es seguro con archivos ajenos).
+
+    Args:
+        path: Ruta del snapshot
+
+    Returns:
+        Optional[Tuple[Dict[str, Any], Dict[str, Any]]]: (encabezado, contenido),
+            o None si no existe, es de otra versión o está dañado
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            header = _read_header(f)
+            if header is None:
+                logger.info(f"Snapshot {path} de otra versión: se ignora")
+                return None
+            # Cientos de miles de objetos nuevos: el recolector solo agregaría pausas
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                payload = pickle.load(f)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+        return header, payload
+    except Exception as e:
+        logger.warning(f"Snapshot {path} ilegible: {str(e)}")
+        return None
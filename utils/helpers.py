@@ -2,10 +2,17 @@
 Utilidades y funciones auxiliares
 """
 import re
+import json
 import logging
-from typing import Dict, Any, Optional
+import unicodedata
+from typing import Dict, Any, Optional, Union
 from urllib.parse import quote
 
+try:
+    import orjson
+except ImportError:  # orjson es opcional; se usa json de la librería estándar
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 def clean_text(text: str) -> str:
@@ -29,6 +36,40 @@ def clean_text(text: str) -> str:
 
     return text.strip()
 
+_NON_WORD = re.compile(r'[^a-z0-9ñ]+')
+
+def fold_accents(text: str) -> str:
+    """
+    Quitar tildes conservando la ñ ("Portátil" -> "Portatil")
+
+    Args:
+        text: Texto original
+
+    Returns:
+        str: Texto sin tildes
+    """
+    if text.isascii():
+        return text
+
+    decomposed = unicodedata.normalize('NFD', text.replace('ñ', '\x00').replace('Ñ', '\x01'))
+    folded = ''.join(c for c in decomposed if unicodedata.category(c) != 'Mn')
+    return folded.replace('\x00', 'ñ').replace('\x01', 'Ñ')
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizar texto para comparar: minúsculas, sin tildes ni puntuación
+
+    Args:
+        text: Texto a normalizar
+
+    Returns:
+        str: Palabras normalizadas separadas por un espacio
+    """
+    if not text:
+        return ""
+
+    return _NON_WORD.sub(' ', fold_accents(text.lower())).strip()
+
 def extract_urls(text: str) -> list:
     """
     Extraer URLs de un texto
@@ -97,6 +138,37 @@ def validate_webhook_data(data: Dict[str, Any]) -> bool:
         logger.error(f"Error validando webhook data: {str(e)}")
         return False
 
+def fast_json_loads(raw: Union[bytes, str]) -> Any:
+    """
+    Decodificar JSON con orjson si está instalado (json estándar si no)
+
+    Args:
+        raw: Documento JSON en bytes o texto
+
+    Returns:
+        Any: Documento decodificado
+
+    Raises:
+        ValueError: Si el documento no es JSON válido
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def fast_json_dumps(value: Any) -> bytes:
+    """
+    Codificar JSON (UTF-8, compacto) con orjson si está instalado
+
+    Args:
+        value: Valor serializable
+
+    Returns:
+        bytes: Documento JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
 def safe_get(data: Dict[str, Any], keys: list, default: Any = None) -> Any:
     """
     Obtener valor de diccionario de forma segura
@@ -147,6 +219,46 @@ def format_currency(amount: float, currency: str = "COP") -> str:
     except (ValueError, TypeError):
         return str(amount)
 
+# Número con separadores de miles o decimales ("1.660.000", "1,660,000.00")
+_PRICE_NUMBER = re.compile(r"\d{1,3}(?:[.,\s]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?")
+
+def parse_price(text: str) -> Optional[int]:
+    """
+    Convertir un precio en texto a entero (inverso de format_currency)
+
+    Sigue la convención de format_currency para COP: punto como separador
+    de miles y coma decimal ("$1.660.000", "$ 1.660.000,00"). También
+    acepta el formato con coma de miles ("$1,660,000.00"): el último
+    separador es decimal solo si lo siguen uno o dos dígitos.
+
+    Args:
+        text: Precio como texto ("$ 1.660.000", "Consultar"...)
+
+    Returns:
+        Optional[int]: Valor redondeado a unidades, o None si no hay precio
+    """
+    if not text:
+        return None
+
+    match = _PRICE_NUMBER.search(str(text).replace("\u00a0", " "))
+    if not match:
+        return None
+
+    number = re.sub(r"\s", "", match.group(0))
+    decimals = ""
+    last_separator = max(number.rfind("."), number.rfind(","))
+    if last_separator != -1 and len(number) - last_separator - 1 <= 2:
+        number, decimals = number[:last_separator], number[last_separator + 1:]
+
+    try:
+        value = int(re.sub(r"[.,]", "", number) or "0")
+        if decimals:
+            value = round(value + int(decimals) / 10 ** len(decimals))
+    except ValueError:
+        return None
+
+    return value or None
+
 def calculate_similarity(text1: str, text2: str) -> float:
     """
     Calcular similitud entre dos textos (simple)
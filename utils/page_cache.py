@@ -0,0 +1,176 @@
+"""
+Caché HTTP en disco de las páginas rastreadas
+Validadores (ETag / Last-Modified), hash del contenido y lo extraído de cada página
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    body BLOB NOT NULL,
+    links TEXT NOT NULL,
+    items TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    checked_at REAL NOT NULL
+);
+"""
+
+@dataclass
+class CachedPage:
+    """Una página cacheada: validadores, contenido y lo que se extrajo de ella"""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    links: List[Tuple[int, str]]
+    items: List[Dict[str, Any]]
+    # Versión del extractor que produjo items (si cambia, se vuelve a extraer del body)
+    tag: str
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Encabezados para una petición condicional"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class PageCache:
+    """
+    Páginas descargadas por URL en un archivo SQLite
+
+    Con los validadores de la última respuesta el rastreo hace GET
+    condicionales: un 304 reutiliza los enlaces y los productos ya
+    extraídos sin leer el HTML. Si la tienda no envía validadores, el hash
+    del contenido detecta un 200 con los mismos bytes. El HTML se guarda
+    comprimido para volver a extraer sin descargar si cambia el extractor.
+
+    Las consultas, la compresión y el JSON de cada página se ejecutan en
+    un hilo dedicado para no bloquear el event loop de los workers del
+    rastreo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(_SCHEMA)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-cache")
+
+    async def _run(self, fn, *args):
+        """Ejecutar una operación de disco en el hilo de la caché"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Página cacheada de una URL
+
+        Args:
+            url: URL canónica
+
+        Returns:
+            Optional[CachedPage]: Entrada (sin el HTML) o None
+        """
+        return await self._run(self._get, url)
+
+    def _get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, content_hash, links, items, tag FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_hash, links, items, tag = row
+        return CachedPage(
+            url, etag, last_modified, content_hash,
+            [(priority, link) for priority, link in json.loads(links)], json.loads(items), tag
+        )
+
+    async def get_body(self, url: str) -> Optional[str]:
+        """
+        HTML guardado de una URL
+
+        Args:
+            url: URL canónica
+
+        Returns:
+            Optional[str]: HTML o None si no está cacheada
+        """
+        return await self._run(self._get_body, url)
+
+    def _get_body(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT body FROM pages WHERE url = ?", (url,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    async def put(self, page: CachedPage, html: Optional[str] = None):
+        """
+        Guardar o actualizar una página
+
+        Args:
+            page: Validadores, hash, enlaces y productos extraídos
+            html: HTML de la respuesta (None conserva el guardado)
+        """
+        await self._run(self._put, page, html)
+
+    def _put(self, page: CachedPage, html: Optional[str]):
+        links = json.dumps(page.links)
+        items = json.dumps(page.items, ensure_ascii=False)
+        with self._lock:
+            if html is None:
+                self._db.execute(
+                    "UPDATE pages SET etag = ?, last_modified = ?, content_hash = ?, links = ?, items = ?, "
+                    "tag = ?, checked_at = ? WHERE url = ?",
+                    (page.etag, page.last_modified, page.content_hash, links, items, page.tag, time.time(), page.url)
+                )
+            else:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO pages "
+                    "(url, etag, last_modified, content_hash, body, links, items, tag, checked_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (page.url, page.etag, page.last_modified, page.content_hash,
+                     zlib.compress(html.encode("utf-8")), links, items, page.tag, time.time())
+                )
+
+    async def prune(self, max_age: float) -> int:
+        """
+        Borrar páginas que no se visitan hace más de max_age segundos
+
+        Args:
+            max_age: Antigüedad máxima en segundos
+
+        Returns:
+            int: Páginas borradas
+        """
+        return await self._run(self._prune, max_age)
+
+    def _prune(self, max_age: float) -> int:
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM pages WHERE checked_at < ?", (time.time() - max_age,))
+        return cursor.rowcount
+
+    def close(self):
+        """Esperar las operaciones pendientes y cerrar"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._db.close()
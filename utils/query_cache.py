@@ -0,0 +1,113 @@
+"""
+Caché LRU con expiración para resultados de búsqueda
+"""
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+class QueryCache:
+    """
+    Caché LRU + TTL de resultados de búsqueda de productos
+
+    Las claves deben incluir la versión del catálogo: al actualizarse el
+    catálogo las entradas viejas dejan de coincidir y salen por LRU o por
+    TTL sin invalidación explícita. El uso de memoria es una estimación
+    de las claves y los contenedores del resultado; los productos son los
+    del catálogo (compartidos), así que no se cuentan.
+    """
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._clock = clock
+        # clave -> (vence, resultado, bytes estimados)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Obtener un resultado cacheado vigente
+
+        Args:
+            key: Clave de la consulta
+
+        Returns:
+            Optional[Any]: Resultado o None si no está o venció
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+
+        if entry[0] <= self._clock():
+            self._remove(key)
+            self._stats["expired"] += 1
+            self._stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Guardar un resultado
+
+        Args:
+            key: Clave de la consulta
+            value: Resultado a cachear
+        """
+        if key in self._entries:
+            self._remove(key)
+
+        size = _estimate_size(key) + _estimate_size(value)
+        self._entries[key] = (self._clock() + self.ttl, value, size)
+        self._bytes += size
+
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self._stats["evicted"] += 1
+
+    def clear(self):
+        """Vaciar el caché"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        self._bytes -= self._entries.pop(key)[2]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas del caché
+
+        Returns:
+            Dict[str, Any]: Tamaño, tasa de aciertos, memoria estimada y expulsiones
+        """
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self._stats["hits"],
+            "misses": self._stats["misses"],
+            "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            "memory_bytes": self._bytes,
+            "expired": self._stats["expired"],
+            "evicted": self._stats["evicted"]
+        }
+
+def _estimate_size(value: Any) -> int:
+    """Bytes de un valor y sus contenedores (sin contar los objetos de dominio)"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value)
+    if isinstance(value, (str, bytes, int, float)):
+        return sys.getsizeof(value)
+    # Productos y demás objetos son referencias al catálogo
+    return 0
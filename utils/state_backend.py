@@ -0,0 +1,412 @@
+"""
+Backends de estado compartido
+Memoria de conversación, deduplicación, catálogo y leases, en proceso o compartidos entre workers
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.product import Product
+from utils.ttl_index import TTLDedupIndex
+
+logger = logging.getLogger(__name__)
+
+Exchange = Dict[str, str]
+Catalog = Dict[str, List[Product]]
+
+class StateBackend(ABC):
+    """
+    Interfaz del estado que debe ser coherente entre workers
+
+    Las operaciones son síncronas y thread-safe. Desde el event loop se
+    llaman con call(), que decide dónde ejecutarlas: en el proceso
+    directamente, o en un hilo si tocan disco y pueden esperar a otro
+    worker.
+    """
+
+    name = "base"
+
+    async def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Ejecutar una operación del backend sin bloquear el event loop
+
+        Args:
+            fn: Método del backend
+            *args: Argumentos
+
+        Returns:
+            Any: Resultado de la operación
+        """
+        return fn(*args)
+
+    # Memoria de conversación
+    @abstractmethod
+    def get_memory(self, chat_id: str) -> List[Exchange]:
+        """Intercambios recientes de un chat, del más antiguo al más nuevo"""
+
+    @abstractmethod
+    def append_memory(self, chat_id: str, exchange: Exchange, max_length: int):
+        """Agregar un intercambio conservando solo los últimos max_length"""
+
+    @abstractmethod
+    def clear_memory(self, chat_id: Optional[str] = None):
+        """Limpiar la memoria de un chat, o toda si chat_id es None"""
+
+    # Deduplicación
+    @abstractmethod
+    def check_and_add(self, key: str) -> bool:
+        """Registrar una clave y decir si ya estaba registrada (True = duplicado)"""
+
+    # Catálogo
+    @abstractmethod
+    def save_catalog(self, catalog: Catalog) -> int:
+        """Publicar un catálogo nuevo y devolver su versión"""
+
+    @abstractmethod
+    def load_catalog(self) -> Optional[Tuple[int, float, Catalog]]:
+        """Último catálogo publicado: (versión, timestamp, productos por tienda)"""
+
+    @abstractmethod
+    def catalog_version(self) -> int:
+        """Versión del último catálogo publicado (0 si no hay)"""
+
+    # Leases: una tarea a la vez entre todos los workers
+    @abstractmethod
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Tomar (o renovar) el lease si está libre, vencido o ya es de owner"""
+
+    @abstractmethod
+    def release_lease(self, name: str, owner: str, completed: bool = False):
+        """Liberar el lease si sigue siendo de owner; completed registra que la tarea terminó bien"""
+
+    @abstractmethod
+    def lease_completed_at(self, name: str) -> float:
+        """Cuándo terminó bien la tarea del lease por última vez (0 si nunca)"""
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del backend"""
+
+    def close(self):
+        """Liberar recursos"""
+
+class InMemoryStateBackend(StateBackend):
+    """Estado en memoria del proceso (un solo worker); call() ejecuta en el event loop"""
+
+    name = "memory"
+
+    def __init__(self, dedup_ttl: float, dedup_max_entries: int):
+        self._memory: Dict[str, List[Exchange]] = {}
+        self._dedup = TTLDedupIndex(ttl=dedup_ttl, max_size=dedup_max_entries)
+        self._catalog: Optional[Tuple[int, float, Catalog]] = None
+        # Lease -> [dueño, vence en, completado en]
+        self._leases: Dict[str, List[Any]] = {}
+
+    def get_memory(self, chat_id: str) -> List[Exchange]:
+        return self._memory.get(chat_id, [])
+
+    def append_memory(self, chat_id: str, exchange: Exchange, max_length: int):
+        history = self._memory.setdefault(chat_id, [])
+        history.append(exchange)
+        if len(history) > max_length:
+            del history[:-max_length]
+
+    def clear_memory(self, chat_id: Optional[str] = None):
+        if chat_id:
+            self._memory.pop(chat_id, None)
+        else:
+            self._memory.clear()
+
+    def check_and_add(self, key: str) -> bool:
+        return self._dedup.check_and_add(key)
+
+    def save_catalog(self, catalog: Catalog) -> int:
+        version = self.catalog_version() + 1
+        self._catalog = (version, time.time(), catalog)
+        return version
+
+    def load_catalog(self) -> Optional[Tuple[int, float, Catalog]]:
+        return self._catalog
+
+    def catalog_version(self) -> int:
+        return self._catalog[0] if self._catalog else 0
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        lease = self._leases.setdefault(name, ["", 0.0, 0.0])
+        if lease[0] != owner and lease[1] > now:
+            return False
+        lease[0], lease[1] = owner, now + ttl
+        return True
+
+    def release_lease(self, name: str, owner: str, completed: bool = False):
+        lease = self._leases.get(name)
+        if lease is not None and lease[0] == owner:
+            lease[1] = 0.0
+            if completed:
+                lease[2] = time.time()
+
+    def lease_completed_at(self, name: str) -> float:
+        lease = self._leases.get(name)
+        return lease[2] if lease else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "chats_in_memory": len(self._memory),
+            "catalog_version": self.catalog_version(),
+            "dedup": self._dedup.get_stats()
+        }
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    user TEXT NOT NULL,
+    agent TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS memory_chat ON memory (chat_id, seq);
+CREATE TABLE IF NOT EXISTS dedup (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dedup_expiry ON dedup (expires_at);
+CREATE TABLE IF NOT EXISTS catalog (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    completed_at REAL NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+"""
+
+# Cada cuántas inserciones en dedup se purgan las claves vencidas
+_DEDUP_PURGE_EVERY = 1000
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Estado compartido entre workers sobre un archivo SQLite en modo WAL
+
+    Cada proceso abre su propia conexión al mismo archivo. La
+    deduplicación es atómica entre procesos (un único UPSERT decide si la
+    clave es nueva) y la memoria de conversación se recorta por chat en la
+    misma transacción que la inserta. Las lecturas en WAL no bloquean a
+    los escritores, y synchronous=NORMAL evita un fsync por mensaje: el
+    estado es recuperable (el log de entrada es la fuente durable).
+
+    Con otro worker escribiendo, una operación puede esperar hasta
+    busy_timeout: call() las ejecuta en un hilo dedicado, como el log de
+    entrada, para no bloquear el event loop.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, dedup_ttl: float, dedup_max_entries: int):
+        self.path = path
+        self.dedup_ttl = dedup_ttl
+        self.dedup_max_entries = max(1, dedup_max_entries)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(_SCHEMA)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state")
+
+        self._inserts = 0
+        self._stats = {"hits": 0, "expired": 0}
+
+    async def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def get_memory(self, chat_id: str) -> List[Exchange]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT user, agent FROM memory WHERE chat_id = ? ORDER BY seq", (chat_id,)
+            ).fetchall()
+        return [{"user": user, "agent": agent} for user, agent in rows]
+
+    def append_memory(self, chat_id: str, exchange: Exchange, max_length: int):
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT INTO memory (chat_id, user, agent) VALUES (?, ?, ?)",
+                    (chat_id, exchange["user"], exchange["agent"])
+                )
+                db.execute(
+                    "DELETE FROM memory WHERE chat_id = ? AND seq NOT IN "
+                    "(SELECT seq FROM memory WHERE chat_id = ? ORDER BY seq DESC LIMIT ?)",
+                    (chat_id, chat_id, max_length)
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def clear_memory(self, chat_id: Optional[str] = None):
+        with self._lock:
+            if chat_id:
+                self._db.execute("DELETE FROM memory WHERE chat_id = ?", (chat_id,))
+            else:
+                self._db.execute("DELETE FROM memory")
+
+    def check_and_add(self, key: str) -> bool:
+        now = time.time()
+        with self._lock:
+            # Inserta la clave o reemplaza una vencida; si sigue vigente no cambia nada
+            cursor = self._db.execute(
+                "INSERT INTO dedup (key, expires_at) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at "
+                "WHERE dedup.expires_at <= ?",
+                (key, now + self.dedup_ttl, now)
+            )
+            duplicate = cursor.rowcount == 0
+
+            if duplicate:
+                self._stats["hits"] += 1
+            else:
+                self._inserts += 1
+                if self._inserts % _DEDUP_PURGE_EVERY == 0:
+                    self._purge_dedup(now)
+
+        return duplicate
+
+    def _purge_dedup(self, now: float):
+        """Borrar claves vencidas y, si se supera el máximo, las más próximas a vencer"""
+        cursor = self._db.execute("DELETE FROM dedup WHERE expires_at <= ?", (now,))
+        self._stats["expired"] += cursor.rowcount
+        self._db.execute(
+            "DELETE FROM dedup WHERE key IN (SELECT key FROM dedup ORDER BY expires_at "
+            "LIMIT max(0, (SELECT count(*) FROM dedup) - ?))",
+            (self.dedup_max_entries,)
+        )
+
+    def save_catalog(self, catalog: Catalog) -> int:
+        payload = json.dumps(
+            {store: [product.to_dict() for product in products] for store, products in catalog.items()},
+            ensure_ascii=False
+        )
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT version FROM catalog WHERE id = 1").fetchone()
+                version = (row[0] if row else 0) + 1
+                db.execute(
+                    "INSERT OR REPLACE INTO catalog (id, version, updated_at, payload) VALUES (1, ?, ?, ?)",
+                    (version, time.time(), payload)
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return version
+
+    def load_catalog(self) -> Optional[Tuple[int, float, Catalog]]:
+        with self._lock:
+            row = self._db.execute("SELECT version, updated_at, payload FROM catalog WHERE id = 1").fetchone()
+        if row is None:
+            return None
+
+        version, updated_at, payload = row
+        catalog = {
+            store: [Product(**item) for item in items]
+            for store, items in json.loads(payload).items()
+        }
+        return version, updated_at, catalog
+
+    def catalog_version(self) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT version FROM catalog WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            # Un único UPSERT decide entre workers: solo toma el lease si nadie más lo tiene vigente
+            cursor = self._db.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at <= ? OR leases.owner = excluded.owner",
+                (name, owner, now + ttl, now)
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self, name: str, owner: str, completed: bool = False):
+        with self._lock:
+            self._db.execute(
+                "UPDATE leases SET expires_at = 0, completed_at = CASE WHEN ? THEN ? ELSE completed_at END "
+                "WHERE name = ? AND owner = ?",
+                (completed, time.time(), name, owner)
+            )
+
+    def lease_completed_at(self, name: str) -> float:
+        with self._lock:
+            row = self._db.execute("SELECT completed_at FROM leases WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            chats = self._db.execute("SELECT count(DISTINCT chat_id) FROM memory").fetchone()[0]
+            dedup_size = self._db.execute("SELECT count(*) FROM dedup").fetchone()[0]
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "chats_in_memory": chats,
+            "catalog_version": self.catalog_version(),
+            "dedup": {
+                "size": dedup_size,
+                "max_size": self.dedup_max_entries,
+                "ttl_seconds": self.dedup_ttl,
+                "duplicates": self._stats["hits"],
+                "expired": self._stats["expired"]
+            }
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._db.close()
+
+def create_state_backend(kind: str, path: str, dedup_ttl: float, dedup_max_entries: int) -> StateBackend:
+    """
+    Crear el backend de estado configurado
+
+    Args:
+        kind: "memory" (un worker) o "sqlite" (compartido entre workers)
+        path: Ruta del archivo SQLite compartido
+        dedup_ttl: Segundos durante los que un mensaje repetido se ignora
+        dedup_max_entries: Máximo de mensajes recordados
+
+    Returns:
+        StateBackend: Backend listo para usar
+    """
+    if kind == "sqlite":
+        logger.info(f"Estado compartido en {path}")
+        return SQLiteStateBackend(path, dedup_ttl, dedup_max_entries)
+
+    if kind != "memory":
+        logger.warning(f"Backend de estado desconocido '{kind}', usando memoria del proceso")
+    return InMemoryStateBackend(dedup_ttl, dedup_max_entries)
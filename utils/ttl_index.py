@@ -0,0 +1,77 @@
+"""
+Índice de deduplicación con expiración por tiempo
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+class TTLDedupIndex:
+    """
+    Conjunto con TTL ordenado por inserción
+
+    Como todas las entradas usan el mismo TTL, el orden de inserción
+    coincide con el de expiración: las entradas vencidas siempre están al
+    principio y se expulsan en O(1) amortizado. El tamaño máximo acota la
+    memoria aunque el tráfico supere al TTL.
+    """
+
+    def __init__(self, ttl: float, max_size: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_size = max(1, max_size)
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._stats = {"hits": 0, "expired": 0, "evicted": 0}
+
+    def check_and_add(self, key: Hashable) -> bool:
+        """
+        Registrar una clave y decir si ya estaba registrada
+
+        Args:
+            key: Clave a verificar
+
+        Returns:
+            bool: True si la clave ya existía (duplicado)
+        """
+        now = self._clock()
+        entries = self._entries
+
+        # Expulsar vencidas del principio (inline: es el camino caliente)
+        while entries:
+            oldest = next(iter(entries))
+            if entries[oldest] > now:
+                break
+            del entries[oldest]
+            self._stats["expired"] += 1
+
+        if key in entries:
+            self._stats["hits"] += 1
+            return True
+
+        entries[key] = now + self.ttl
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self._stats["evicted"] += 1
+        return False
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires_at = self._entries.get(key)
+        return expires_at is not None and expires_at > self._clock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas del índice
+
+        Returns:
+            Dict[str, Any]: Tamaño, duplicados detectados y expulsiones
+        """
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "duplicates": self._stats["hits"],
+            "expired": self._stats["expired"],
+            "evicted": self._stats["evicted"]
+        }